@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compares the available JSON codecs (see kong.codec) on pages of consumers and plugin configurations, as returned by
+  the admin API when listing with a large page size.
+
+    PYTHONPATH=src python scripts/benchmarks/json_codec.py [--size 1000] [--number 20]
+
+Times are per page; the speedup is of decoding (the hot path of the clients), relative to the standard library.
+"""
+from __future__ import unicode_literals, print_function
+import argparse
+import json
+import random
+import timeit
+import uuid
+
+from kong.codec import CODECS, STDLIB_CODEC
+
+
+def get_consumer(index):
+    return {
+        'id': str(uuid.uuid4()),
+        'username': 'user-%d' % index,
+        'custom_id': 'customer-%08d' % random.randint(0, 10 ** 8),
+        'created_at': 1472563811000 + index,
+    }
+
+
+def get_plugin_configuration(index):
+    return {
+        'id': str(uuid.uuid4()),
+        'api_id': str(uuid.uuid4()),
+        'consumer_id': str(uuid.uuid4()) if index % 2 else None,
+        'name': 'rate-limiting' if index % 3 else 'cors',
+        'enabled': True,
+        'created_at': 1472563811000 + index,
+        'config': {
+            'minute': random.randint(1, 1000),
+            'hour': random.randint(1000, 100000),
+            'methods': ['GET', 'POST', 'PUT'],
+            'origin': 'https://example.com/ümlaut/%d' % index,
+            'preflight_continue': False,
+        } if index % 3 else {'origin': '*', 'max_age': 3600, 'credentials': True},
+    }
+
+
+def get_page(get_record, size):
+    return {
+        'data': [get_record(index) for index in range(size)],
+        'next': 'http://localhost:8001/consumers/?size=%d&offset=%s' % (size, uuid.uuid4()),
+        'total': size * 10,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1000, help='The amount of records per page')
+    parser.add_argument('--number', type=int, default=20, help='The amount of pages to decode and encode per codec')
+    args = parser.parse_args()
+
+    payloads = [
+        ('consumers', get_page(get_consumer, args.size)),
+        ('plugins', get_page(get_plugin_configuration, args.size)),
+    ]
+
+    print('%-10s %-8s %10s %12s %12s %8s' % ('payload', 'codec', 'bytes', 'loads', 'dumps', 'speedup'))
+    for name, page in payloads:
+        content = json.dumps(page).encode('utf-8')
+        baseline = None
+        for codec in [STDLIB_CODEC] + [codec for codec in CODECS.values() if codec is not STDLIB_CODEC]:
+            assert codec.loads(content) == page
+
+            loads = min(timeit.repeat(lambda: codec.loads(content), number=args.number, repeat=3)) / args.number
+            dumps = min(timeit.repeat(lambda: codec.dumps(page), number=args.number, repeat=3)) / args.number
+            baseline = baseline or loads
+
+            print('%-10s %-8s %10d %10.2fms %10.2fms %7.1fx' % (
+                name, codec.name, len(content), loads * 1e3, dumps * 1e3, baseline / loads))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmarks KongAdminClient end to end against a SimulatorServer running in the background, so connection pooling,
+  concurrency and retry settings can be tuned without a Kong cluster.
+
+    PYTHONPATH=src python scripts/benchmarks/simulator_server.py [--consumers 5000] [--concurrency 10]
+
+Pass --api-url to benchmark an already running server (or a real Kong) instead.
+"""
+from __future__ import unicode_literals, print_function
+import argparse
+import time
+import uuid
+
+from kong.client import KongAdminClient
+from kong.server import SimulatorServer
+
+
+def timed(label, amount, func):
+    started = time.time()
+    result = func()
+    elapsed = time.time() - started
+    print('%-28s %8d requests %8.2fs %10.0f requests/s' % (label, amount, elapsed, amount / elapsed))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--consumers', type=int, default=5000, help='The amount of consumers to create')
+    parser.add_argument('--concurrency', type=int, default=10, help='The amount of requests in flight for bulk calls')
+    parser.add_argument('--window-size', type=int, default=100, help='The page size used to iterate')
+    parser.add_argument('--api-url', help='The url of the admin API to benchmark (default: start a simulator server)')
+    args = parser.parse_args()
+
+    server = None
+    api_url = args.api_url
+    if api_url is None:
+        server = SimulatorServer(port=0).start()
+        api_url = server.url
+
+    client = KongAdminClient(api_url)
+    prefix = uuid.uuid4().hex[:8]
+    try:
+        specs = [{'username': '%s-%d' % (prefix, i)} for i in range(args.consumers)]
+        results = timed('consumers.bulk_create', args.consumers, lambda: list(
+            client.consumers.bulk_create(specs, concurrency=args.concurrency)))
+        ids = [result.result['id'] for result in results if result.succeeded]
+
+        timed('consumers.retrieve', len(ids), lambda: [client.consumers.retrieve(id) for id in ids])
+        timed('consumers.iterate (pages)', len(ids) // args.window_size + 1, lambda: list(
+            client.consumers.iterate(window_size=args.window_size)))
+        timed('consumers.delete', len(ids), lambda: [client.consumers.delete(id) for id in ids])
+    finally:
+        client.close()
+        if server is not None:
+            server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compares building request URLs with `URLBuilder` against the previous approach (`urljoin` + `add_url_params`).
+
+    PYTHONPATH=src python scripts/benchmarks/url_builder.py [--number 100000]
+"""
+from __future__ import unicode_literals, print_function
+import argparse
+import timeit
+import uuid
+
+import six
+
+from kong.compat import urljoin
+from kong.utils import URLBuilder, add_url_params, ensure_trailing_slash
+
+API_URL = 'http://localhost:8001'
+CONSUMER_ID = str(uuid.uuid4())
+
+CASES = [
+    ('collection', ('consumers',), {}),
+    ('record', ('consumers', CONSUMER_ID), {}),
+    ('nested', ('consumers', CONSUMER_ID, 'keyauth'), {}),
+    ('list', ('consumers',), {'size': 100, 'offset': CONSUMER_ID}),
+]
+
+
+def add_url_params_url(*path, **query_params):
+    path = [six.text_type(p) for p in path]
+    url = ensure_trailing_slash(urljoin(API_URL, '/'.join(path)))
+    return add_url_params(url, query_params)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=100000, help='The amount of URLs to build per case')
+    args = parser.parse_args()
+
+    builder = URLBuilder(API_URL)
+
+    print('%-12s %14s %14s %8s' % ('case', 'add_url_params', 'URLBuilder', 'speedup'))
+    for name, path, query_params in CASES:
+        assert builder.build(*path, **query_params) == add_url_params_url(*path, **query_params)
+
+        before = min(timeit.repeat(
+            lambda: add_url_params_url(*path, **query_params), number=args.number, repeat=3))
+        after = min(timeit.repeat(
+            lambda: builder.build(*path, **query_params), number=args.number, repeat=3))
+
+        print('%-12s %12.2fus %12.2fus %7.1fx' % (
+            name, before / args.number * 1e6, after / args.number * 1e6, before / after))
+
+
+if __name__ == '__main__':
+    main()
@@ -29,8 +29,15 @@ def read(*names, **kwargs):
         encoding=kwargs.get('encoding', 'utf8')
     ).read()
 
+
+def get_requirement(ir):
+    # str(ir.req) drops the environment marker (like `python_version < "3.0"`), which would install it everywhere
+    markers = getattr(ir, 'markers', None)
+    return '%s; %s' % (ir.req, markers) if markers else str(ir.req)
+
 # parse_requirements() returns generator of pip.req.InstallRequirement objects
-requirements = [str(ir.req) for ir in parse_requirements(os.path.join(BASE_DIR, 'requirements.txt'), session=False)]
+requirements = [get_requirement(ir)
+                for ir in parse_requirements(os.path.join(BASE_DIR, 'requirements.txt'), session=False)]
 # requirements_test = [str(ir.req) for ir in parse_requirements('./requirements-test.txt', session=False)]
 
 setup(
@@ -67,5 +74,8 @@ setup(
     ],
     keywords=[],
     install_requires=requirements,
-    extras_require={},
+    extras_require={
+        'async': ['aiohttp'],
+        'fast-json': ['orjson'],
+    },
 )
@@ -0,0 +1,675 @@
+# -*- coding: utf-8 -*-
+"""
+Asyncio flavour of kong.client. Every contract method returns a coroutine, so thousands of admin calls can be in flight
+  on a single event loop. The amount of concurrent requests is bounded by the transport.
+
+The asyncio admin clients are the admin clients of kong.client, sending the very same calls (kong.client.Call) over an
+  asyncio transport. Only what needs to await more than the response is done here: streaming pages, retrieving the
+  schemas to validate plugin configurations with, iterating and bulk operations.
+
+Requires Python 3.7+ (for async generators and contextvars) and aiohttp:
+
+    $ pip install aiohttp
+"""
+from __future__ import unicode_literals, print_function
+import asyncio
+import contextlib
+import contextvars
+import time
+
+import six
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+from .client import RestClient, KongAdminClient, APIAdminClient, ConsumerAdminClient, PluginAdminClient, \
+    APIPluginConfigurationAdminClient, BasicAuthAdminClient, KeyAuthAdminClient, OAuth2AdminClient
+from .mixins import get_next_offset, get_response_size
+from .compat import OK
+from .bulk import BulkResult, DEFAULT_BULK_CONCURRENCY
+from .metrics import RequestEvent, get_route
+from .retry import get_default_retry_policy
+from .deadline import Deadline, DEFAULT_TIMEOUT, earliest, normalize_timeout
+from .balancer import NodePool, ROUND_ROBIN, UNHEALTHY_STATUSES, HEALTH_CHECK_TIMEOUT, get_node_url
+from .validation import PluginConfigValidator
+from .streaming import StreamedPage, DATA_FIELD
+from .exceptions import DeadlineExceededError
+
+# Maximum number of requests in flight per transport
+DEFAULT_CONCURRENCY = 100
+
+# Size of the body of the last response received by the current task
+last_response_size = contextvars.ContextVar('last_response_size', default=None)
+
+# Timeout and deadline overrides of the current task, see AsyncTransport.timeouts
+current_timeout = contextvars.ContextVar('current_timeout', default=None)
+current_deadline = contextvars.ContextVar('current_deadline', default=None)
+
+
+def encode_form_data(data):
+    """
+    Mimics the way requests encodes form data: None values are dropped, everything else is sent as text.
+    """
+    if data is None:
+        return None
+    return dict((k, v if isinstance(v, six.text_type) else six.text_type(v)) for k, v in data.items() if v is not None)
+
+
+async def acquire_rate_limiter(rate_limiter):
+    """
+    Waits for a token (and in-flight slot) of a kong.ratelimit.RateLimiter without blocking the event loop.
+    """
+    while True:
+        wait = rate_limiter.try_acquire()
+        if wait == 0:
+            return
+        await asyncio.sleep(wait)
+
+
+async def prefetch_pages(pages, depth):
+    """
+    Asynchronous counterpart of kong.mixins.prefetch_pages: consumes an async iterator of pages in a background task,
+      staying at most `depth` pages ahead of the caller.
+    """
+    assert depth >= 1, 'depth should be at least 1'
+
+    queue = asyncio.Queue()
+    slots = asyncio.Semaphore(depth)
+
+    async def produce():
+        try:
+            async for page in pages:
+                await queue.put((True, page))
+                await slots.acquire()
+            await queue.put((False, None))
+        except Exception as e:
+            await queue.put((False, e))
+
+    await slots.acquire()
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            has_page, value = await queue.get()
+            if not has_page:
+                if value is not None:
+                    raise value
+                return
+            slots.release()
+            yield value
+    finally:
+        producer.cancel()
+
+
+async def call_for_result(func, spec):
+    try:
+        return BulkResult(spec, await func(**spec), None)
+    except Exception as e:
+        return BulkResult(spec, None, e)
+
+
+async def bulk_apply(func, specs, concurrency=DEFAULT_BULK_CONCURRENCY):
+    """
+    Asynchronous counterpart of kong.bulk.bulk_apply: awaits `func(**spec)` for every spec, keeping up to `concurrency`
+      calls in flight, and yields a kong.bulk.BulkResult per spec in order of completion.
+    """
+    assert concurrency >= 1, 'concurrency should be at least 1'
+
+    pending = set()
+    for spec in specs:
+        pending.add(asyncio.ensure_future(call_for_result(func, spec)))
+        if len(pending) >= concurrency:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
+
+
+def get_client_timeout(timeout, deadline=None):
+    """
+    :param timeout: The timeout of a request, as accepted by kong.deadline.normalize_timeout
+    :param deadline: The deadline of the call, which bounds the request as a whole
+    :type deadline: kong.deadline.Deadline
+    :rtype: aiohttp.ClientTimeout
+    """
+    connect, read = normalize_timeout(timeout)
+    total = None if deadline is None else deadline.remaining()
+    return aiohttp.ClientTimeout(total=total, sock_connect=connect, sock_read=read)
+
+
+class AsyncResponse(object):
+    """
+    The part of requests.Response the admin clients rely on. The body is read completely, unless the request was sent
+      with stream=True: then `content` is None until `read` is awaited, or the body is read with `read_chunk`.
+    """
+
+    def __init__(self, status_code, content, headers=None, url=None, stream=None):
+        """
+        :param stream: The aiohttp response whose body is still to be read, if any
+        :type stream: aiohttp.ClientResponse
+        """
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.url = url
+        self._stream = stream
+
+    async def read(self):
+        """
+        :rtype: bytes
+        :return: The (rest of the) body
+        """
+        if self.content is None:
+            self.content = await self._stream.read()
+            self.close()
+        return self.content
+
+    async def read_chunk(self, size):
+        """
+        :rtype: bytes
+        :return: Up to `size` bytes of the body, or None once it has been read completely
+        """
+        return await self._stream.content.read(size) or None
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.release()
+
+
+class AsyncStreamedPage(StreamedPage):
+    """
+    Asynchronous counterpart of kong.streaming.StreamedPage: `page['data']` is an async iterator over the items as they
+      are received. The other fields can be looked up as soon as they have been received; `await page.read_fields()`
+      reads the rest of the page first, keeping the items that weren't consumed for `page['data']`.
+    """
+
+    def __getitem__(self, key):
+        if key == DATA_FIELD:
+            return self.iterate()
+        return self._parser.fields[key]
+
+    async def read_fields(self):
+        """
+        :rtype: dict
+        :return: All fields of the page, except for `data`
+        """
+        while not self._exhausted:
+            self._pending.extend(await self._read())
+        return self._parser.fields
+
+    async def iterate(self):
+        try:
+            while True:
+                while self._pending:
+                    yield self._pending.popleft()
+                if self._exhausted:
+                    return
+                self._pending.extend(await self._read())
+        finally:
+            self.close()
+
+    async def _read(self):
+        return self._feed(await self.response.read_chunk(self.chunk_size))
+
+
+class AsyncTransport(object):
+    """
+    Asyncio counterpart of kong.transport.Transport. Owns an aiohttp session (and its connection pool) and bounds the
+      number of requests in flight with a semaphore.
+    """
+
+    def __init__(self, api_url, concurrency=DEFAULT_CONCURRENCY, rate_limiter=None, metrics=None, retry_policy=None,
+                 timeout=DEFAULT_TIMEOUT, deadline=None):
+        """
+        :param api_url: The url of the Kong admin endpoint
+        :type api_url: six.text_type
+        :param concurrency: The maximum number of requests (and connections) in flight
+        :type concurrency: int
+        :param rate_limiter: Limits the rate of requests sent over this transport. Can be shared with other (threaded)
+            transports.
+        :type rate_limiter: kong.ratelimit.RateLimiter
+        :param metrics: Receives a kong.metrics.RequestEvent for every request, if given
+        :type metrics: kong.metrics.MetricsHook
+        :param retry_policy: Decides which requests are retried and when. Defaults to a RetryPolicy with a RetryBudget.
+        :type retry_policy: kong.retry.RetryPolicy
+        :param timeout: The timeout of every request: seconds for both connecting and reading, a (connect, read) tuple,
+            or None to wait forever
+        :type timeout: float | tuple
+        :param deadline: The maximum amount of seconds a single call may take, including retries, or None for no limit
+        :type deadline: float
+        """
+        if aiohttp is None:  # pragma: no cover
+            raise ImportError('aiohttp is required to use the asyncio client: pip install aiohttp')
+
+        self.api_url = api_url
+        self.concurrency = concurrency
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.retry_policy = retry_policy or get_default_retry_policy()
+        self.timeout = timeout
+        self.deadline = deadline
+        self._session = None
+        self._semaphore = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.concurrency))
+        return self._session
+
+    @property
+    def semaphore(self):
+        # Created lazily, so it binds to the event loop that is actually running the requests
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    @property
+    def last_response_size(self):
+        """
+        :rtype: int
+        :return: The size (in bytes) of the body of the last response received by the current task
+        """
+        return last_response_size.get()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+        self._session = None
+        self._semaphore = None
+
+    @contextlib.contextmanager
+    def timeouts(self, timeout=None, deadline=None):
+        """
+        Overrides the timeout, and sets a deadline, for all requests sent by the current task within the block. A
+          nested block can shorten the deadline, but not extend it. Tasks created within the block inherit both.
+        """
+        timeout_token = current_timeout.set(timeout if timeout is not None else current_timeout.get())
+        deadline_token = current_deadline.set(
+            earliest(current_deadline.get(), Deadline(deadline)) if deadline is not None else current_deadline.get())
+        try:
+            yield self
+        finally:
+            current_deadline.reset(deadline_token)
+            current_timeout.reset(timeout_token)
+
+    def get_deadline(self):
+        deadline = current_deadline.get()
+        if self.deadline is not None:
+            deadline = earliest(deadline, Deadline(self.deadline))
+        return deadline
+
+    def get_timeout(self):
+        timeout = current_timeout.get()
+        return self.timeout if timeout is None else timeout
+
+    async def request(self, method, url, data=None, headers=None, timeout=None, stream=False):
+        timeout = timeout or self.get_timeout()
+        deadline = self.get_deadline()
+
+        attempt = 0
+        while True:
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceededError('Deadline exceeded before sending %s %s' % (method, url))
+
+            response, error = None, None
+            started = time.time()
+            try:
+                response = await self._request(method, url, data, headers, get_client_timeout(timeout, deadline),
+                                               stream)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = e
+
+            if self.metrics is not None:
+                self.metrics.on_request(RequestEvent(
+                    method, get_route(url, self.api_url), url, getattr(response, 'status_code', None),
+                    None if response is None else last_response_size.get(), attempt, time.time() - started, error))
+
+            delay = self.retry_policy.get_retry_delay(method, attempt, response, error, deadline)
+            if delay is None:
+                if error is not None:
+                    if deadline is not None and deadline.expired:
+                        raise DeadlineExceededError('Deadline exceeded: %r' % error)
+                    raise error
+                return response
+
+            if response is not None:
+                # Releases the connection of a streamed response
+                response.close()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _request(self, method, url, data, headers, timeout, stream):
+        async with self.semaphore:
+            if self.rate_limiter is None:
+                return await self._send(method, url, data, headers, timeout, stream)
+
+            await acquire_rate_limiter(self.rate_limiter)
+            try:
+                return await self._send(method, url, data, headers, timeout, stream)
+            finally:
+                self.rate_limiter.release()
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, data=None, **kwargs):
+        return await self.request('POST', url, data=data, **kwargs)
+
+    async def put(self, url, data=None, **kwargs):
+        return await self.request('PUT', url, data=data, **kwargs)
+
+    async def patch(self, url, data=None, **kwargs):
+        return await self.request('PATCH', url, data=data, **kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await self.request('DELETE', url, **kwargs)
+
+    async def _send(self, method, url, data, headers, timeout, stream=False):
+        if stream:
+            # Reading the content would defeat streaming
+            response = await self.session.request(method, url, data=encode_form_data(data), headers=headers,
+                                                  timeout=timeout)
+            content_length = response.headers.get('Content-Length')
+            last_response_size.set(int(content_length) if content_length else None)
+            return AsyncResponse(response.status, None, response.headers, url, stream=response)
+
+        async with self.session.request(method, url, data=encode_form_data(data), headers=headers,
+                                        timeout=timeout) as response:
+            content = await response.read()
+            last_response_size.set(len(content))
+            return AsyncResponse(response.status, content, response.headers, url)
+
+
+class AsyncBalancedTransport(AsyncTransport):
+    """
+    Asyncio counterpart of kong.balancer.BalancedTransport: spreads the requests over several nodes, with the same
+      kong.balancer.NodePool bookkeeping.
+    """
+
+    def __init__(self, api_urls, strategy=ROUND_ROBIN, max_failures=3, ejection_time=30, health_check_interval=None,
+                 **kwargs):
+        """
+        :param api_urls: The urls of the admin endpoints of the nodes
+        :type api_urls: list
+        :param health_check_interval: The amount of seconds between health checks of all nodes (in a background
+            task), or None to only rely on the outcome of requests
+        :type health_check_interval: float
+        :param kwargs: Passed to AsyncTransport
+
+        See kong.balancer.BalancedTransport for the other parameters.
+        """
+        super(AsyncBalancedTransport, self).__init__(api_urls[0], **kwargs)
+        self.pool = NodePool(api_urls, strategy=strategy, max_failures=max_failures, ejection_time=ejection_time)
+        self.health_check_interval = health_check_interval
+        self._health_checker = None
+
+    async def close(self):
+        if self._health_checker is not None:
+            self._health_checker.cancel()
+            self._health_checker = None
+        await super(AsyncBalancedTransport, self).close()
+
+    async def check_health(self):
+        """
+        Sends a request to the root of every node: nodes that respond are (re)admitted, others count a failure.
+
+        :rtype: dict
+        :return: Maps the api_url of every node to whether or not it is healthy
+        """
+        result = {}
+        for node in self.pool.nodes:
+            try:
+                async with self.session.get(node.api_url, timeout=aiohttp.ClientTimeout(
+                        total=HEALTH_CHECK_TIMEOUT)) as response:
+                    healthy = response.status not in UNHEALTHY_STATUSES
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                healthy = False
+
+            if healthy:
+                self.pool.report_success(node)
+            else:
+                self.pool.report_failure(node)
+            result[node.api_url] = healthy
+        return result
+
+    async def _send(self, method, url, data, headers, timeout, stream=False):
+        if self.health_check_interval is not None and self._health_checker is None:
+            self._health_checker = asyncio.ensure_future(self._check_health_periodically())
+
+        candidates = self.pool.get_candidates(method)
+        for index, node in enumerate(candidates):
+            self.pool.acquire(node)
+            try:
+                response = await super(AsyncBalancedTransport, self)._send(
+                    method, get_node_url(self.api_url, node, url), data, headers, timeout, stream)
+            except aiohttp.ClientConnectorError:
+                self.pool.report_failure(node)
+                # Fail over, unless this was the last node; then the retry policy decides
+                if index + 1 == len(candidates):
+                    raise
+                continue
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                # The request may have been handled, so it is not sent to another node right away
+                self.pool.report_failure(node)
+                raise
+            finally:
+                self.pool.release(node)
+
+            if response.status_code in UNHEALTHY_STATUSES:
+                self.pool.report_failure(node)
+            else:
+                self.pool.report_success(node)
+            return response
+
+    async def _check_health_periodically(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await self.check_health()
+
+
+class AsyncPluginConfigValidator(PluginConfigValidator):
+    """
+    kong.validation.PluginConfigValidator retrieving the schemas with an asyncio plugin admin. A schema has to be loaded
+      before configurations of its plugin are validated.
+    """
+
+    async def load(self, plugin_name):
+        """
+        Retrieves and compiles the schema of a plugin, unless it is known already.
+
+        :raises PluginConfigurationError: If the plugin is unknown
+        """
+        if self.has_schema(plugin_name):
+            return
+        try:
+            schema = await self.plugins.retrieve_schema(plugin_name)
+        except ValueError:
+            schema = None
+        self.add_schema(plugin_name, schema)
+
+
+class AsyncRestClient(RestClient):
+    """
+    Sends the calls of the admin clients (see kong.client.Call) over an AsyncTransport. Needs to be mixed in before the
+      admin client, so its methods take precedence.
+    """
+    STREAMED_PAGE_CLASS = AsyncStreamedPage
+
+    async def destroy(self):
+        transport = self._transport if self._owns_transport else None
+
+        # The admin client's destroy clears the rest, but can't await closing the transport
+        self._transport = None
+        super(AsyncRestClient, self).destroy()
+
+        if transport is not None:
+            await transport.close()
+
+    def create_transport(self):
+        return AsyncTransport(self.api_url)
+
+    async def execute(self, call):
+        response = await self.transport.request(call.method, call.url, data=call.data, headers=self.get_headers(),
+                                                stream=call.stream)
+        if call.stream and response.status_code != OK:
+            # The body of an error is read completely, for the exception raised by the handler
+            await response.read()
+        return call.handle(response)
+
+
+class AsyncCollectionMixin(object):
+    """
+    Asynchronous counterpart of kong.mixins.CollectionMixin. Needs to be mixed in before the contract, so its iterate
+      takes precedence:
+
+        async for consumer in client.consumers.iterate(window_size=100):
+            ...
+    """
+
+    async def iterate(self, window_size=10, prefetch=0, adaptive=None, stream=False, **filter_fields):
+        """
+        :param window_size: The amount of objects to request per page
+        :type window_size: int
+        :param prefetch: The amount of pages to fetch ahead in a background task while the caller processes the
+            current page. 0 (the default) fetches a page only when the previous one has been consumed.
+        :type prefetch: int
+        :param adaptive: Adjusts the page size between requests. Overrides window_size.
+        :type adaptive: kong.mixins.AdaptivePageSize
+        :param stream: Whether or not to yield the items of a page while it is being received (see kong.streaming).
+            Not in combination with prefetch or adaptive, which need complete pages.
+        :type stream: bool
+        :param filter_fields: Dictionary containing values to filter for
+        :type filter_fields: dict
+        """
+        assert not stream or (prefetch == 0 and adaptive is None), 'stream cannot be combined with prefetch or adaptive'
+
+        pages = self.iterate_pages(window_size, adaptive=adaptive, stream=stream, **filter_fields)
+        if prefetch > 0:
+            pages = prefetch_pages(pages, prefetch)
+
+        async for page in pages:
+            if stream:
+                async for item in page['data']:
+                    yield item
+            else:
+                for item in page['data']:
+                    yield item
+
+    async def iterate_pages(self, window_size=10, adaptive=None, stream=False, **filter_fields):
+        current_offset = None
+        if stream:
+            filter_fields['stream'] = True
+        while True:
+            if adaptive is None:
+                response = await self.list(size=window_size, offset=current_offset, **filter_fields)
+            else:
+                size = adaptive.size
+                started = adaptive.clock()
+                response = await self.list(size=size, offset=current_offset, **filter_fields)
+                adaptive.observe(size, len(response['data']), adaptive.clock() - started, get_response_size(self))
+            yield response
+            if stream:
+                # The link to the next page is only known once the page has been read
+                await response.read_fields()
+            current_offset = get_next_offset(response)
+            if current_offset is None:
+                return
+
+
+class AsyncAPIPluginConfigurationAdminClient(AsyncCollectionMixin, AsyncRestClient, APIPluginConfigurationAdminClient):
+    async def create(self, plugin_name, enabled=None, consumer_id=None, **fields):
+        await self.load_schema(plugin_name)
+        return await super(AsyncAPIPluginConfigurationAdminClient, self).create(
+            plugin_name, enabled=enabled, consumer_id=consumer_id, **fields)
+
+    async def create_or_update(self, plugin_name, plugin_configuration_id=None, enabled=None, consumer_id=None,
+                               **fields):
+        await self.load_schema(plugin_name)
+        return await super(AsyncAPIPluginConfigurationAdminClient, self).create_or_update(
+            plugin_name, plugin_configuration_id=plugin_configuration_id, enabled=enabled, consumer_id=consumer_id,
+            **fields)
+
+    async def update(self, plugin_id, enabled=None, consumer_id=None, **fields):
+        if self.validator is not None:
+            await self.load_schema(self.validator.get_plugin_name(plugin_id))
+        return await super(AsyncAPIPluginConfigurationAdminClient, self).update(
+            plugin_id, enabled=enabled, consumer_id=consumer_id, **fields)
+
+    async def load_schema(self, plugin_name):
+        """
+        Loads the schema the configuration of a plugin is validated with, if plugin configurations are validated.
+        """
+        if self.validator is not None and plugin_name is not None:
+            await self.validator.load(plugin_name)
+
+
+class AsyncAPIAdminClient(AsyncCollectionMixin, AsyncRestClient, APIAdminClient):
+    PLUGINS_CLASS = AsyncAPIPluginConfigurationAdminClient
+
+
+class AsyncBasicAuthAdminClient(AsyncCollectionMixin, AsyncRestClient, BasicAuthAdminClient):
+    pass
+
+
+class AsyncKeyAuthAdminClient(AsyncCollectionMixin, AsyncRestClient, KeyAuthAdminClient):
+    pass
+
+
+class AsyncOAuth2AdminClient(AsyncCollectionMixin, AsyncRestClient, OAuth2AdminClient):
+    pass
+
+
+class AsyncConsumerAdminClient(AsyncCollectionMixin, AsyncRestClient, ConsumerAdminClient):
+    BASIC_AUTH_CLASS = AsyncBasicAuthAdminClient
+    KEY_AUTH_CLASS = AsyncKeyAuthAdminClient
+    OAUTH2_CLASS = AsyncOAuth2AdminClient
+
+    async def bulk_create(self, specs, concurrency=DEFAULT_BULK_CONCURRENCY):
+        async for result in bulk_apply(self.create, specs, concurrency=concurrency):
+            yield result
+
+
+class AsyncPluginAdminClient(AsyncRestClient, PluginAdminClient):
+    pass
+
+
+class AsyncKongAdminClient(KongAdminClient):
+    TRANSPORT_CLASS = AsyncTransport
+    BALANCED_TRANSPORT_CLASS = AsyncBalancedTransport
+    API_ADMIN_CLASS = AsyncAPIAdminClient
+    CONSUMER_ADMIN_CLASS = AsyncConsumerAdminClient
+    PLUGIN_ADMIN_CLASS = AsyncPluginAdminClient
+    PLUGIN_VALIDATOR_CLASS = AsyncPluginConfigValidator
+
+    def __init__(self, api_url, transport=None, concurrency=DEFAULT_CONCURRENCY, **kwargs):
+        """
+        :param api_url: The url of the Kong admin endpoint, or a list of urls of nodes sharing a datastore to balance
+            the requests over
+        :type api_url: six.text_type | list
+        :param transport: The transport (connection pool) to use. If omitted, a new one is created and owned by this
+            client.
+        :type transport: AsyncTransport
+        :param concurrency: The maximum number of requests in flight, only used when no transport is given
+        :type concurrency: int
+        :param kwargs: The options of kong.client.KongAdminClient, like records, json_codec or validate_plugins
+        """
+        self.concurrency = concurrency
+        super(AsyncKongAdminClient, self).__init__(api_url, transport=transport, **kwargs)
+
+    def create_transport(self, api_url, load_balancing, **kwargs):
+        return super(AsyncKongAdminClient, self).create_transport(
+            api_url, load_balancing, concurrency=self.concurrency, **kwargs)
+
+    async def close(self):
+        await self.apis.destroy()
+        await self.consumers.destroy()
+        await self.plugins.destroy()
+
+        if self._owns_transport:
+            await self.transport.close()
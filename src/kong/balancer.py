@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+Client-side load balancing over several Kong nodes sharing a datastore. Reads are spread across the nodes, writes go
+  to the first healthy node (in the order given), and a request that can't reach its node fails over to the next one:
+
+    client = KongAdminClient(['http://kong-1:8001', 'http://kong-2:8001'], load_balancing=LEAST_OUTSTANDING)
+
+Nodes are ejected after `max_failures` consecutive failures (connection errors and 502/503/504 responses) and get
+  another chance after `ejection_time` seconds, or as soon as an (optional, periodic) health check succeeds. When all
+  nodes are ejected, requests are sent to all of them anyway: a failing request beats not trying at all.
+"""
+from __future__ import unicode_literals, print_function
+import itertools
+import threading
+import time
+
+import requests
+
+from .transport import Transport
+from .retry import NON_IDEMPOTENT_METHODS, is_connect_error
+
+# Load balancing strategies for reads
+ROUND_ROBIN = 'round_robin'
+LEAST_OUTSTANDING = 'least_outstanding'
+
+# Methods that are spread across the nodes
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Statuses meaning the node (or the proxy in front of it) is unable to handle requests
+UNHEALTHY_STATUSES = (502, 503, 504)
+
+# Seconds to wait for a health check response
+HEALTH_CHECK_TIMEOUT = 2
+
+
+def get_node_url(api_url, node, url):
+    """
+    :param api_url: The url the admin clients build their urls for (the url of the first node)
+    :type api_url: six.text_type
+    :param node: The node the request is sent to
+    :type node: Node
+    :param url: The url of the request
+    :type url: six.text_type
+    :rtype: six.text_type
+    :return: The url pointing to the node
+    """
+    prefix = api_url.rstrip('/')
+    if node.api_url == api_url or not url.startswith(prefix):
+        return url
+    return node.api_url.rstrip('/') + url[len(prefix):]
+
+
+class Node(object):
+    def __init__(self, api_url):
+        """
+        :param api_url: The url of the admin endpoint of the node
+        :type api_url: six.text_type
+        """
+        self.api_url = api_url
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.ejected_until = None
+
+    def __repr__(self):
+        return '<Node: %s>' % self.api_url
+
+    def is_available(self, now):
+        return self.ejected_until is None or self.ejected_until <= now
+
+
+class NodePool(object):
+    """
+    Thread-safe bookkeeping of the nodes: which ones are available, and how many requests each one has in flight.
+    """
+
+    def __init__(self, api_urls, strategy=ROUND_ROBIN, max_failures=3, ejection_time=30, clock=time.time):
+        """
+        :param api_urls: The urls of the admin endpoints of the nodes
+        :type api_urls: list
+        :param strategy: How reads are spread: ROUND_ROBIN or LEAST_OUTSTANDING (requests in flight)
+        :type strategy: six.text_type
+        :param max_failures: The amount of consecutive failures after which a node is ejected
+        :type max_failures: int
+        :param ejection_time: The amount of seconds an ejected node is skipped
+        :type ejection_time: float
+        :param clock: Function returning the current time in seconds
+        :type clock: callable
+        """
+        assert api_urls, 'at least one api_url is required'
+        assert strategy in (ROUND_ROBIN, LEAST_OUTSTANDING), 'unknown strategy: %r' % strategy
+
+        self.nodes = [Node(api_url) for api_url in api_urls]
+        self.strategy = strategy
+        self.max_failures = max_failures
+        self.ejection_time = ejection_time
+        self._clock = clock
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        """
+        :rtype: list
+        :return: The nodes that are not ejected
+        """
+        now = self._clock()
+        return [node for node in self.nodes if node.is_available(now)]
+
+    def get_candidates(self, method):
+        """
+        :param method: The HTTP method of the request
+        :type method: six.text_type
+        :rtype: list
+        :return: The nodes to try, in order: the chosen node first, the other nodes to fail over to after it
+        """
+        with self._lock:
+            candidates = self.available or list(self.nodes)
+            if method not in READ_METHODS:
+                return candidates
+
+            start = next(self._counter) % len(candidates)
+            candidates = candidates[start:] + candidates[:start]
+            if self.strategy == LEAST_OUTSTANDING:
+                # Stable, so ties are broken round-robin
+                candidates.sort(key=lambda node: node.outstanding)
+            return candidates
+
+    def acquire(self, node):
+        with self._lock:
+            node.outstanding += 1
+            node.requests += 1
+
+    def release(self, node):
+        with self._lock:
+            node.outstanding -= 1
+
+    def report_success(self, node):
+        with self._lock:
+            node.failures = 0
+            node.ejected_until = None
+
+    def report_failure(self, node):
+        with self._lock:
+            node.failures += 1
+            if node.failures >= self.max_failures:
+                node.ejected_until = self._clock() + self.ejection_time
+
+
+class BalancedTransport(Transport):
+    """
+    Transport spreading the requests of the admin clients over several nodes. The clients build urls for the first
+      node (`api_url`); they are rewritten to point to the node the request is sent to.
+    """
+
+    def __init__(self, api_urls, strategy=ROUND_ROBIN, max_failures=3, ejection_time=30, health_check_interval=None,
+                 **kwargs):
+        """
+        :param api_urls: The urls of the admin endpoints of the nodes
+        :type api_urls: list
+        :param strategy: How reads are spread: ROUND_ROBIN or LEAST_OUTSTANDING
+        :type strategy: six.text_type
+        :param max_failures: The amount of consecutive failures after which a node is ejected
+        :type max_failures: int
+        :param ejection_time: The amount of seconds an ejected node is skipped
+        :type ejection_time: float
+        :param health_check_interval: The amount of seconds between health checks of all nodes (in a background
+            thread), or None to only rely on the outcome of requests
+        :type health_check_interval: float
+        :param kwargs: Passed to kong.transport.Transport
+        """
+        super(BalancedTransport, self).__init__(api_urls[0], **kwargs)
+        self.pool = NodePool(api_urls, strategy=strategy, max_failures=max_failures, ejection_time=ejection_time)
+        self.health_check_interval = health_check_interval
+        self._health_checker = None
+        self._health_checker_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def close(self):
+        if self._health_checker is not None:
+            self._stopped.set()
+            self._health_checker.join()
+            self._health_checker = None
+            self._stopped.clear()
+        super(BalancedTransport, self).close()
+
+    def check_health(self):
+        """
+        Sends a request to the root of every node: nodes that respond are (re)admitted, others count a failure.
+
+        :rtype: dict
+        :return: Maps the api_url of every node to whether or not it is healthy
+        """
+        result = {}
+        for node in self.pool.nodes:
+            try:
+                response = self.session.get(node.api_url, timeout=HEALTH_CHECK_TIMEOUT)
+                healthy = response.status_code not in UNHEALTHY_STATUSES
+            except (requests.ConnectionError, requests.Timeout):
+                healthy = False
+
+            if healthy:
+                self.pool.report_success(node)
+            else:
+                self.pool.report_failure(node)
+            result[node.api_url] = healthy
+        return result
+
+    def _send(self, method, url, **kwargs):
+        if self.health_check_interval is not None and self._health_checker is None:
+            self._start_health_checker()
+
+        candidates = self.pool.get_candidates(method)
+        for index, node in enumerate(candidates):
+            self.pool.acquire(node)
+            try:
+                response = super(BalancedTransport, self)._send(method, get_node_url(self.api_url, node, url), **kwargs)
+            except requests.ConnectionError as e:
+                self.pool.report_failure(node)
+                # Fail over, unless this was the last node (then the retry policy decides), or a non-idempotent request
+                #   may have been handled before the connection dropped
+                if index + 1 == len(candidates) or (method in NON_IDEMPOTENT_METHODS and not is_connect_error(e)):
+                    raise
+                continue
+            except requests.Timeout:
+                # The request may have been handled, so it is not sent to another node right away
+                self.pool.report_failure(node)
+                raise
+            finally:
+                self.pool.release(node)
+
+            if response.status_code in UNHEALTHY_STATUSES:
+                self.pool.report_failure(node)
+            else:
+                self.pool.report_success(node)
+            return response
+
+    def _start_health_checker(self):
+        def run():
+            # Event.wait only returns the flag since Python 2.7
+            while True:
+                self._stopped.wait(self.health_check_interval)
+                if self._stopped.is_set():
+                    return
+                self.check_health()
+
+        with self._health_checker_lock:
+            if self._health_checker is None:
+                self._health_checker = threading.Thread(target=run)
+                self._health_checker.daemon = True
+                self._health_checker.start()
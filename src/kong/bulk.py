@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .exceptions import ConflictError
+
+# Default amount of calls in flight for bulk operations
+DEFAULT_BULK_CONCURRENCY = 10
+
+
+class BulkResult(namedtuple('BulkResult', ['spec', 'result', 'error'])):
+    """
+    Outcome of a single item of a bulk operation.
+
+    :ivar spec: The keyword arguments the item was created with
+    :ivar result: The response of the call, or None if it failed
+    :ivar error: The exception raised by the call, or None if it succeeded
+    """
+    __slots__ = ()
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+    @property
+    def conflict(self):
+        return isinstance(self.error, ConflictError)
+
+
+def bind_timeouts(owner, func):
+    """
+    Binds a function to the timeout and deadline the current thread set on the transport of a client (see
+      kong.transport.Transport.bind), so they also apply when it's called by the workers of bulk_apply.
+
+    :param owner: The client (or admin) the function sends its requests with. Clients without a transport, like the
+        simulator, are left alone.
+    :type func: callable
+    :rtype: callable
+    """
+    bind = getattr(getattr(owner, 'transport', None), 'bind', None)
+    return func if bind is None else bind(func)
+
+
+def call_for_result(func, spec):
+    try:
+        return BulkResult(spec, func(**spec), None)
+    except Exception as e:
+        return BulkResult(spec, None, e)
+
+
+def bulk_apply(func, specs, concurrency=DEFAULT_BULK_CONCURRENCY):
+    """
+    Calls `func(**spec)` for every spec, keeping up to `concurrency` calls in flight. The specs are consumed lazily, so
+      arbitrarily large iterables (or generators) can be streamed through. Failures do not abort the other calls.
+      Requests sent by func run without the caller's timeouts, unless it's bound with bind_timeouts.
+
+    :param func: The function to call for every spec
+    :type func: callable
+    :param specs: Iterable of dictionaries containing the keyword arguments for func
+    :type specs: collections.Iterable
+    :param concurrency: The maximum amount of calls in flight
+    :type concurrency: int
+    :rtype: collections.Iterator[BulkResult]
+    :return: Iterator yielding a BulkResult per spec, in order of completion
+    """
+    assert concurrency >= 1, 'concurrency should be at least 1'
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = set()
+        for spec in specs:
+            pending.add(executor.submit(call_for_result, func, spec))
+            if len(pending) >= concurrency:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
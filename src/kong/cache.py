@@ -0,0 +1,433 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import copy
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+
+from .contract import KongAdminContract, APIAdminContract, ConsumerAdminContract, PluginAdminContract
+from .compat import OrderedDict, Mapping
+from .utils import uuid_or_string
+
+
+class TTLCache(object):
+    """
+    Thread-safe LRU cache whose entries expire after `ttl` seconds. Every entry can be found under several keys (like an
+      id and a name); invalidating any of them drops the entry under all of its keys.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60, clock=time.time):
+        """
+        :param maxsize: The maximum amount of entries
+        :type maxsize: int
+        :param ttl: The amount of seconds an entry stays valid, or None to never expire entries
+        :type ttl: float
+        :param clock: Function returning the current time in seconds
+        :type clock: callable
+        """
+        assert maxsize >= 1, 'maxsize should be at least 1'
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # primary key -> (value, expires_at, keys)
+        self._keys = {}  # key -> primary key
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self):
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+    def get(self, key):
+        """
+        :return: The cached value, or None if there is no (valid) entry for the key
+        """
+        with self._lock:
+            primary_key = self._keys.get(key)
+            if primary_key is None:
+                self.misses += 1
+                return None
+
+            value, expires_at, keys = self._entries[primary_key]
+            if expires_at is not None and expires_at <= self._clock():
+                self._remove(primary_key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._move_to_end(primary_key)
+            self.hits += 1
+            return value
+
+    def set(self, keys, value):
+        """
+        :param keys: The keys to store the value under. The first one identifies the entry.
+        :type keys: list
+        :param value: The value to store
+        """
+        keys = [key for key in keys if key is not None]
+        assert keys, 'At least one key is required'
+
+        with self._lock:
+            for key in keys:
+                if key in self._keys:
+                    self._remove(self._keys[key])
+
+            expires_at = None if self.ttl is None else self._clock() + self.ttl
+            self._entries[keys[0]] = (value, expires_at, keys)
+            for key in keys:
+                self._keys[key] = keys[0]
+
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                primary_key = self._keys.get(key)
+                if primary_key is not None:
+                    self._remove(primary_key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+
+    def _remove(self, primary_key):
+        value, expires_at, keys = self._entries.pop(primary_key)
+        for key in keys:
+            self._keys.pop(key, None)
+
+    def _move_to_end(self, primary_key):
+        entry = self._entries.pop(primary_key)
+        self._entries[primary_key] = entry
+
+
+class CachingAdminMixin(object):
+    """
+    Read-through cache around the `retrieve` method of an admin. Writes done through the same admin invalidate the
+      affected entries. Everything else is passed on to the wrapped admin.
+    """
+    cache_key_field = None
+
+    def __init__(self, admin, cache):
+        self.admin = admin
+        self.cache = cache
+
+    def __getattr__(self, name):
+        if name == 'admin':
+            raise AttributeError(name)
+        return getattr(self.admin, name)
+
+    def cached_retrieve(self, key):
+        key = uuid_or_string(key)
+        result = self.cache.get(key)
+        if result is None:
+            result = self.admin.retrieve(key)
+            if result is not None:
+                self.cache.set([result.get('id'), result.get(self.cache_key_field)], result)
+        return copy.copy(result)
+
+    def invalidate(self, key, result=None):
+        if key is not None:
+            self.cache.invalidate(uuid_or_string(key))
+        # A dict, or a kong.records record when the admin returns records
+        if isinstance(result, Mapping):
+            self.cache.invalidate(result.get('id'), result.get(self.cache_key_field))
+        return result
+
+    def destroy(self):
+        self.cache.clear()
+        self.admin.destroy()
+
+    def count(self):
+        return self.admin.count()
+
+    def list(self, size=100, offset=None, **filter_fields):
+        return self.admin.list(size=size, offset=offset, **filter_fields)
+
+
+class CachingAPIAdmin(CachingAdminMixin, APIAdminContract):
+    cache_key_field = 'name'
+
+    def create(self, upstream_url, name=None, request_host=None, request_path=None, strip_request_path=False,
+               preserve_host=False):
+        return self.admin.create(
+            upstream_url, name=name, request_host=request_host, request_path=request_path,
+            strip_request_path=strip_request_path, preserve_host=preserve_host)
+
+    def create_or_update(self, upstream_url, api_id=None, name=None, request_host=None, request_path=None,
+                         strip_request_path=False, preserve_host=False):
+        self.invalidate(api_id)
+        self.invalidate(name)
+        return self.invalidate(api_id, self.admin.create_or_update(
+            upstream_url, api_id=api_id, name=name, request_host=request_host, request_path=request_path,
+            strip_request_path=strip_request_path, preserve_host=preserve_host))
+
+    def update(self, name_or_id, upstream_url, **fields):
+        self.invalidate(name_or_id)
+        return self.invalidate(name_or_id, self.admin.update(name_or_id, upstream_url, **fields))
+
+    def retrieve(self, name_or_id):
+        return self.cached_retrieve(name_or_id)
+
+    def delete(self, name_or_id):
+        self.invalidate(name_or_id)
+        return self.admin.delete(name_or_id)
+
+    def plugins(self, name_or_id):
+        return self.admin.plugins(name_or_id)
+
+
+class CachingConsumerAdmin(CachingAdminMixin, ConsumerAdminContract):
+    cache_key_field = 'username'
+
+    def create(self, username=None, custom_id=None):
+        return self.admin.create(username=username, custom_id=custom_id)
+
+    def create_or_update(self, consumer_id=None, username=None, custom_id=None):
+        self.invalidate(consumer_id)
+        self.invalidate(username)
+        return self.invalidate(consumer_id, self.admin.create_or_update(
+            consumer_id=consumer_id, username=username, custom_id=custom_id))
+
+    def update(self, username_or_id, **fields):
+        self.invalidate(username_or_id)
+        return self.invalidate(username_or_id, self.admin.update(username_or_id, **fields))
+
+    def retrieve(self, username_or_id):
+        return self.cached_retrieve(username_or_id)
+
+    def delete(self, username_or_id):
+        self.invalidate(username_or_id)
+        return self.admin.delete(username_or_id)
+
+    def basic_auth(self, username_or_id):
+        return self.admin.basic_auth(username_or_id)
+
+    def key_auth(self, username_or_id):
+        return self.admin.key_auth(username_or_id)
+
+    def oauth2(self, username_or_id):
+        return self.admin.oauth2(username_or_id)
+
+
+def get_default_schema_cache_dir():
+    """
+    :return: KONG_SCHEMA_CACHE_DIR if set, otherwise ~/.cache/python-kong/schemas
+    """
+    return os.getenv('KONG_SCHEMA_CACHE_DIR') or os.path.join(
+        os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'python-kong', 'schemas')
+
+
+class SchemaStore(object):
+    """
+    Keeps plugin schemas on disk, in a JSON file per admin endpoint and Kong version. Files are replaced atomically,
+      so concurrent processes never read a partially written file.
+    """
+
+    def __init__(self, directory=None):
+        """
+        :param directory: The directory to store the files in. Defaults to get_default_schema_cache_dir().
+        :type directory: six.text_type
+        """
+        self.directory = directory or get_default_schema_cache_dir()
+
+    def get_path(self, endpoint, version):
+        key = hashlib.sha1(('%s|%s' % (endpoint, version)).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, '%s.json' % key)
+
+    def load(self, endpoint, version):
+        """
+        :rtype: dict
+        :return: The stored data, or None if there is none (or it can't be read)
+        """
+        try:
+            with io.open(self.get_path(endpoint, version), encoding='utf-8') as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if data.get('endpoint') != endpoint or data.get('version') != version:
+            return None
+        return data
+
+    def save(self, endpoint, version, data):
+        """
+        Writes to a temporary file in the same directory, then moves it in place.
+        """
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError:  # Created concurrently
+                if not os.path.isdir(self.directory):
+                    raise
+
+        data = dict(data, endpoint=endpoint, version=version)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.', suffix='.tmp')
+        try:
+            with io.open(fd, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(data, sort_keys=True, ensure_ascii=False))
+                f.flush()
+                os.fsync(f.fileno())
+            getattr(os, 'replace', os.rename)(temp_path, self.get_path(endpoint, version))
+        except Exception:
+            os.unlink(temp_path)
+            raise
+
+
+class CachingPluginAdmin(PluginAdminContract):
+    """
+    Persistent cache around `retrieve_schema`. Schemas are stored per admin endpoint and Kong version, together with
+      the set of enabled plugins. The first use in a process checks the enabled plugins (`list`); if they changed, all
+      stored schemas are dropped. A warm start needs no schema requests at all.
+    """
+
+    def __init__(self, admin, store, endpoint, version=None):
+        """
+        :param admin: The admin to wrap
+        :type admin: PluginAdminContract
+        :param store: Where to keep the schemas
+        :type store: SchemaStore
+        :param endpoint: The url of the admin endpoint
+        :type endpoint: six.text_type
+        :param version: The version of Kong, or a function returning it (called once, when first needed)
+        :type version: six.text_type | callable
+        """
+        self.admin = admin
+        self.store = store
+        self.endpoint = endpoint
+        self._version = version
+        self._data = None
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name):
+        if name == 'admin':
+            raise AttributeError(name)
+        return getattr(self.admin, name)
+
+    @property
+    def version(self):
+        if callable(self._version):
+            self._version = self._version()
+        return self._version
+
+    @property
+    def stats(self):
+        return {
+            'size': len(self._data['schemas']) if self._data is not None else 0,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def destroy(self):
+        self.admin.destroy()
+
+    def list(self):
+        result = self.admin.list()
+        self._check(result)
+        return result
+
+    def retrieve_schema(self, plugin_name):
+        with self._lock:
+            if self._data is None:
+                self._check(self.admin.list())
+
+            schema = self._data['schemas'].get(plugin_name)
+            if schema is not None:
+                self.hits += 1
+                return copy.deepcopy(schema)
+
+        self.misses += 1
+        schema = self.admin.retrieve_schema(plugin_name)
+        if schema is not None:
+            with self._lock:
+                self._data['schemas'][plugin_name] = schema
+                self.store.save(self.endpoint, self.version, self._data)
+        return copy.deepcopy(schema)
+
+    def _check(self, plugins):
+        """
+        Loads the stored schemas, unless the enabled plugins changed.
+        """
+        enabled_plugins = sorted(plugins.get('enabled_plugins') or [])
+        with self._lock:
+            data = self._data
+            if data is None:
+                data = self.store.load(self.endpoint, self.version)
+            if data is None or data.get('enabled_plugins') != enabled_plugins:
+                data = {'enabled_plugins': enabled_plugins, 'schemas': {}}
+                self.store.save(self.endpoint, self.version, data)
+            self._data = data
+
+
+class CachingKongAdmin(KongAdminContract):
+    """
+    Wraps a KongAdminClient (or KongAdminSimulator) with read-through caches for `apis.retrieve` and
+      `consumers.retrieve`:
+
+        client = CachingKongAdmin(KongAdminClient(api_url), maxsize=10000, ttl=30)
+        client.consumers.retrieve('bob')  # Hits the admin API
+        client.consumers.retrieve('bob')  # Served from the cache
+        client.consumers.cache.stats      # {'hits': 1, 'misses': 1, ...}
+
+    Only writes done through this wrapper invalidate entries; changes made by others become visible after `ttl`.
+
+    Given a SchemaStore, plugin schemas are cached on disk as well, see CachingPluginAdmin.
+    """
+
+    def __init__(self, client, maxsize=1024, ttl=60, schema_store=None):
+        """
+        :param client: The client to wrap
+        :type client: KongAdminContract
+        :param maxsize: The maximum amount of entries per cache
+        :type maxsize: int
+        :param ttl: The amount of seconds an entry stays valid, or None to never expire entries
+        :type ttl: float
+        :param schema_store: Where to keep plugin schemas across processes, or None to not cache them
+        :type schema_store: SchemaStore
+        """
+        self.client = client
+
+        plugins = client.plugins
+        if schema_store is not None:
+            # The simulator has no (single) admin url
+            plugins = CachingPluginAdmin(plugins, schema_store, getattr(client.apis, 'api_url', None),
+                                         version=lambda: client.node_info().get('version'))
+            # Validating plugin configurations shouldn't cost a request per schema either
+            if getattr(client, 'plugin_validator', None) is not None:
+                client.plugin_validator.plugins = plugins
+
+        super(CachingKongAdmin, self).__init__(
+            apis=CachingAPIAdmin(client.apis, TTLCache(maxsize=maxsize, ttl=ttl)),
+            consumers=CachingConsumerAdmin(client.consumers, TTLCache(maxsize=maxsize, ttl=ttl)),
+            plugins=plugins)
+
+    def node_info(self):
+        return self.client.node_info()
+
+    def close(self):
+        self.apis.cache.clear()
+        self.consumers.cache.clear()
+        self.client.close()
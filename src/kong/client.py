@@ -1,100 +1,208 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals, print_function
-import time
-import os
 import copy
 
-import requests
-import backoff
-
-from requests.adapters import HTTPAdapter
 import six
 
 from .contract import KongAdminContract, APIAdminContract, ConsumerAdminContract, PluginAdminContract, \
     APIPluginConfigurationAdminContract, BasicAuthAdminContract, KeyAuthAdminContract, OAuth2AdminContract
-from .utils import add_url_params, assert_dict_keys_in, ensure_trailing_slash
-from .compat import OK, CREATED, NO_CONTENT, NOT_FOUND, CONFLICT, INTERNAL_SERVER_ERROR, urljoin, utf8_or_str
+from .utils import URLBuilder, assert_dict_keys_in
+from .compat import OK, CREATED, NO_CONTENT, NOT_FOUND, CONFLICT, INTERNAL_SERVER_ERROR, utf8_or_str
 from .exceptions import ConflictError, ServerError
+from .transport import Transport, get_default_kong_headers
+from .resolver import NameResolver
+from .deadline import DEFAULT_TIMEOUT
+from .balancer import BalancedTransport, ROUND_ROBIN
+from .validation import PluginConfigValidator
+from .codec import get_codec
+from .streaming import StreamedPage
+from .records import Api, Consumer, PluginConfiguration, BasicAuth, KeyAuth, OAuth2App, to_record
 
-# WTF: As this is CI/Test specific, maybe better to only have this piece of code in your tests directory?
-
-########################################################################################################################
-# BEGIN: CI fixes
-#
-#   Because of memory/performance limitations in the CI, it often happened that connections to Kong got messed up
-#   during unittests. To prevent this from happening, we've implemented both throttling and connection dropping as
-#   optional measures during testing.
-########################################################################################################################
-
-# Minimum interval between requests (measured in seconds)
-KONG_MINIMUM_REQUEST_INTERVAL = float(os.getenv('KONG_MINIMUM_REQUEST_INTERVAL', 0))
-
-# Whether or not to reuse connections after a request (1 = true, otherwise false)
-KONG_REUSE_CONNECTIONS = int(os.getenv('KONG_REUSE_CONNECTIONS', '1')) == 1
 
+def raise_response_error(response, exception_class=None):
+    exception_class = exception_class or ValueError
+    assert issubclass(exception_class, BaseException)
+    raise exception_class(response.content)
 
-def get_default_kong_headers():
-    headers = {}
-    if not KONG_REUSE_CONNECTIONS:
-        headers.update({'Connection': 'close'})
-    return headers
 
+def check_response(response, expected=(OK,), conflict=False):
+    """
+    Raises the error matching the status of an unsuccessful response.
 
-class ThrottlingHTTPAdapter(HTTPAdapter):
-    def __init__(self, *args, **kwargs):
-        super(ThrottlingHTTPAdapter, self).__init__(*args, **kwargs)
-        self._last_request = None
+    :param expected: The statuses of a successful response
+    :type expected: tuple
+    :param conflict: Whether or not to raise a ConflictError for a 409 response (the entity already exists)
+    :type conflict: bool
+    :return: The response
+    """
+    if conflict and response.status_code == CONFLICT:
+        raise_response_error(response, ConflictError)
+    elif response.status_code == INTERNAL_SERVER_ERROR:
+        raise_response_error(response, ServerError)
+    elif response.status_code not in expected:
+        raise_response_error(response, ValueError)
+    return response
 
-    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
-        if self._last_request is not None and KONG_MINIMUM_REQUEST_INTERVAL > 0:
-            diff = (self._last_request + KONG_MINIMUM_REQUEST_INTERVAL) - time.time()
-            if diff > 0:
-                time.sleep(diff)
-        result = super(ThrottlingHTTPAdapter, self).send(request, stream, timeout, verify, cert, proxies)
-        self._last_request = time.time()
-        return result
 
-# Create a singleton
-THROTTLING_ADAPTER = ThrottlingHTTPAdapter()
+INVALID_FIELD_ERROR_TEMPLATE = '%r is not a valid field. Allowed fields: %r'
 
-########################################################################################################################
-# END: CI fixes
-########################################################################################################################
 
+class Call(object):
+    """
+    A request to the admin API, and how its response becomes the result of the method making it. The admin clients
+      describe their requests as calls and hand them to `execute`, so the asyncio clients (kong.async_client) send the
+      very same calls, only awaiting the response.
+    """
+
+    def __init__(self, method, url, handle, data=None, stream=False):
+        """
+        :param method: The HTTP method
+        :type method: six.text_type
+        :param url: The url, as built by RestClient.get_url
+        :type url: six.text_type
+        :param handle: Function called with the response, returning the result (or raising the error) of the call
+        :type handle: callable
+        :param data: The form data to send, if any
+        :type data: dict
+        :param stream: Whether or not the response is read while it is being handled, see kong.streaming
+        :type stream: bool
+        """
+        self.method = method
+        self.url = url
+        self.handle = handle
+        self.data = data
+        self.stream = stream
+
+    def __repr__(self):
+        return '<Call: %s %s>' % (self.method, self.url)
 
-def raise_response_error(response, exception_class=None):
-    exception_class = exception_class or ValueError
-    assert issubclass(exception_class, BaseException)
-    raise exception_class(response.content)
 
-INVALID_FIELD_ERROR_TEMPLATE = '%r is not a valid field. Allowed fields: %r'
+class RestClient(object):
+    # The kong.records.Record subclass of the entities, returned instead of dicts when `records` is set
+    RECORD_CLASS = None
 
+    # The page returned by `list(..., stream=True)`
+    STREAMED_PAGE_CLASS = StreamedPage
 
-class RestClient(object):
-    def __init__(self, api_url, headers=None):
+    def __init__(self, api_url, headers=None, transport=None, resolver=None, records=False, json_codec=None):
         self.api_url = api_url
         self.headers = headers
-        self._session = None
+        self.resolver = resolver
+        self.records = records
+        self.json_codec = get_codec(json_codec)
+        self._transport = transport
+        self._owns_transport = transport is None
+        self._url_builder = None
 
     def destroy(self):
         self.api_url = None
         self.headers = None
 
-        if self._session is not None:
-            self._session.close()
-        self._session = None
+        # A shared transport is torn down by whoever created it (usually the KongAdminClient)
+        if self._transport is not None and self._owns_transport:
+            self._transport.close()
+        self._transport = None
+
+    @property
+    def transport(self):
+        if self._transport is None:
+            self._transport = self.create_transport()
+            self._owns_transport = True
+        return self._transport
 
     @property
     def session(self):
-        if self._session is None:
-            self._session = requests.session()
-            if KONG_MINIMUM_REQUEST_INTERVAL > 0:
-                self._session.mount(self.api_url, THROTTLING_ADAPTER)
-        elif not KONG_REUSE_CONNECTIONS:
-            self._session.close()
-            self._session = None
-            return self.session
-        return self._session
+        return self.transport.session
+
+    def create_transport(self):
+        return Transport(self.api_url)
+
+    def execute(self, call):
+        """
+        Sends a call over the transport.
+
+        :type call: Call
+        :return: The result of the call's handler
+        """
+        kwargs = {'stream': True} if call.stream else {}
+        response = self.transport.request(call.method, call.url, data=call.data, headers=self.get_headers(), **kwargs)
+        return call.handle(response)
+
+    def resolve(self, name_or_id):
+        """
+        :return: The id for a name known by the resolver, otherwise name_or_id as is
+        """
+        if self.resolver is None:
+            return name_or_id
+        return self.resolver.resolve(name_or_id)
+
+    def remember(self, result):
+        """
+        Feeds a record (or a page of records) returned by the admin API to the resolver, if any.
+        """
+        if self.resolver is not None:
+            if 'data' in result:
+                self.resolver.remember_all(result['data'])
+            else:
+                self.resolver.remember(result)
+        return result
+
+    def forget(self, name_or_id):
+        if self.resolver is not None:
+            self.resolver.forget(name_or_id)
+
+    def to_record(self, result):
+        """
+        Converts a record (or a page of records) returned by the admin API to RECORD_CLASS, if `records` is set.
+        """
+        if not self.records or self.RECORD_CLASS is None:
+            return result
+        return to_record(self.RECORD_CLASS, result)
+
+    def decode(self, response):
+        """
+        :return: The JSON body of the response, decoded with the client's codec
+        """
+        return self.json_codec.loads(response.content)
+
+    def handle_result(self, response):
+        """
+        :return: The record (or page of records) of a successful (200) response, see `remember` and `to_record`
+        """
+        check_response(response)
+        return self.to_record(self.remember(self.decode(response)))
+
+    def handle_created(self, response):
+        check_response(response, (CREATED,), conflict=True)
+        return self.to_record(self.remember(self.decode(response)))
+
+    def handle_created_or_updated(self, response):
+        check_response(response, (CREATED, OK), conflict=True)
+        return self.to_record(self.remember(self.decode(response)))
+
+    def handle_count(self, response):
+        result = self.decode(check_response(response))
+        return result.get('total', len(result.get('data')))
+
+    def handle_document(self, response):
+        """
+        :return: The decoded body of a successful (200) response, as is
+        """
+        return self.decode(check_response(response))
+
+    def handle_stream(self, response):
+        """
+        :rtype: kong.streaming.StreamedPage
+        :return: The page of a successful (200) response that is still being received
+        """
+        check_response(response)
+        return self.STREAMED_PAGE_CLASS(
+            response, self.json_codec, convert=lambda item: self.to_record(self.remember(item)))
+
+    def list_call(self, url, stream=False):
+        if stream:
+            return Call('GET', url, self.handle_stream, stream=True)
+        return Call('GET', url, self.handle_result)
 
     def get_headers(self, **headers):
         result = {}
@@ -102,26 +210,52 @@ class RestClient(object):
         result.update(headers)
         return result
 
+    @property
+    def url_builder(self):
+        if self._url_builder is None or self._url_builder.api_url != self.api_url:
+            self._url_builder = URLBuilder(self.api_url)
+        return self._url_builder
+
     def get_url(self, *path, **query_params):
-        # WTF: Never use str, unless in some very specific cases, like in compatibility layers! Fixed for you.
-        path = [six.text_type(p) for p in path]
-        url = ensure_trailing_slash(urljoin(self.api_url, '/'.join(path)))
-        return add_url_params(url, query_params)
+        return self.url_builder.build(*path, **query_params)
 
 
 class APIPluginConfigurationAdminClient(APIPluginConfigurationAdminContract, RestClient):
-    def __init__(self, api_admin, api_name_or_id, api_url):
-        super(APIPluginConfigurationAdminClient, self).__init__(api_url, headers=get_default_kong_headers())
+    RECORD_CLASS = PluginConfiguration
+
+    def __init__(self, api_admin, api_name_or_id, api_url, transport=None, validator=None, records=False,
+                 json_codec=None):
+        """
+        :param validator: Checks plugin configurations before they are sent, if given
+        :type validator: kong.validation.PluginConfigValidator
+        """
+        super(APIPluginConfigurationAdminClient, self).__init__(
+            api_url, headers=get_default_kong_headers(), transport=transport, records=records,
+            json_codec=json_codec)
 
         self.api_admin = api_admin
         self.api_name_or_id = api_name_or_id
+        self.validator = validator
 
     def destroy(self):
         super(APIPluginConfigurationAdminClient, self).destroy()
         self.api_admin = None
         self.api_name_or_id = None
+        self.validator = None
+
+    def validate(self, plugin_name, fields, partial=False):
+        if self.validator is not None and plugin_name is not None:
+            self.validator.validate(plugin_name, fields, partial=partial)
+
+    def remember(self, result):
+        if self.validator is not None:
+            for plugin_configuration in result['data'] if 'data' in result else [result]:
+                self.validator.remember(plugin_configuration)
+        return result
 
     def create(self, plugin_name, enabled=None, consumer_id=None, **fields):
+        self.validate(plugin_name, fields)
+
         values = {}
         for key in fields:
             values['config.%s' % key] = fields[key]
@@ -134,19 +268,12 @@ class APIPluginConfigurationAdminClient(APIPluginConfigurationAdminContract, Res
         if enabled is not None and isinstance(enabled, bool):
             data['enabled'] = enabled
 
-        response = self.session.post(self.get_url('apis', self.api_name_or_id, 'plugins'), data=data,
-                                     headers=self.get_headers())
-
-        if response.status_code == CONFLICT:
-            raise_response_error(response, ConflictError)
-        elif response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != CREATED:
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        return self.execute(Call('POST', self.get_url('apis', self.api_name_or_id, 'plugins'), self.handle_created,
+                                 data=data))
 
     def create_or_update(self, plugin_name, plugin_configuration_id=None, enabled=None, consumer_id=None, **fields):
+        self.validate(plugin_name, fields, partial=plugin_configuration_id is not None)
+
         values = {}
         for key in fields:
             values['config.%s' % key] = fields[key]
@@ -162,19 +289,14 @@ class APIPluginConfigurationAdminClient(APIPluginConfigurationAdminContract, Res
         if plugin_configuration_id is not None:
             data['id'] = plugin_configuration_id
 
-        response = self.session.put(self.get_url('apis', self.api_name_or_id, 'plugins'), data=data,
-                                    headers=self.get_headers())
-
-        if response.status_code == CONFLICT:
-            raise_response_error(response, ConflictError)
-        elif response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code not in (CREATED, OK):
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        return self.execute(Call('PUT', self.get_url('apis', self.api_name_or_id, 'plugins'),
+                                 self.handle_created_or_updated, data=data))
 
     def update(self, plugin_id, enabled=None, consumer_id=None, **fields):
+        # The plugin is only known for configurations this client has seen
+        if self.validator is not None:
+            self.validate(self.validator.get_plugin_name(plugin_id), fields, partial=True)
+
         values = {}
         for key in fields:
             values['config.%s' % key] = fields[key]
@@ -189,17 +311,9 @@ class APIPluginConfigurationAdminClient(APIPluginConfigurationAdminContract, Res
 
         url = self.get_url('apis', self.api_name_or_id, 'plugins', plugin_id)
 
-        response = self.session.patch(url, data=data_struct_update, headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
+        return self.execute(Call('PATCH', url, self.handle_result, data=data_struct_update))
 
-        return response.json()
-
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
-    def list(self, size=100, offset=None, **filter_fields):
+    def list(self, size=100, offset=None, stream=False, **filter_fields):
         assert_dict_keys_in(filter_fields, ['id', 'name', 'api_id', 'consumer_id'], INVALID_FIELD_ERROR_TEMPLATE)
 
         query_params = filter_fields
@@ -209,85 +323,53 @@ class APIPluginConfigurationAdminClient(APIPluginConfigurationAdminContract, Res
             query_params['offset'] = offset
 
         url = self.get_url('apis', self.api_name_or_id, 'plugins', **query_params)
-        response = self.session.get(url, headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
+        return self.execute(self.list_call(url, stream=stream))
 
-        return response.json()
-
-    @backoff.on_exception(backoff.expo, ValueError, max_tries=3)
     def delete(self, plugin_id):
-        response = self.session.delete(self.get_url('apis', self.api_name_or_id, 'plugins', plugin_id),
-                                       headers=self.get_headers())
+        def handle(response):
+            if response.status_code not in (NO_CONTENT, NOT_FOUND):
+                raise ValueError('Could not delete Plugin Configuration (status: %s): %s' % (
+                    response.status_code, plugin_id))
 
-        if response.status_code not in (NO_CONTENT, NOT_FOUND):
-            raise ValueError('Could not delete Plugin Configuration (status: %s): %s' % (
-                response.status_code, plugin_id))
+        return self.execute(Call('DELETE', self.get_url('apis', self.api_name_or_id, 'plugins', plugin_id), handle))
 
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
     def retrieve(self, plugin_id):
-        response = self.session.get(self.get_url('apis', self.api_name_or_id, 'plugins', plugin_id),
-                                    headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
+        return self.execute(Call('GET', self.get_url('apis', self.api_name_or_id, 'plugins', plugin_id),
+                                 self.handle_result))
 
-        return response.json()
-
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
     def count(self):
-        response = self.session.get(self.get_url('apis', self.api_name_or_id, 'plugins'), headers=self.get_headers())
+        return self.execute(Call('GET', self.get_url('apis', self.api_name_or_id, 'plugins'), self.handle_count))
 
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
 
-        result = response.json()
-        amount = result.get('total', len(result.get('data')))
-        return amount
+class APIAdminClient(APIAdminContract, RestClient):
+    RECORD_CLASS = Api
 
+    # The admin client handed out by `plugins`
+    PLUGINS_CLASS = APIPluginConfigurationAdminClient
 
-class APIAdminClient(APIAdminContract, RestClient):
-    def __init__(self, api_url):
-        super(APIAdminClient, self).__init__(api_url, headers=get_default_kong_headers())
+    def __init__(self, api_url, transport=None, resolver=None, plugin_validator=None, records=False, json_codec=None):
+        super(APIAdminClient, self).__init__(
+            api_url, headers=get_default_kong_headers(), transport=transport, resolver=resolver, records=records,
+            json_codec=json_codec)
+        self.plugin_validator = plugin_validator
 
     def destroy(self):
         super(APIAdminClient, self).destroy()
+        self.plugin_validator = None
 
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
     def count(self):
-        response = self.session.get(self.get_url('apis'), headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-
-        result = response.json()
-        amount = result.get('total', len(result.get('data')))
-        return amount
+        return self.execute(Call('GET', self.get_url('apis'), self.handle_count))
 
     def create(self, upstream_url, name=None, request_host=None, request_path=None, strip_request_path=False,
                preserve_host=False):
-        response = self.session.post(self.get_url('apis'), data={
+        return self.execute(Call('POST', self.get_url('apis'), self.handle_created, data={
             'name': name,
             'request_host': request_host or None,  # Empty strings are not allowed
             'request_path': request_path or None,  # Empty strings are not allowed
             'strip_request_path': strip_request_path,
             'preserve_host': preserve_host,
             'upstream_url': upstream_url
-        }, headers=self.get_headers())
-
-        if response.status_code == CONFLICT:
-            raise_response_error(response, ConflictError)
-        elif response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != CREATED:
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        }))
 
     def create_or_update(self, upstream_url, api_id=None, name=None, request_host=None, request_path=None,
                          strip_request_path=False, preserve_host=False):
@@ -303,16 +385,7 @@ class APIAdminClient(APIAdminContract, RestClient):
         if api_id is not None:
             data['id'] = api_id
 
-        response = self.session.put(self.get_url('apis'), data=data, headers=self.get_headers())
-
-        if response.status_code == CONFLICT:
-            raise_response_error(response, ConflictError)
-        elif response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code not in (CREATED, OK):
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        return self.execute(Call('PUT', self.get_url('apis'), self.handle_created_or_updated, data=data))
 
     def update(self, name_or_id, upstream_url, **fields):
         assert_dict_keys_in(
@@ -322,37 +395,23 @@ class APIAdminClient(APIAdminContract, RestClient):
         # Explicitly encode on beforehand before passing to requests!
         fields = dict((k, utf8_or_str(v)) if isinstance(v, six.text_type) else v for k, v in fields.items())
 
-        response = self.session.patch(self.get_url('apis', name_or_id), data=dict({
-            'upstream_url': upstream_url
-        }, **fields), headers=self.get_headers())
+        return self.execute(Call('PATCH', self.get_url('apis', self.resolve(name_or_id)), self.handle_result,
+                                 data=dict({'upstream_url': upstream_url}, **fields)))
 
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
-
-        return response.json()
-
-    @backoff.on_exception(backoff.expo, ValueError, max_tries=3)
     def delete(self, name_or_id):
-        response = self.session.delete(self.get_url('apis', name_or_id), headers=self.get_headers())
+        def handle(response):
+            if response.status_code not in (NO_CONTENT, NOT_FOUND):
+                raise ValueError('Could not delete API (status: %s): %s' % (response.status_code, name_or_id))
 
-        if response.status_code not in (NO_CONTENT, NOT_FOUND):
-            raise ValueError('Could not delete API (status: %s): %s' % (response.status_code, name_or_id))
-
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
-    def retrieve(self, name_or_id):
-        response = self.session.get(self.get_url('apis', name_or_id), headers=self.get_headers())
+            # Only once it's gone, the name still refers to the API otherwise
+            self.forget(name_or_id)
 
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
+        return self.execute(Call('DELETE', self.get_url('apis', self.resolve(name_or_id)), handle))
 
-        return response.json()
+    def retrieve(self, name_or_id):
+        return self.execute(Call('GET', self.get_url('apis', self.resolve(name_or_id)), self.handle_result))
 
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
-    def list(self, size=100, offset=None, **filter_fields):
+    def list(self, size=100, offset=None, stream=False, **filter_fields):
         assert_dict_keys_in(filter_fields, ['id', 'name', 'request_host', 'request_path'], INVALID_FIELD_ERROR_TEMPLATE)
 
         query_params = filter_fields
@@ -361,23 +420,21 @@ class APIAdminClient(APIAdminContract, RestClient):
         if offset:
             query_params['offset'] = offset
 
-        url = self.get_url('apis', **query_params)
-        response = self.session.get(url, headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        return self.execute(self.list_call(self.get_url('apis', **query_params), stream=stream))
 
     def plugins(self, name_or_id):
-        return APIPluginConfigurationAdminClient(self, name_or_id, self.api_url)
+        return self.PLUGINS_CLASS(
+            self, self.resolve(name_or_id), self.api_url, transport=self.transport, validator=self.plugin_validator,
+            records=self.records, json_codec=self.json_codec)
 
 
 class BasicAuthAdminClient(BasicAuthAdminContract, RestClient):
-    def __init__(self, consumer_admin, consumer_id, api_url):
-        super(BasicAuthAdminClient, self).__init__(api_url, headers=get_default_kong_headers())
+    RECORD_CLASS = BasicAuth
+
+    def __init__(self, consumer_admin, consumer_id, api_url, transport=None, records=False, json_codec=None):
+        super(BasicAuthAdminClient, self).__init__(
+            api_url, headers=get_default_kong_headers(), transport=transport, records=records,
+            json_codec=json_codec)
 
         self.consumer_admin = consumer_admin
         self.consumer_id = consumer_id
@@ -396,35 +453,17 @@ class BasicAuthAdminClient(BasicAuthAdminContract, RestClient):
         if basic_auth_id is not None:
             data['id'] = basic_auth_id
 
-        response = self.session.put(self.get_url('consumers', self.consumer_id, 'basicauth'), data=data,
-                                    headers=self.get_headers())
-
-        if response.status_code == CONFLICT:
-            raise_response_error(response, ConflictError)
-        elif response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code not in (CREATED, OK):
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        return self.execute(Call('PUT', self.get_url('consumers', self.consumer_id, 'basicauth'),
+                                 self.handle_created_or_updated, data=data))
 
     def create(self, username, password):
-        response = self.session.post(self.get_url('consumers', self.consumer_id, 'basicauth'), data={
-            'username': utf8_or_str(username),
-            'password': utf8_or_str(password),
-        }, headers=self.get_headers())
+        return self.execute(Call('POST', self.get_url('consumers', self.consumer_id, 'basicauth'), self.handle_created,
+                                 data={
+                                     'username': utf8_or_str(username),
+                                     'password': utf8_or_str(password),
+                                 }))
 
-        if response.status_code == CONFLICT:
-            raise_response_error(response, ConflictError)
-        elif response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != CREATED:
-            raise_response_error(response, ValueError)
-
-        return response.json()
-
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
-    def list(self, size=100, offset=None, **filter_fields):
+    def list(self, size=100, offset=None, stream=False, **filter_fields):
         assert_dict_keys_in(filter_fields, ['id', 'username'], INVALID_FIELD_ERROR_TEMPLATE)
 
         query_params = filter_fields
@@ -434,67 +473,37 @@ class BasicAuthAdminClient(BasicAuthAdminContract, RestClient):
             query_params['offset'] = offset
 
         url = self.get_url('consumers', self.consumer_id, 'basicauth', **query_params)
-        response = self.session.get(url, headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
+        return self.execute(self.list_call(url, stream=stream))
 
-        return response.json()
-
-    @backoff.on_exception(backoff.expo, ValueError, max_tries=3)
     def delete(self, basic_auth_id):
-        url = self.get_url('consumers', self.consumer_id, 'basicauth', basic_auth_id)
-        response = self.session.delete(url, headers=self.get_headers())
+        def handle(response):
+            if response.status_code not in (NO_CONTENT, NOT_FOUND):
+                raise ValueError('Could not delete Basic Auth (status: %s): %s for Consumer: %s' % (
+                    response.status_code, basic_auth_id, self.consumer_id))
 
-        if response.status_code not in (NO_CONTENT, NOT_FOUND):
-            raise ValueError('Could not delete Basic Auth (status: %s): %s for Consumer: %s' % (
-                response.status_code, basic_auth_id, self.consumer_id))
+        url = self.get_url('consumers', self.consumer_id, 'basicauth', basic_auth_id)
+        return self.execute(Call('DELETE', url, handle))
 
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
     def retrieve(self, basic_auth_id):
-        response = self.session.get(self.get_url('consumers', self.consumer_id, 'basicauth', basic_auth_id),
-                                    headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
+        return self.execute(Call('GET', self.get_url('consumers', self.consumer_id, 'basicauth', basic_auth_id),
+                                 self.handle_result))
 
-        return response.json()
-
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
     def count(self):
-        response = self.session.get(self.get_url('consumers', self.consumer_id, 'basicauth'),
-                                    headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
-
-        result = response.json()
-        amount = result.get('total', len(result.get('data')))
-        return amount
+        return self.execute(Call('GET', self.get_url('consumers', self.consumer_id, 'basicauth'), self.handle_count))
 
     def update(self, basic_auth_id, **fields):
         assert_dict_keys_in(fields, ['username', 'password'], INVALID_FIELD_ERROR_TEMPLATE)
-        response = self.session.patch(
-            self.get_url('consumers', self.consumer_id, 'basicauth', basic_auth_id), data=fields,
-            headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        return self.execute(Call('PATCH', self.get_url('consumers', self.consumer_id, 'basicauth', basic_auth_id),
+                                 self.handle_result, data=fields))
 
 
 class KeyAuthAdminClient(KeyAuthAdminContract, RestClient):
-    def __init__(self, consumer_admin, consumer_id, api_url):
-        super(KeyAuthAdminClient, self).__init__(api_url, headers=get_default_kong_headers())
+    RECORD_CLASS = KeyAuth
+
+    def __init__(self, consumer_admin, consumer_id, api_url, transport=None, records=False, json_codec=None):
+        super(KeyAuthAdminClient, self).__init__(
+            api_url, headers=get_default_kong_headers(), transport=transport, records=records,
+            json_codec=json_codec)
 
         self.consumer_admin = consumer_admin
         self.consumer_id = consumer_id
@@ -512,34 +521,16 @@ class KeyAuthAdminClient(KeyAuthAdminContract, RestClient):
         if key_auth_id is not None:
             data['id'] = key_auth_id
 
-        response = self.session.put(self.get_url('consumers', self.consumer_id, 'keyauth'), data=data,
-                                    headers=self.get_headers())
-
-        if response.status_code == CONFLICT:
-            raise_response_error(response, ConflictError)
-        elif response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code not in (CREATED, OK):
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        return self.execute(Call('PUT', self.get_url('consumers', self.consumer_id, 'keyauth'),
+                                 self.handle_created_or_updated, data=data))
 
     def create(self, key=None):
-        response = self.session.post(self.get_url('consumers', self.consumer_id, 'keyauth'), data={
-            'key': key,
-        }, headers=self.get_headers())
+        return self.execute(Call('POST', self.get_url('consumers', self.consumer_id, 'keyauth'), self.handle_created,
+                                 data={
+                                     'key': key,
+                                 }))
 
-        if response.status_code == CONFLICT:
-            raise_response_error(response, ConflictError)
-        elif response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != CREATED:
-            raise_response_error(response, ValueError)
-
-        return response.json()
-
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
-    def list(self, size=100, offset=None, **filter_fields):
+    def list(self, size=100, offset=None, stream=False, **filter_fields):
         assert_dict_keys_in(filter_fields, ['id', 'key'], INVALID_FIELD_ERROR_TEMPLATE)
 
         query_params = filter_fields
@@ -549,67 +540,37 @@ class KeyAuthAdminClient(KeyAuthAdminContract, RestClient):
             query_params['offset'] = offset
 
         url = self.get_url('consumers', self.consumer_id, 'keyauth', **query_params)
-        response = self.session.get(url, headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        return self.execute(self.list_call(url, stream=stream))
 
-    @backoff.on_exception(backoff.expo, ValueError, max_tries=3)
     def delete(self, key_auth_id):
-        url = self.get_url('consumers', self.consumer_id, 'keyauth', key_auth_id)
-        response = self.session.delete(url, headers=self.get_headers())
+        def handle(response):
+            if response.status_code not in (NO_CONTENT, NOT_FOUND):
+                raise ValueError('Could not delete Key Auth (status: %s): %s for Consumer: %s' % (
+                    response.status_code, key_auth_id, self.consumer_id))
 
-        if response.status_code not in (NO_CONTENT, NOT_FOUND):
-            raise ValueError('Could not delete Key Auth (status: %s): %s for Consumer: %s' % (
-                response.status_code, key_auth_id, self.consumer_id))
+        url = self.get_url('consumers', self.consumer_id, 'keyauth', key_auth_id)
+        return self.execute(Call('DELETE', url, handle))
 
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
     def retrieve(self, key_auth_id):
-        response = self.session.get(self.get_url('consumers', self.consumer_id, 'keyauth', key_auth_id),
-                                    headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        return self.execute(Call('GET', self.get_url('consumers', self.consumer_id, 'keyauth', key_auth_id),
+                                 self.handle_result))
 
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
     def count(self):
-        response = self.session.get(self.get_url('consumers', self.consumer_id, 'keyauth'),
-                                    headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
-
-        result = response.json()
-        amount = result.get('total', len(result.get('data')))
-        return amount
+        return self.execute(Call('GET', self.get_url('consumers', self.consumer_id, 'keyauth'), self.handle_count))
 
     def update(self, key_auth_id, **fields):
         assert_dict_keys_in(fields, ['key'], INVALID_FIELD_ERROR_TEMPLATE)
-        response = self.session.patch(
-            self.get_url('consumers', self.consumer_id, 'keyauth', key_auth_id), data=fields,
-            headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        return self.execute(Call('PATCH', self.get_url('consumers', self.consumer_id, 'keyauth', key_auth_id),
+                                 self.handle_result, data=fields))
 
 
 class OAuth2AdminClient(OAuth2AdminContract, RestClient):
-    def __init__(self, consumer_admin, consumer_id, api_url):
-        super(OAuth2AdminClient, self).__init__(api_url, headers=get_default_kong_headers())
+    RECORD_CLASS = OAuth2App
+
+    def __init__(self, consumer_admin, consumer_id, api_url, transport=None, records=False, json_codec=None):
+        super(OAuth2AdminClient, self).__init__(
+            api_url, headers=get_default_kong_headers(), transport=transport, records=records,
+            json_codec=json_codec)
 
         self.consumer_admin = consumer_admin
         self.consumer_id = consumer_id
@@ -630,37 +591,19 @@ class OAuth2AdminClient(OAuth2AdminContract, RestClient):
         if oauth2_id is not None:
             data['id'] = oauth2_id
 
-        response = self.session.put(self.get_url('consumers', self.consumer_id, 'oauth2'), data=data,
-                                    headers=self.get_headers())
-
-        if response.status_code == CONFLICT:
-            raise_response_error(response, ConflictError)
-        elif response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code not in (CREATED, OK):
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        return self.execute(Call('PUT', self.get_url('consumers', self.consumer_id, 'oauth2'),
+                                 self.handle_created_or_updated, data=data))
 
     def create(self, name, redirect_uri, client_id=None, client_secret=None):
-        response = self.session.post(self.get_url('consumers', self.consumer_id, 'oauth2'), data={
-            'name': name,
-            'redirect_uri': redirect_uri,
-            'client_id': client_id,
-            'client_secret': client_secret
-        }, headers=self.get_headers())
-
-        if response.status_code == CONFLICT:
-            raise_response_error(response, ConflictError)
-        elif response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != CREATED:
-            raise_response_error(response, ValueError)
-
-        return response.json()
-
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
-    def list(self, size=100, offset=None, **filter_fields):
+        return self.execute(Call('POST', self.get_url('consumers', self.consumer_id, 'oauth2'), self.handle_created,
+                                 data={
+                                     'name': name,
+                                     'redirect_uri': redirect_uri,
+                                     'client_id': client_id,
+                                     'client_secret': client_secret
+                                 }))
+
+    def list(self, size=100, offset=None, stream=False, **filter_fields):
         assert_dict_keys_in(filter_fields, ['id', 'name', 'redirect_url', 'client_id'], INVALID_FIELD_ERROR_TEMPLATE)
 
         query_params = filter_fields
@@ -670,97 +613,55 @@ class OAuth2AdminClient(OAuth2AdminContract, RestClient):
             query_params['offset'] = offset
 
         url = self.get_url('consumers', self.consumer_id, 'oauth2', **query_params)
-        response = self.session.get(url, headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        return self.execute(self.list_call(url, stream=stream))
 
-    @backoff.on_exception(backoff.expo, ValueError, max_tries=3)
     def delete(self, oauth2_id):
-        url = self.get_url('consumers', self.consumer_id, 'oauth2', oauth2_id)
-        response = self.session.delete(url, headers=self.get_headers())
+        def handle(response):
+            if response.status_code not in (NO_CONTENT, NOT_FOUND):
+                raise ValueError('Could not delete OAuth2 (status: %s): %s for Consumer: %s' % (
+                    response.status_code, oauth2_id, self.consumer_id))
 
-        if response.status_code not in (NO_CONTENT, NOT_FOUND):
-            raise ValueError('Could not delete OAuth2 (status: %s): %s for Consumer: %s' % (
-                response.status_code, oauth2_id, self.consumer_id))
+        url = self.get_url('consumers', self.consumer_id, 'oauth2', oauth2_id)
+        return self.execute(Call('DELETE', url, handle))
 
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
     def retrieve(self, oauth2_id):
-        response = self.session.get(self.get_url('consumers', self.consumer_id, 'oauth2', oauth2_id),
-                                    headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        return self.execute(Call('GET', self.get_url('consumers', self.consumer_id, 'oauth2', oauth2_id),
+                                 self.handle_result))
 
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
     def count(self):
-        response = self.session.get(self.get_url('consumers', self.consumer_id, 'oauth2'),
-                                    headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
-
-        result = response.json()
-        amount = result.get('total', len(result.get('data')))
-        return amount
+        return self.execute(Call('GET', self.get_url('consumers', self.consumer_id, 'oauth2'), self.handle_count))
 
     def update(self, oauth2_id, **fields):
         assert_dict_keys_in(
             fields, ['name', 'redirect_uri', 'client_id', 'client_secret'], INVALID_FIELD_ERROR_TEMPLATE)
-        response = self.session.patch(
-            self.get_url('consumers', self.consumer_id, 'oauth2', oauth2_id), data=fields,
-            headers=self.get_headers())
+        return self.execute(Call('PATCH', self.get_url('consumers', self.consumer_id, 'oauth2', oauth2_id),
+                                 self.handle_result, data=fields))
 
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
 
-        return response.json()
+class ConsumerAdminClient(ConsumerAdminContract, RestClient):
+    RECORD_CLASS = Consumer
 
+    # The admin clients handed out by `basic_auth`, `key_auth` and `oauth2`
+    BASIC_AUTH_CLASS = BasicAuthAdminClient
+    KEY_AUTH_CLASS = KeyAuthAdminClient
+    OAUTH2_CLASS = OAuth2AdminClient
 
-class ConsumerAdminClient(ConsumerAdminContract, RestClient):
-    def __init__(self, api_url):
-        super(ConsumerAdminClient, self).__init__(api_url, headers=get_default_kong_headers())
+    def __init__(self, api_url, transport=None, resolver=None, records=False, json_codec=None):
+        super(ConsumerAdminClient, self).__init__(
+            api_url, headers=get_default_kong_headers(), transport=transport, resolver=resolver, records=records,
+            json_codec=json_codec)
 
     def destroy(self):
         super(ConsumerAdminClient, self).destroy()
 
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
     def count(self):
-        response = self.session.get(self.get_url('consumers'), headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-
-        result = response.json()
-        amount = result.get('total', len(result.get('data')))
-        return amount
+        return self.execute(Call('GET', self.get_url('consumers'), self.handle_count))
 
     def create(self, username=None, custom_id=None):
-        response = self.session.post(self.get_url('consumers'), data={
+        return self.execute(Call('POST', self.get_url('consumers'), self.handle_created, data={
             'username': username,
             'custom_id': custom_id,
-        }, headers=self.get_headers())
-
-        if response.status_code == CONFLICT:
-            raise_response_error(response, ConflictError)
-        elif response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != CREATED:
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        }))
 
     def create_or_update(self, consumer_id=None, username=None, custom_id=None):
         data = {
@@ -771,31 +672,14 @@ class ConsumerAdminClient(ConsumerAdminContract, RestClient):
         if consumer_id is not None:
             data['id'] = consumer_id
 
-        response = self.session.put(self.get_url('consumers'), data=data, headers=self.get_headers())
-
-        if response.status_code == CONFLICT:
-            raise_response_error(response, ConflictError)
-        elif response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code not in (CREATED, OK):
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        return self.execute(Call('PUT', self.get_url('consumers'), self.handle_created_or_updated, data=data))
 
     def update(self, username_or_id, **fields):
         assert_dict_keys_in(fields, ['username', 'custom_id'], INVALID_FIELD_ERROR_TEMPLATE)
-        response = self.session.patch(self.get_url('consumers', username_or_id), data=fields,
-                                      headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        return self.execute(Call('PATCH', self.get_url('consumers', self.resolve(username_or_id)), self.handle_result,
+                                 data=fields))
 
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
-    def list(self, size=100, offset=None, **filter_fields):
+    def list(self, size=100, offset=None, stream=False, **filter_fields):
         assert_dict_keys_in(filter_fields, ['id', 'custom_id', 'username'], INVALID_FIELD_ERROR_TEMPLATE)
 
         query_params = filter_fields
@@ -804,82 +688,156 @@ class ConsumerAdminClient(ConsumerAdminContract, RestClient):
         if offset:
             query_params['offset'] = offset
 
-        url = self.get_url('consumers', **query_params)
-        response = self.session.get(url, headers=self.get_headers())
+        return self.execute(self.list_call(self.get_url('consumers', **query_params), stream=stream))
 
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
-
-        return response.json()
-
-    @backoff.on_exception(backoff.expo, ValueError, max_tries=3)
     def delete(self, username_or_id):
-        response = self.session.delete(self.get_url('consumers', username_or_id), headers=self.get_headers())
+        def handle(response):
+            if response.status_code not in (NO_CONTENT, NOT_FOUND):
+                raise ValueError('Could not delete Consumer (status: %s): %s' % (response.status_code, username_or_id))
 
-        if response.status_code not in (NO_CONTENT, NOT_FOUND):
-            raise ValueError('Could not delete Consumer (status: %s): %s' % (response.status_code, username_or_id))
-
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
-    def retrieve(self, username_or_id):
-        response = self.session.get(self.get_url('consumers', username_or_id), headers=self.get_headers())
+            self.forget(username_or_id)
 
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
+        return self.execute(Call('DELETE', self.get_url('consumers', self.resolve(username_or_id)), handle))
 
-        return response.json()
+    def retrieve(self, username_or_id):
+        return self.execute(Call('GET', self.get_url('consumers', self.resolve(username_or_id)), self.handle_result))
 
     def basic_auth(self, username_or_id):
-        return BasicAuthAdminClient(self, username_or_id, self.api_url)
+        return self.BASIC_AUTH_CLASS(
+            self, self.resolve(username_or_id), self.api_url, transport=self.transport, records=self.records,
+            json_codec=self.json_codec)
 
     def key_auth(self, username_or_id):
-        return KeyAuthAdminClient(self, username_or_id, self.api_url)
+        return self.KEY_AUTH_CLASS(
+            self, self.resolve(username_or_id), self.api_url, transport=self.transport, records=self.records,
+            json_codec=self.json_codec)
 
     def oauth2(self, username_or_id):
-        return OAuth2AdminClient(self, username_or_id, self.api_url)
+        return self.OAUTH2_CLASS(
+            self, self.resolve(username_or_id), self.api_url, transport=self.transport, records=self.records,
+            json_codec=self.json_codec)
 
 
 class PluginAdminClient(PluginAdminContract, RestClient):
-    def __init__(self, api_url):
-        super(PluginAdminClient, self).__init__(api_url, headers=get_default_kong_headers())
+    def __init__(self, api_url, transport=None, json_codec=None):
+        super(PluginAdminClient, self).__init__(
+            api_url, headers=get_default_kong_headers(), transport=transport, json_codec=json_codec)
 
     def destroy(self):
         super(PluginAdminClient, self).destroy()
 
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
     def list(self):
-        response = self.session.get(self.get_url('plugins'), headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
+        return self.execute(Call('GET', self.get_url('plugins'), self.handle_document))
 
-        return response.json()
-
-    @backoff.on_exception(backoff.expo, ServerError, max_tries=3)
     def retrieve_schema(self, plugin_name):
-        response = self.session.get(self.get_url('plugins', plugin_name, 'schema'), headers=self.get_headers())
-
-        if response.status_code == INTERNAL_SERVER_ERROR:
-            raise_response_error(response, ServerError)
-        elif response.status_code != OK:
-            raise_response_error(response, ValueError)
-
-        return response.json()
+        return self.execute(Call('GET', self.get_url('plugins', plugin_name, 'schema'), self.handle_document))
 
 
 class KongAdminClient(KongAdminContract):
-    def __init__(self, api_url):
+    # The classes of the transport and the admin clients, replaced by the asyncio client (kong.async_client)
+    TRANSPORT_CLASS = Transport
+    BALANCED_TRANSPORT_CLASS = BalancedTransport
+    API_ADMIN_CLASS = APIAdminClient
+    CONSUMER_ADMIN_CLASS = ConsumerAdminClient
+    PLUGIN_ADMIN_CLASS = PluginAdminClient
+    PLUGIN_VALIDATOR_CLASS = PluginConfigValidator
+
+    def __init__(self, api_url, transport=None, rate_limiter=None, resolve_names=False, metrics=None,
+                 retry_policy=None, timeout=DEFAULT_TIMEOUT, deadline=None, load_balancing=ROUND_ROBIN,
+                 validate_plugins=False, records=False, json_codec=None):
+        """
+        :param api_url: The url of the Kong admin endpoint, or a list of urls of nodes sharing a datastore to balance
+            the requests over (see kong.balancer)
+        :type api_url: six.text_type | list
+        :param transport: The transport (connection pool) to use. If omitted, a new one is created and owned by this
+            client.
+        :type transport: kong.transport.Transport
+        :param rate_limiter: Limits the rate of requests, only used when no transport is given
+        :type rate_limiter: kong.ratelimit.RateLimiter
+        :param resolve_names: Whether or not to keep an index of API names and consumer usernames (see
+            kong.resolver.NameResolver), so requests can address them by id
+        :type resolve_names: bool
+        :param metrics: Receives a kong.metrics.RequestEvent for every request (like kong.metrics.InMemoryMetrics),
+            only used when no transport is given
+        :type metrics: kong.metrics.MetricsHook
+        :param retry_policy: Decides which requests are retried and when, only used when no transport is given
+        :type retry_policy: kong.retry.RetryPolicy
+        :param timeout: The timeout of every request (see kong.deadline), only used when no transport is given
+        :type timeout: float | tuple
+        :param deadline: The maximum amount of seconds a single call may take, including retries, only used when no
+            transport is given
+        :type deadline: float
+        :param load_balancing: How reads are spread over the nodes when a list of urls is given: ROUND_ROBIN or
+            LEAST_OUTSTANDING
+        :type load_balancing: six.text_type
+        :param validate_plugins: Whether or not to check plugin configurations against the plugin's schema before
+            sending them (see kong.validation)
+        :type validate_plugins: bool
+        :param records: Whether or not to return compact kong.records records instead of dicts
+        :type records: bool
+        :param json_codec: The kong.codec.JSONCodec (or the name of one, like 'orjson' or 'json') to decode responses
+            with, defaults to the fastest one installed
+        :type json_codec: kong.codec.JSONCodec | six.text_type
+        """
+        self._owns_transport = transport is None
+        if transport is None:
+            transport = self.create_transport(
+                api_url, load_balancing, rate_limiter=rate_limiter, metrics=metrics, retry_policy=retry_policy,
+                timeout=timeout, deadline=deadline)
+        if isinstance(api_url, (list, tuple)):
+            # The admin clients build urls for the first node, the transport points them to the chosen one
+            api_url = api_url[0]
+        self.transport = transport
+
+        self.json_codec = get_codec(json_codec)
+        plugins = self.PLUGIN_ADMIN_CLASS(api_url, transport=self.transport, json_codec=self.json_codec)
+        self.plugin_validator = self.PLUGIN_VALIDATOR_CLASS(plugins) if validate_plugins else None
+
         super(KongAdminClient, self).__init__(
-            apis=APIAdminClient(api_url),
-            consumers=ConsumerAdminClient(api_url),
-            plugins=PluginAdminClient(api_url))
+            apis=self.API_ADMIN_CLASS(
+                api_url, transport=self.transport, resolver=NameResolver('name') if resolve_names else None,
+                plugin_validator=self.plugin_validator, records=records, json_codec=self.json_codec),
+            consumers=self.CONSUMER_ADMIN_CLASS(
+                api_url, transport=self.transport, resolver=NameResolver('username') if resolve_names else None,
+                records=records, json_codec=self.json_codec),
+            plugins=plugins)
+
+    def create_transport(self, api_url, load_balancing, **kwargs):
+        """
+        :param api_url: The url of the Kong admin endpoint, or a list of urls of nodes to balance the requests over
+        :type api_url: six.text_type | list
+        :param load_balancing: How reads are spread over the nodes, see kong.balancer
+        :type load_balancing: six.text_type
+        :param kwargs: Passed to the transport
+        """
+        if isinstance(api_url, (list, tuple)):
+            return self.BALANCED_TRANSPORT_CLASS(api_url, strategy=load_balancing, **kwargs)
+        return self.TRANSPORT_CLASS(api_url, **kwargs)
+
+    def node_info(self):
+        """
+        :rtype: dict
+        :return: Information about the node, like its version:
+                {
+                    "tagline": "Welcome to Kong",
+                    "version": "0.8.3",
+                    "hostname": "kong-1",
+                    ...
+                }
+        """
+        return self.apis.execute(Call('GET', self.apis.get_url(), self.apis.handle_document))
+
+    def timeouts(self, timeout=None, deadline=None):
+        """
+        Context manager overriding the timeout, and setting a deadline, for the calls made by the current thread within
+          the block. See kong.transport.Transport.timeouts.
+        """
+        return self.transport.timeouts(timeout=timeout, deadline=deadline)
 
     def close(self):
         self.apis.destroy()
         self.consumers.destroy()
         self.plugins.destroy()
+
+        if self._owns_transport:
+            self.transport.close()
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+JSON codecs for the bodies of the admin API. Decoding large pages (like `size=1000`) with the standard library is a
+  noticeable part of the time spent by the clients, so a faster library is used when it is installed:
+
+    client = KongAdminClient(api_url)                     # The fastest codec available
+    client = KongAdminClient(api_url, json_codec='json')  # Always the standard library
+
+Codecs are looked up by name: 'orjson' and 'ujson' when installed, 'json' always. The default is the first available
+  of these, or the one named by the KONG_JSON_CODEC environment variable. See scripts/benchmarks/json_codec.py for a
+  comparison on consumer and plugin payloads.
+"""
+from __future__ import unicode_literals, print_function
+import json
+import os
+
+import six
+
+from .compat import OrderedDict
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+
+class JSONCodec(object):
+    """
+    Decodes and encodes JSON documents with the standard library.
+    """
+    name = 'json'
+
+    def __repr__(self):
+        return '<%s: %s>' % (self.__class__.__name__, self.name)
+
+    def loads(self, data):
+        """
+        :param data: The document, as (UTF-8 encoded) bytes or text
+        :type data: bytes | six.text_type
+        """
+        if isinstance(data, six.binary_type):
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+    def dumps(self, value):
+        """
+        :rtype: six.text_type
+        """
+        return six.text_type(json.dumps(value))
+
+
+class OrjsonCodec(JSONCodec):
+    name = 'orjson'
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+    def dumps(self, value):
+        return orjson.dumps(value).decode('utf-8')
+
+
+class UjsonCodec(JSONCodec):
+    name = 'ujson'
+
+    def loads(self, data):
+        if isinstance(data, six.binary_type):
+            data = data.decode('utf-8')
+        return ujson.loads(data)
+
+    def dumps(self, value):
+        return ujson.dumps(value, escape_forward_slashes=False, ensure_ascii=False)
+
+
+# The available codecs, fastest first
+CODECS = OrderedDict()
+if orjson is not None:
+    CODECS[OrjsonCodec.name] = OrjsonCodec()
+if ujson is not None:
+    CODECS[UjsonCodec.name] = UjsonCodec()
+CODECS[JSONCodec.name] = STDLIB_CODEC = JSONCodec()
+
+
+def get_codec(codec=None):
+    """
+    :param codec: A codec, the name of one, or None for the default codec
+    :type codec: JSONCodec | six.text_type
+    :rtype: JSONCodec
+    :raises ValueError: If no codec with the name is available
+    """
+    if codec is None:
+        return get_default_codec()
+    if isinstance(codec, JSONCodec):
+        return codec
+    try:
+        return CODECS[codec]
+    except KeyError:
+        raise ValueError('Unknown or unavailable JSON codec: %s (available: %s)' % (codec, ', '.join(CODECS)))
+
+
+def get_default_codec():
+    """
+    :rtype: JSONCodec
+    :return: The codec named by the KONG_JSON_CODEC environment variable, otherwise the fastest one available
+    """
+    name = os.getenv('KONG_JSON_CODEC')
+    if name:
+        return get_codec(name)
+    return next(iter(CODECS.values()))
@@ -13,6 +13,11 @@ except ImportError:  # pragma: no cover
     from urlparse import urlparse, urljoin, parse_qs, parse_qsl, ParseResult
     from urllib import urlencode, quote, unquote
 
+try:
+    from collections.abc import Mapping
+except ImportError:  # pragma: no cover
+    from collections import Mapping
+
 try:
     from collections import OrderedDict
 except ImportError:  # pragma: no cover
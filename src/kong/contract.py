@@ -5,6 +5,7 @@ from abc import ABCMeta, abstractmethod
 from six import with_metaclass
 
 from .mixins import CollectionMixin
+from .bulk import bulk_apply, bind_timeouts, DEFAULT_BULK_CONCURRENCY
 
 
 class APIPluginConfigurationAdminContract(CollectionMixin):
@@ -758,6 +759,25 @@ class ConsumerAdminContract(CollectionMixin):
                 }
         """
 
+    def bulk_create(self, specs, concurrency=DEFAULT_BULK_CONCURRENCY):
+        """
+        Creates many consumers, keeping up to `concurrency` requests in flight. The specs are streamed, so generators
+          of any size can be passed in. A failing spec does not abort the batch; inspect the yielded results instead:
+
+            for outcome in client.consumers.bulk_create(({'username': name} for name in names), concurrency=20):
+                if outcome.conflict:
+                    ...
+
+        :param specs: Iterable of dictionaries containing the keyword arguments for `create` (username, custom_id)
+        :type specs: collections.Iterable
+        :param concurrency: The maximum amount of requests in flight. Make sure the connection pool of the transport
+            is at least as large.
+        :type concurrency: int
+        :rtype: collections.Iterator[kong.bulk.BulkResult]
+        :return: Iterator yielding a BulkResult per spec, in order of completion
+        """
+        return bulk_apply(bind_timeouts(self, self.create), specs, concurrency=concurrency)
+
     @abstractmethod
     def create_or_update(self, consumer_id=None, username=None, custom_id=None):
         """
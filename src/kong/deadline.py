@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Timeouts and deadlines of the transports. Every request is sent with a connect and a read timeout, so a stalled Kong
+  node can't block a worker forever. A deadline bounds the total time spent on a call, including its retries and the
+  backoff between them:
+
+    client = KongAdminClient(api_url, timeout=(2, 10), deadline=30)
+
+    # Overrides for every request sent by the current thread (or task) within the block
+    with client.timeouts(timeout=1, deadline=5):
+        client.apis.retrieve('mockbin')
+
+Deadlines propagate: all requests within the block share the same deadline, so calls made up of several requests
+  (like `iterate` or `bulk_create`) are bounded as a whole, and a nested block can only shorten it. The overrides are
+  kept per thread; calls that send requests from worker threads (bulk operations, prefetching pages, kong.sync,
+  kong.snapshot and kong.table) bind their workers to the caller's overrides, see kong.bulk.bind_timeouts.
+"""
+from __future__ import unicode_literals, print_function
+import time
+
+# Seconds to wait for a connection to be established (slightly over a multiple of 3, the TCP retransmission window)
+DEFAULT_CONNECT_TIMEOUT = 3.05
+
+# Seconds to wait for the server to send data, between bytes
+DEFAULT_READ_TIMEOUT = 30
+
+DEFAULT_TIMEOUT = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+
+
+def normalize_timeout(timeout):
+    """
+    :param timeout: A number of seconds for both connecting and reading, a (connect, read) tuple, or None
+    :rtype: tuple
+    :return: A (connect, read) tuple, where None means no timeout
+    """
+    if timeout is None:
+        return None, None
+    if isinstance(timeout, (tuple, list)):
+        connect, read = timeout
+        return connect, read
+    return timeout, timeout
+
+
+class Deadline(object):
+    """
+    A point in time after which no more requests should be sent for a call.
+    """
+
+    def __init__(self, seconds, clock=time.time):
+        """
+        :param seconds: The amount of seconds from now until the deadline
+        :type seconds: float
+        :param clock: Function returning the current time in seconds
+        :type clock: callable
+        """
+        self.expires_at = clock() + seconds
+        self._clock = clock
+
+    def __repr__(self):
+        return '<Deadline: %.3fs remaining>' % self.remaining()
+
+    def remaining(self):
+        """
+        :rtype: float
+        :return: The amount of seconds left, 0 if the deadline passed
+        """
+        return max(self.expires_at - self._clock(), 0)
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def allows(self, delay):
+        """
+        :rtype: bool
+        :return: Whether or not there is time left to wait `delay` seconds and send another request
+        """
+        return delay < self.remaining()
+
+    def clamp(self, timeout):
+        """
+        :param timeout: The timeout of a request, as accepted by normalize_timeout
+        :rtype: tuple
+        :return: The (connect, read) timeout, shortened so the request doesn't wait beyond the deadline
+        """
+        remaining = self.remaining()
+        return tuple(remaining if value is None else min(value, remaining) for value in normalize_timeout(timeout))
+
+
+def earliest(deadline, other):
+    """
+    :type deadline: Deadline
+    :type other: Deadline
+    :rtype: Deadline
+    :return: The deadline that expires first, ignoring None
+    """
+    if deadline is None:
+        return other
+    if other is None:
+        return deadline
+    return deadline if deadline.expires_at <= other.expires_at else other
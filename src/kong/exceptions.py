@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals, print_function
+import requests
 
 
 class ConflictError(Exception):
@@ -8,3 +9,25 @@ class ConflictError(Exception):
 
 class ServerError(Exception):
     pass
+
+
+class ConnectionDroppedError(IOError):
+    """
+    Raised by the simulator when it simulates a dropped connection
+    """
+
+
+class DeadlineExceededError(requests.Timeout):
+    """
+    Raised by the transports when a call did not complete before its deadline
+    """
+
+
+class PluginConfigurationError(ValueError):
+    """
+    Raised when a plugin configuration doesn't match the plugin's schema. `errors` lists everything that is wrong.
+    """
+
+    def __init__(self, errors):
+        super(PluginConfigurationError, self).__init__('; '.join(errors))
+        self.errors = errors
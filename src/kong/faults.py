@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Latency and fault injection for the simulator. A SimulatorProfile describes how the simulated admin API behaves under
+  load: how long every endpoint takes, how often requests fail and how many requests per second it can handle.
+
+    profile = SimulatorProfile(
+        latency={'*': lognormal(0.02, 0.5), 'consumers.list': uniform(0.05, 0.2)},
+        error_rates={SERVER_ERROR: 0.01, CONFLICT: 0.005, DISCONNECT: 0.001},
+        max_rate=500, seed=42)
+
+    simulator = KongAdminSimulator(profile=profile)        # In-process
+    server = SimulatorServer(profile=profile).start()      # Over HTTP
+
+Endpoints are named after the admin methods: 'apis.create', 'consumers.retrieve', 'apis.plugins.update',
+  'consumers.key_auth.list', 'plugins.retrieve_schema', ... Settings are looked up for the endpoint itself, then for
+  its parents ('consumers.key_auth.*', 'consumers.*'), then for the operation ('*.list') and finally for '*'.
+"""
+from __future__ import unicode_literals, print_function
+import random
+import threading
+import time
+from collections import namedtuple, defaultdict
+
+import six
+
+from .exceptions import ConflictError, ServerError, ConnectionDroppedError
+from .ratelimit import RateLimiter
+
+# Kinds of injected errors
+SERVER_ERROR = 'server_error'
+CONFLICT = 'conflict'
+DISCONNECT = 'disconnect'
+
+ERROR_KINDS = (SERVER_ERROR, CONFLICT, DISCONNECT)
+
+# Conflicts can only happen when writing
+WRITE_OPERATIONS = ('create', 'create_or_update', 'update')
+
+# Methods of the admins that correspond to a request, and the operation they are known by
+REQUEST_OPERATIONS = {
+    'create': 'create',
+    'create_or_update': 'create_or_update',
+    'update': 'update',
+    'retrieve': 'retrieve',
+    'retrieve_schema': 'retrieve_schema',
+    'delete': 'delete',
+    'list': 'list',
+    'count': 'list',  # Over HTTP, counting is listing
+}
+
+# Methods of the admins returning a related admin
+FACTORY_METHODS = ('plugins', 'basic_auth', 'key_auth', 'oauth2')
+
+# Methods implemented in terms of other methods of the admin, which should go through the profile as well
+COMPOSITE_METHODS = ('iterate', 'iterate_pages', 'bulk_create')
+
+
+def fixed(seconds):
+    return lambda rng: seconds
+
+
+def uniform(low, high):
+    return lambda rng: rng.uniform(low, high)
+
+
+def exponential(mean):
+    return lambda rng: rng.expovariate(1.0 / mean)
+
+
+def lognormal(median, sigma):
+    """
+    Latencies are usually log-normally distributed: most requests take about `median` seconds, with a long tail that
+      gets longer as `sigma` grows.
+    """
+    return lambda rng: median * rng.lognormvariate(0, sigma)
+
+
+class Fault(namedtuple('Fault', ['delay', 'error'])):
+    """
+    What happens to a single request.
+
+    :ivar delay: The amount of seconds the request takes
+    :ivar error: One of ERROR_KINDS, or None if the request succeeds
+    """
+    __slots__ = ()
+
+
+class SimulatorProfile(object):
+    def __init__(self, latency=None, error_rates=None, max_rate=None, burst=1, seed=None):
+        """
+        :param latency: Maps endpoints (or patterns) to the seconds they take: a number, or a distribution like
+            `lognormal(0.02, 0.5)` (any callable taking a random.Random and returning seconds)
+        :type latency: dict
+        :param error_rates: Maps error kinds (SERVER_ERROR, CONFLICT, DISCONNECT) to the fraction of requests failing
+            that way. Either for all endpoints, or per endpoint (pattern) like `latency`.
+        :type error_rates: dict
+        :param max_rate: The maximum amount of requests per second handled; further requests are delayed
+        :type max_rate: float
+        :param burst: The amount of requests handled at once after being idle, when max_rate is set
+        :type burst: int
+        :param seed: Seeds the random generator, so runs are reproducible
+        """
+        self.latency = latency or {}
+        self.error_rates = error_rates or {}
+        if self.error_rates and all(kind in ERROR_KINDS for kind in self.error_rates):
+            self.error_rates = {'*': self.error_rates}
+
+        self.rate_limiter = RateLimiter(max_rate, burst=burst) if max_rate else None
+        self.injected = defaultdict(int)
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def decide(self, endpoint):
+        """
+        :param endpoint: The endpoint called, like 'consumers.create'
+        :type endpoint: six.text_type
+        :rtype: Fault
+        """
+        latency = lookup(self.latency, endpoint)
+        error_rates = lookup(self.error_rates, endpoint) or {}
+        operation = endpoint.rsplit('.', 1)[-1]
+
+        with self._lock:
+            delay = latency(self._random) if callable(latency) else (latency or 0)
+
+            error = None
+            draw = self._random.random()
+            for kind in ERROR_KINDS:
+                if kind == CONFLICT and operation not in WRITE_OPERATIONS:
+                    continue
+                draw -= error_rates.get(kind, 0)
+                if draw < 0:
+                    error = kind
+                    self.injected[kind] += 1
+                    break
+
+        return Fault(max(delay, 0), error)
+
+    def throttle_delay(self):
+        """
+        :rtype: float
+        :return: 0 if a request can be handled now, otherwise the amount of seconds to wait before asking again
+        """
+        if self.rate_limiter is None:
+            return 0
+        wait = self.rate_limiter.try_acquire()
+        if wait == 0:
+            self.rate_limiter.release()
+        return wait
+
+    def throttle(self):
+        """
+        Blocks until a request can be handled.
+        """
+        if self.rate_limiter is not None:
+            with self.rate_limiter:
+                pass
+
+    def apply(self, endpoint):
+        """
+        Throttles, delays and fails a request to the endpoint in the current thread, as decided by the profile.
+        """
+        self.throttle()
+        fault = self.decide(endpoint)
+        if fault.delay:
+            time.sleep(fault.delay)
+
+        if fault.error == SERVER_ERROR:
+            raise ServerError('Injected server error (%s)' % endpoint)
+        elif fault.error == CONFLICT:
+            raise ConflictError('Injected conflict (%s)' % endpoint)
+        elif fault.error == DISCONNECT:
+            raise ConnectionDroppedError('Injected dropped connection (%s)' % endpoint)
+
+
+def lookup(settings, endpoint):
+    """
+    :return: The setting for the endpoint, its closest parent pattern, its operation or the '*' pattern, if any
+    """
+    if endpoint in settings:
+        return settings[endpoint]
+
+    parts = endpoint.split('.')
+    for index in range(len(parts) - 1, 0, -1):
+        pattern = '%s.*' % '.'.join(parts[:index])
+        if pattern in settings:
+            return settings[pattern]
+
+    pattern = '*.%s' % parts[-1]
+    if pattern in settings:
+        return settings[pattern]
+    return settings.get('*')
+
+
+class FaultInjectingAdmin(object):
+    """
+    Wraps a simulator admin, so every call that corresponds to a request is throttled, delayed and failed as decided
+      by the profile. Related admins (like `consumers.key_auth(...)`) are wrapped as well.
+    """
+
+    def __init__(self, admin, profile, endpoint):
+        self.admin = admin
+        self.profile = profile
+        self.endpoint = endpoint
+
+    def __getattr__(self, name):
+        if name == 'admin':
+            raise AttributeError(name)
+
+        attr = getattr(self.admin, name)
+        if name in REQUEST_OPERATIONS:
+            endpoint = '%s.%s' % (self.endpoint, REQUEST_OPERATIONS[name])
+
+            def call(*args, **kwargs):
+                self.profile.apply(endpoint)
+                return attr(*args, **kwargs)
+            return call
+        elif name in FACTORY_METHODS:
+            endpoint = '%s.%s' % (self.endpoint, name)
+            return lambda *args, **kwargs: FaultInjectingAdmin(attr(*args, **kwargs), self.profile, endpoint)
+        elif name in COMPOSITE_METHODS:
+            # Bind to the wrapper, so the calls made internally go through the profile
+            return six.get_unbound_function(getattr(type(self.admin), name)).__get__(self, type(self))
+        return attr
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Per-request instrumentation for the admin clients. The transports call `on_request` on a MetricsHook after every
+  request; InMemoryMetrics aggregates them into latency histograms per method and route:
+
+    metrics = InMemoryMetrics()
+    client = KongAdminClient(api_url, metrics=metrics)
+    ...
+    for (method, route), stats in metrics.summary().items():
+        print(method, route, stats['count'], stats['p50'], stats['p99'])
+
+Routes are templated, so all requests for the same resource end up together: '/consumers/{id}/keyauth/'.
+"""
+from __future__ import unicode_literals, print_function
+import bisect
+import threading
+from collections import namedtuple, defaultdict
+
+from .compat import urlparse
+
+# Upper bounds (in seconds) of the histogram buckets: 4 buckets per doubling, from 0.5ms up to about 2 minutes
+LATENCY_BUCKETS = tuple(0.0005 * 2 ** (i / 4.0) for i in range(73))
+
+# The percentiles reported by InMemoryMetrics.summary
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+class RequestEvent(namedtuple('RequestEvent', ['method', 'route', 'url', 'status', 'bytes', 'retries', 'elapsed',
+                                               'error'])):
+    """
+    A single request sent by a transport.
+
+    :ivar method: The HTTP method
+    :ivar route: The templated path, like '/consumers/{id}/keyauth/'
+    :ivar url: The full url
+    :ivar status: The status code of the response, or None if no response was received
+    :ivar bytes: The size of the response body, or None if no response was received
+    :ivar retries: The amount of attempts that preceded this one for the same call
+    :ivar elapsed: The wall-clock time (in seconds) it took
+    :ivar error: The exception raised while sending the request, if any
+    """
+    __slots__ = ()
+
+
+def get_route(url, api_url=None):
+    """
+    Templates the path of an admin API url. Kong paths alternate between resources and identifiers
+      (/consumers/<username_or_id>/keyauth/<id>/), so every second segment is replaced by '{id}'.
+
+    :param url: The url of the request
+    :type url: six.text_type
+    :param api_url: The url of the admin endpoint, whose path is not part of the route
+    :type api_url: six.text_type
+    :rtype: six.text_type
+    """
+    path = urlparse(url).path
+    if api_url is not None:
+        prefix = urlparse(api_url).path.rstrip('/')
+        if prefix and path.startswith(prefix):
+            path = path[len(prefix):]
+
+    segments = [segment for segment in path.split('/') if segment]
+    for index in range(1, len(segments), 2):
+        segments[index] = '{id}'
+    return '/%s/' % '/'.join(segments) if segments else '/'
+
+
+class MetricsHook(object):
+    """
+    Receives a RequestEvent for every request. This base class ignores them; override `on_request` to export them to
+      a metrics system.
+    """
+
+    def on_request(self, event):
+        """
+        :type event: RequestEvent
+        """
+
+
+class Histogram(object):
+    """
+    Latency histogram with fixed, logarithmic buckets. Percentiles are estimated from the bucket boundaries, so they
+      are accurate to within a bucket (about 19%).
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percentile):
+        """
+        :param percentile: The percentile, between 0 and 100
+        :type percentile: float
+        :return: The (estimated) value below which the given percentage of observations fall
+        """
+        if not self.count:
+            return None
+
+        rank = percentile / 100.0 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                upper_bound = self.buckets[index] if index < len(self.buckets) else self.max
+                return max(min(upper_bound, self.max), self.min)
+        return self.max
+
+
+class RouteStats(object):
+    def __init__(self):
+        self.latency = Histogram()
+        self.statuses = defaultdict(int)
+        self.bytes = 0
+        self.retries = 0
+        self.errors = 0
+
+    def observe(self, event):
+        self.latency.observe(event.elapsed)
+        if event.error is not None:
+            self.errors += 1
+        else:
+            self.statuses[event.status] += 1
+            self.bytes += event.bytes or 0
+        self.retries += event.retries
+
+
+class InMemoryMetrics(MetricsHook):
+    """
+    Thread-safe aggregator keeping a RouteStats (latency histogram, status codes, bytes, retries and errors) per
+      method and route.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self._lock = threading.Lock()
+
+    def on_request(self, event):
+        key = (event.method, event.route)
+        with self._lock:
+            stats = self.routes.get(key)
+            if stats is None:
+                stats = self.routes[key] = RouteStats()
+            stats.observe(event)
+
+    def reset(self):
+        with self._lock:
+            self.routes = {}
+
+    def summary(self, percentiles=DEFAULT_PERCENTILES):
+        """
+        :param percentiles: The latency percentiles to report
+        :type percentiles: collections.Iterable
+        :rtype: dict
+        :return: Maps (method, route) to a dictionary like:
+                {
+                    "count": 1200,
+                    "errors": 0,
+                    "retries": 3,
+                    "bytes": 540000,
+                    "statuses": {200: 1197, 500: 3},
+                    "mean": 0.012,
+                    "max": 0.31,
+                    "p50": 0.0095,
+                    "p90": 0.019,
+                    "p99": 0.16
+                }
+        """
+        with self._lock:
+            result = {}
+            for key, stats in self.routes.items():
+                summary = {
+                    'count': stats.latency.count,
+                    'errors': stats.errors,
+                    'retries': stats.retries,
+                    'bytes': stats.bytes,
+                    'statuses': dict(stats.statuses),
+                    'mean': stats.latency.mean,
+                    'max': stats.latency.max,
+                }
+                for percentile in percentiles:
+                    summary['p%s' % percentile] = stats.latency.percentile(percentile)
+                result[key] = summary
+            return result
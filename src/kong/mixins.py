@@ -1,10 +1,160 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals, print_function
 from abc import ABCMeta, abstractmethod
+import functools
+import sys
+import threading
+import time
 
-from six import with_metaclass
+from six import with_metaclass, reraise
+from six.moves.queue import Queue
 
 from .utils import parse_query_parameters
+from .bulk import bind_timeouts
+
+
+def get_next_offset(response):
+    """
+    :param response: A page returned by a `list` call
+    :type response: dict
+    :return: The offset of the next page, or None if this was the last page
+    """
+    next_url = response.get('next', None)
+    if next_url is None:
+        return None
+    return parse_query_parameters(next_url).get('offset')[0]
+
+
+def get_response_size(collection):
+    """
+    :return: The size (in bytes) of the last response received by the collection's transport in this thread, if known
+    """
+    transport = getattr(collection, 'transport', None)
+    return getattr(transport, 'last_response_size', None)
+
+
+def prefetch_pages(pages, depth, bind=None):
+    """
+    Consumes an iterator of pages in a background thread, staying at most `depth` pages ahead of the caller. This way
+      the next page is already being fetched while the caller processes the current one.
+
+    :param pages: Iterator yielding pages
+    :type pages: collections.Iterator
+    :param depth: The maximum amount of pages fetched ahead
+    :type depth: int
+    :param bind: Function wrapping the producer before it is handed to the background thread, like
+        kong.transport.Transport.bind to fetch the pages within the caller's timeouts
+    :type bind: callable
+    :rtype: collections.Iterator
+    """
+    assert depth >= 1, 'depth should be at least 1'
+
+    queue = Queue()
+    slots = threading.Semaphore(depth)
+    stopped = threading.Event()
+
+    def produce():
+        try:
+            while True:
+                slots.acquire()
+                if stopped.is_set():
+                    return
+                page = next(pages, None)
+                if page is None:
+                    queue.put((False, None))
+                    return
+                queue.put((True, page))
+        except Exception:
+            queue.put((False, sys.exc_info()))
+
+    producer = threading.Thread(target=produce if bind is None else bind(produce))
+    producer.daemon = True
+    producer.start()
+
+    try:
+        while True:
+            has_page, value = queue.get()
+            if not has_page:
+                if value is not None:
+                    reraise(*value)
+                return
+            slots.release()
+            yield value
+    finally:
+        # Wake up the producer so it notices the caller is done
+        stopped.set()
+        slots.release()
+
+
+class AdaptivePageSize(object):
+    """
+    Picks the page size for every `list` call of an iteration, based on the latency and payload size of the previous
+      pages. The size grows while pages come back faster than `target_latency` and shrinks when they are slower, or when
+      a page would exceed `max_bytes`. The size never changes more than a factor 2 between pages and stays within
+      [min_size, max_size].
+
+    Pass it to `CollectionMixin.iterate`; afterwards `size` holds the size it settled on, and `history` contains an
+      (size, items, elapsed, nbytes) tuple per page, which is useful to tune the defaults:
+
+        page_size = AdaptivePageSize(target_latency=0.25)
+        for consumer in client.consumers.iterate(adaptive=page_size):
+            ...
+    """
+
+    def __init__(self, initial_size=100, min_size=10, max_size=1000, target_latency=0.5, max_bytes=1024 * 1024,
+                 clock=time.time):
+        """
+        :param initial_size: The size of the first page
+        :type initial_size: int
+        :param min_size: The minimum size of a page
+        :type min_size: int
+        :param max_size: The maximum size of a page
+        :type max_size: int
+        :param target_latency: The wall-clock time (in seconds) a page should take
+        :type target_latency: float
+        :param max_bytes: The maximum size (in bytes) of a response, or None for no limit. Only enforced when the
+            collection reports response sizes (like the admin clients do).
+        :type max_bytes: int
+        :param clock: Function returning the current time in seconds
+        :type clock: callable
+        """
+        assert 1 <= min_size <= max_size, 'Expected 1 <= min_size <= max_size'
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_latency = target_latency
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.size = self._clamp(initial_size)
+        self.history = []
+
+    def observe(self, size, items, elapsed, nbytes=None):
+        """
+        Adjusts the page size based on a page that was just fetched.
+
+        :param size: The requested page size
+        :type size: int
+        :param items: The amount of items returned
+        :type items: int
+        :param elapsed: The time (in seconds) it took to fetch the page
+        :type elapsed: float
+        :param nbytes: The size of the response body, if known
+        :type nbytes: int
+        """
+        self.history.append((size, items, elapsed, nbytes))
+
+        # A partial (last) page says little about how larger pages would behave
+        if items < size:
+            return
+
+        new_size = size * min(max(self.target_latency / max(elapsed, 1e-6), 0.5), 2.0)
+        if self.max_bytes is not None and nbytes:
+            new_size = min(new_size, self.max_bytes / (float(nbytes) / max(items, 1)))
+
+        self.size = self._clamp(new_size)
+
+    def _clamp(self, size):
+        return int(min(max(size, self.min_size), self.max_size))
 
 
 class CollectionMixin(with_metaclass(ABCMeta, object)):
@@ -21,13 +171,47 @@ class CollectionMixin(with_metaclass(ABCMeta, object)):
         :return: Dictionary containing dictionaries
         """
 
-    def iterate(self, window_size=10, **filter_fields):
+    def iterate(self, window_size=10, prefetch=0, adaptive=None, stream=False, **filter_fields):
+        """
+        :param window_size: The amount of objects to request per page
+        :type window_size: int
+        :param prefetch: The amount of pages to fetch ahead in a background thread while the caller processes the
+            current page. 0 (the default) fetches a page only when the previous one has been consumed.
+        :type prefetch: int
+        :param adaptive: Adjusts the page size between requests. Overrides window_size.
+        :type adaptive: AdaptivePageSize
+        :param stream: Whether or not to yield the items of a page while it is being received (see kong.streaming),
+            instead of after decoding the whole page. Only supported by the admin clients, and not in combination with
+            prefetch or adaptive, which need complete pages.
+        :type stream: bool
+        :param filter_fields: Dictionary containing values to filter for
+        :type filter_fields: dict
+        :rtype: collections.Iterator[dict]
+        :return: Iterator yielding every object in the collection
+        """
+        assert not stream or (prefetch == 0 and adaptive is None), 'stream cannot be combined with prefetch or adaptive'
+
+        pages = self.iterate_pages(window_size, adaptive=adaptive, stream=stream, **filter_fields)
+        if prefetch > 0:
+            pages = prefetch_pages(pages, prefetch, bind=functools.partial(bind_timeouts, self))
+
+        for page in pages:
+            for item in page['data']:
+                yield item
+
+    def iterate_pages(self, window_size=10, adaptive=None, stream=False, **filter_fields):
         current_offset = None
+        if stream:
+            filter_fields['stream'] = True
         while True:
-            response = self.list(size=window_size, offset=current_offset, **filter_fields)
-            for item in response['data']:
-                yield item
-            next_url = response.get('next', None)
-            if next_url is None:
+            if adaptive is None:
+                response = self.list(size=window_size, offset=current_offset, **filter_fields)
+            else:
+                size = adaptive.size
+                started = adaptive.clock()
+                response = self.list(size=size, offset=current_offset, **filter_fields)
+                adaptive.observe(size, len(response['data']), adaptive.clock() - started, get_response_size(self))
+            yield response
+            current_offset = get_next_offset(response)
+            if current_offset is None:
                 return
-            current_offset = parse_query_parameters(next_url).get('offset')[0]
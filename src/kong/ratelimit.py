@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import threading
+import time
+
+# How long to wait (measured in seconds) before checking again whether an in-flight slot became available. Only used by
+#   callers that cannot block on the internal condition, like asyncio tasks.
+IN_FLIGHT_POLL_INTERVAL = 0.005
+
+
+class RateLimiter(object):
+    """
+    Token bucket rate limiter with an optional cap on the amount of requests in flight.
+
+    Tokens are added at `rate` per second, up to `burst` tokens. Every request takes one token and, when
+      `max_in_flight` is set, one in-flight slot that is given back by `release`. A single instance can be shared by
+      threads (`acquire`, or use it as a context manager) and asyncio tasks (poll `try_acquire`).
+    """
+
+    def __init__(self, rate, burst=1, max_in_flight=None, clock=time.time):
+        """
+        :param rate: The amount of requests per second
+        :type rate: float
+        :param burst: The maximum amount of requests that can be sent at once after being idle
+        :type burst: int
+        :param max_in_flight: The maximum amount of requests in flight, or None for no limit
+        :type max_in_flight: int
+        :param clock: Function returning the current time in seconds
+        :type clock: callable
+        """
+        assert rate > 0, 'rate should be larger than 0'
+        assert burst >= 1, 'burst should be at least 1'
+        assert max_in_flight is None or max_in_flight >= 1, 'max_in_flight should be at least 1'
+
+        self.rate = float(rate)
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self._clock = clock
+        self._tokens = float(burst)
+        self._last_refill = clock()
+        self._in_flight = 0
+        self._condition = threading.Condition(threading.Lock())
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def try_acquire(self):
+        """
+        Tries to acquire a token (and in-flight slot) without blocking.
+
+        :rtype: float
+        :return: 0 if acquired, otherwise the amount of seconds to wait before trying again
+        """
+        with self._condition:
+            wait = self._reserve()
+        return IN_FLIGHT_POLL_INTERVAL if wait is None else wait
+
+    def acquire(self):
+        """
+        Blocks the current thread until a token (and in-flight slot) is acquired.
+        """
+        with self._condition:
+            while True:
+                wait = self._reserve()
+                if wait == 0:
+                    return
+                # Waits without a timeout (None) until an in-flight slot is released
+                self._condition.wait(wait)
+
+    def release(self):
+        """
+        Gives back the in-flight slot taken by `acquire` or `try_acquire`.
+        """
+        with self._condition:
+            self._in_flight = max(self._in_flight - 1, 0)
+            self._condition.notify()
+
+    def _reserve(self):
+        """
+        Must be called while holding the lock.
+
+        :return: 0 if reserved, the amount of seconds until a token is available, or None when waiting for an
+            in-flight slot
+        """
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+        if self.max_in_flight is not None and self._in_flight >= self.max_in_flight:
+            return None
+
+        if self._tokens >= 1:
+            self._tokens -= 1
+            self._in_flight += 1
+            return 0
+
+        return (1 - self._tokens) / self.rate
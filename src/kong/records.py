@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Compact, typed alternatives to the dicts returned by the admin clients, for keeping many entities in memory (like all
+  key-auth credentials during a reconciliation):
+
+    client = KongAdminClient(api_url, records=True)
+    consumer = client.consumers.retrieve('bob')   # A Consumer
+    consumer.username, consumer['username']        # 'bob', 'bob'
+    consumer.to_dict()                             # {'id': '...', 'username': 'bob', 'created_at': ...}
+
+Records use __slots__ instead of a per-instance dict, which takes a fraction of the memory. They are read-only
+  mappings as well, so code written for the dicts (`record['id']`, `record.get('custom_id')`, `dict(record)`) keeps
+  working. As in the responses of Kong, fields without a value are left out: they are None as attributes, and missing
+  as keys. Fields unknown to the record (added by newer Kong versions) are kept in a small dict of their own.
+
+The `config` of a PluginConfiguration is kept as decoded by the client's JSON codec, it is not converted again.
+"""
+from __future__ import unicode_literals, print_function
+
+from .compat import Mapping
+
+
+class Record(Mapping):
+    __slots__ = ('_extra',)
+
+    # The fields of the entity, in the order they are listed
+    FIELDS = ()
+
+    def __init__(self, **fields):
+        self._extra = None
+        for key, value in fields.items():
+            self.set(key, value)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        :param data: A record as returned by the admin API
+        :type data: dict
+        """
+        record = cls()
+        for key, value in data.items():
+            record.set(key, value)
+        return record
+
+    def set(self, key, value):
+        if key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def to_dict(self):
+        """
+        :rtype: dict
+        :return: The record as returned by the admin API
+        """
+        return dict(self.items())
+
+    def __reduce__(self):
+        # For copy and pickle, which would otherwise take the None of unset fields for values
+        return self.__class__.from_dict, (self.to_dict(),)
+
+    def __getattr__(self, name):
+        # Only called for fields that are not set
+        if name in self.FIELDS:
+            return None
+        raise AttributeError(name)
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            try:
+                return object.__getattribute__(self, key)
+            except AttributeError:
+                raise KeyError(key)
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        for field in self.FIELDS:
+            try:
+                object.__getattribute__(self, field)
+            except AttributeError:
+                continue
+            yield field
+        if self._extra is not None:
+            for key in self._extra:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return '<%s: %r>' % (self.__class__.__name__, self.to_dict())
+
+
+class Api(Record):
+    FIELDS = ('id', 'name', 'request_host', 'request_path', 'strip_request_path', 'preserve_host', 'upstream_url',
+              'created_at')
+    __slots__ = FIELDS
+
+
+class Consumer(Record):
+    FIELDS = ('id', 'username', 'custom_id', 'created_at')
+    __slots__ = FIELDS
+
+
+class PluginConfiguration(Record):
+    FIELDS = ('id', 'api_id', 'consumer_id', 'name', 'config', 'enabled', 'created_at')
+    __slots__ = FIELDS
+
+
+class BasicAuth(Record):
+    FIELDS = ('id', 'consumer_id', 'username', 'password', 'created_at')
+    __slots__ = FIELDS
+
+
+class KeyAuth(Record):
+    FIELDS = ('id', 'consumer_id', 'key', 'created_at')
+    __slots__ = FIELDS
+
+
+class OAuth2App(Record):
+    FIELDS = ('id', 'consumer_id', 'name', 'redirect_uri', 'client_id', 'client_secret', 'created_at')
+    __slots__ = FIELDS
+
+
+def to_record(record_class, result):
+    """
+    :param record_class: The Record subclass of the entity
+    :type record_class: type
+    :param result: A record, or a page of records (like {"data": [...], "next": "..."}), as returned by the admin API
+    :type result: dict
+    :return: The record as a record_class, or the page with its records converted
+    """
+    if 'data' in result and isinstance(result['data'], list):
+        page = dict(result)
+        page['data'] = [record_class.from_dict(data) for data in result['data']]
+        return page
+    return record_class.from_dict(result)
+
+
+def to_dict(record):
+    """
+    :param record: A record (or a dict)
+    :rtype: dict
+    """
+    if isinstance(record, Record):
+        return record.to_dict()
+    return record
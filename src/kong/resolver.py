@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import threading
+import uuid
+
+from .utils import uuid_or_string
+
+
+def is_uuid(value):
+    """
+    :rtype: bool
+    :return: Whether or not the value is (the string representation of) a UUID
+    """
+    if isinstance(value, uuid.UUID):
+        return True
+    try:
+        uuid.UUID(value)
+    except (TypeError, ValueError, AttributeError):
+        return False
+    return True
+
+
+class NameResolver(object):
+    """
+    Thread-safe index mapping the names (or usernames) of a collection to their ids, so requests can address records by
+      id and Kong doesn't have to do a secondary key lookup. Values that are already ids, and unknown names, are passed
+      through unchanged.
+
+    The admin clients keep the index up to date with every record they create, update, retrieve or list, and drop
+      records they delete. Changes made by others are not noticed; `forget` (or `clear`) a name if it got stale.
+    """
+
+    def __init__(self, key_field):
+        """
+        :param key_field: The field holding the name, like 'name' for APIs and 'username' for consumers
+        :type key_field: six.text_type
+        """
+        self.key_field = key_field
+        self._ids = {}  # name -> id
+        self._names = {}  # id -> name
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def resolve(self, name_or_id):
+        """
+        :param name_or_id: A name or an id
+        :type name_or_id: six.text_type | uuid.UUID
+        :rtype: six.text_type
+        :return: The id for a known name, otherwise the value as is
+        """
+        name_or_id = uuid_or_string(name_or_id)
+        return self._ids.get(name_or_id, name_or_id)
+
+    def remember(self, data_struct):
+        """
+        :param data_struct: A record as returned by the admin API
+        :type data_struct: dict
+        """
+        id = data_struct.get('id')
+        if id is None:
+            return
+        name = data_struct.get(self.key_field)
+
+        with self._lock:
+            previous_name = self._names.get(id)
+            # Unless the previous name was taken by another record (or forgotten) in the meantime
+            if previous_name is not None and previous_name != name and self._ids.get(previous_name) == id:
+                self._ids.pop(previous_name)
+
+            if name is None:
+                self._names.pop(id, None)
+            else:
+                self._ids[name] = id
+                self._names[id] = name
+
+    def remember_all(self, data_structs):
+        for data_struct in data_structs:
+            self.remember(data_struct)
+
+    def forget(self, name_or_id):
+        name_or_id = uuid_or_string(name_or_id)
+
+        with self._lock:
+            id = self._ids.pop(name_or_id, name_or_id)
+            name = self._names.pop(id, None)
+            if name is not None:
+                self._ids.pop(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+            self._names.clear()
+
+    def warm(self, collection, window_size=1000):
+        """
+        Loads all names of a collection (like `client.consumers`) into the index.
+
+        :param collection: The collection to iterate
+        :type collection: kong.mixins.CollectionMixin
+        :param window_size: The amount of records to request per page
+        :type window_size: int
+        """
+        for data_struct in collection.iterate(window_size=window_size):
+            self.remember(data_struct)
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+Retry policy of the transports. Every response (or connection error) is classified: server errors (5xx) and
+  connection errors are retried with exponential backoff and full jitter, while client errors (4xx) are returned right
+  away, as sending the same request again won't change the outcome.
+
+Non-idempotent requests (POST and PATCH) are only retried when they certainly weren't handled: after a retryable
+  status, or when the connection could not be established. After a read timeout or a dropped connection, Kong may have
+  created the entity already, and sending the request again would create another one or fail with a conflict.
+
+A Retry-After header (as sent with 503 and 429 responses) takes precedence over the computed backoff. A RetryBudget
+  shared by all calls of a transport caps the amount of retries to a fraction of the calls, so a restarting Kong node
+  is not hammered by every client retrying at once:
+
+    policy = RetryPolicy(max_tries=5, base_delay=0.2, budget=RetryBudget(ratio=0.1))
+    client = KongAdminClient(api_url, retry_policy=policy)
+    ...
+    policy.stats  # {'retries': 12, 'gave_up': 1, 'budget_exhausted': 0, 'deadline_exceeded': 0}
+"""
+from __future__ import unicode_literals, print_function
+import email.utils
+import errno
+import random
+import sys
+import threading
+import time
+
+import requests
+from requests.packages.urllib3.exceptions import ConnectTimeoutError
+
+from .compat import INTERNAL_SERVER_ERROR
+
+# Statuses worth retrying: the server failed, is (temporarily) unable to handle the request or asks to slow down
+RETRY_STATUSES = (429, INTERNAL_SERVER_ERROR, 502, 503, 504)
+
+# Statuses that may carry a Retry-After header
+RETRY_AFTER_STATUSES = (429, 503)
+
+# Methods that are not safe to send twice, see is_connect_error
+NON_IDEMPOTENT_METHODS = ('POST', 'PATCH')
+
+
+def is_connect_error(error):
+    """
+    :param error: The error raised instead of receiving a response
+    :rtype: bool
+    :return: Whether or not the error occurred while connecting (like a refused connection or a connect timeout), so the
+      request was never sent
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError):
+        # Wraps urllib3's MaxRetryError. Since urllib3 1.13, a refused connection is a NewConnectionError, which is a
+        #   ConnectTimeoutError too. Older versions (like the one vendored by requests 2.7) wrap the socket error in a
+        #   ProtocolError, as they do for a dropped connection, so it's told apart by its errno.
+        reason = getattr(error.args[0] if error.args else None, 'reason', None)
+        if isinstance(reason, ConnectTimeoutError):
+            return True
+        return any(getattr(cause, 'errno', None) == errno.ECONNREFUSED
+                   for cause in [reason] + list(getattr(reason, 'args', ())))
+
+    # Errors of the asyncio transport (kong.async_client), which has imported aiohttp by then
+    aiohttp = sys.modules.get('aiohttp')
+    return aiohttp is not None and isinstance(error, aiohttp.ClientConnectorError)
+
+
+def parse_retry_after(value, clock=time.time):
+    """
+    :param value: The value of a Retry-After header: an amount of seconds or an HTTP date
+    :type value: six.text_type
+    :rtype: float
+    :return: The amount of seconds to wait, or None if the value could not be parsed
+    """
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(email.utils.mktime_tz(parsed) - clock(), 0)
+
+
+class RetryBudget(object):
+    """
+    Thread-safe token bucket limiting retries to a fraction of the calls. Every call deposits `ratio` tokens (up to
+      `reserve`), every retry takes one. The reserve allows a few retries after a quiet period; in an outage, retries
+      make up at most about `ratio` of the requests.
+    """
+
+    def __init__(self, ratio=0.2, reserve=10):
+        """
+        :param ratio: The amount of retries allowed per call
+        :type ratio: float
+        :param reserve: The maximum amount of retries that can be saved up
+        :type reserve: int
+        """
+        self.ratio = ratio
+        self.reserve = reserve
+        self._tokens = float(reserve)
+        self._lock = threading.Lock()
+
+    @property
+    def tokens(self):
+        return self._tokens
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self._tokens + self.ratio, self.reserve)
+
+    def withdraw(self):
+        """
+        :rtype: bool
+        :return: Whether or not a retry is allowed
+        """
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RetryPolicy(object):
+    def __init__(self, max_tries=3, base_delay=0.5, max_delay=30, retry_statuses=RETRY_STATUSES, retry_methods=None,
+                 budget=None, random=random.random):
+        """
+        :param max_tries: The maximum amount of attempts per call, including the first one
+        :type max_tries: int
+        :param base_delay: The upper bound of the first backoff (in seconds); doubles with every retry
+        :type base_delay: float
+        :param max_delay: The maximum amount of seconds to wait before a retry, also caps Retry-After
+        :type max_delay: float
+        :param retry_statuses: The response statuses to retry
+        :type retry_statuses: collections.Container
+        :param retry_methods: The HTTP methods to retry, or None to retry all methods. Non-idempotent methods are only
+            retried after a retryable status or a connect error.
+        :type retry_methods: collections.Container
+        :param budget: Limits the amount of retries across calls, or None for no limit
+        :type budget: RetryBudget
+        :param random: Function returning a random float in [0, 1), used for the jitter
+        :type random: callable
+        """
+        assert max_tries >= 1, 'max_tries should be at least 1'
+
+        self.max_tries = max_tries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_statuses = retry_statuses
+        self.retry_methods = retry_methods
+        self.budget = budget
+        self._random = random
+        self._lock = threading.Lock()
+
+        self.retries = 0
+        self.gave_up = 0
+        self.budget_exhausted = 0
+        self.deadline_exceeded = 0
+
+    @property
+    def stats(self):
+        return {
+            'retries': self.retries,
+            'gave_up': self.gave_up,
+            'budget_exhausted': self.budget_exhausted,
+            'deadline_exceeded': self.deadline_exceeded,
+        }
+
+    def is_retryable(self, method, response=None, error=None):
+        """
+        :param response: The response received, if any
+        :param error: The (connection) error raised instead of receiving a response, if any
+        :rtype: bool
+        """
+        if self.retry_methods is not None and method not in self.retry_methods:
+            return False
+        if error is not None:
+            return method not in NON_IDEMPOTENT_METHODS or is_connect_error(error)
+        return response.status_code in self.retry_statuses
+
+    def get_retry_delay(self, method, attempt, response=None, error=None, deadline=None):
+        """
+        Decides whether or not to retry after an attempt.
+
+        :param method: The HTTP method of the request
+        :type method: six.text_type
+        :param attempt: The number of the attempt that just finished, starting at 0
+        :type attempt: int
+        :param response: The response received, if any
+        :param error: The (connection) error raised instead of receiving a response, if any
+        :param deadline: The deadline of the call, if any. No retry is made if it would pass before the retry is sent.
+        :type deadline: kong.deadline.Deadline
+        :rtype: float
+        :return: The amount of seconds to wait before retrying, or None to give up
+        """
+        if attempt == 0 and self.budget is not None:
+            self.budget.deposit()
+
+        if not self.is_retryable(method, response, error):
+            return None
+
+        if attempt + 1 >= self.max_tries:
+            self._count('gave_up')
+            return None
+
+        delay = self.get_delay(attempt, response)
+        if deadline is not None and not deadline.allows(delay):
+            self._count('deadline_exceeded')
+            return None
+
+        if self.budget is not None and not self.budget.withdraw():
+            self._count('budget_exhausted')
+            return None
+
+        self._count('retries')
+        return delay
+
+    def get_delay(self, attempt, response=None):
+        """
+        :rtype: float
+        :return: The amount of seconds to wait before the next attempt
+        """
+        retry_after = None
+        if response is not None and response.status_code in RETRY_AFTER_STATUSES:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+
+        # Full jitter: spreads the retries of clients that failed at the same time
+        return self._random() * min(self.base_delay * 2 ** attempt, self.max_delay)
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+def get_default_retry_policy():
+    """
+    :rtype: RetryPolicy
+    :return: A new policy with the default settings and its own RetryBudget
+    """
+    return RetryPolicy(budget=RetryBudget())
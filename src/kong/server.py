@@ -0,0 +1,473 @@
+# -*- coding: utf-8 -*-
+"""
+Exposes a KongAdminSimulator over HTTP, speaking the same routes, status codes and pagination links as the Kong admin
+  API. This makes it possible to run (and load-test) the real clients without Kong and Cassandra:
+
+    python -m kong.server --port 8001
+
+Or from a test, in a background thread:
+
+    server = SimulatorServer(port=0)
+    server.start()
+    client = KongAdminClient(server.url)
+    ...
+    server.stop()
+
+Requires Python 3.5+ and aiohttp (pip install python-kong[async]).
+"""
+from __future__ import unicode_literals, print_function
+import argparse
+import asyncio
+import json
+import threading
+
+try:
+    from aiohttp import web
+except ImportError:  # pragma: no cover
+    web = None
+
+from .simulator import KongAdminSimulator, PluginAdminSimulator
+from .compat import OK, CREATED, NO_CONTENT, NOT_FOUND, BAD_REQUEST, CONFLICT, INTERNAL_SERVER_ERROR
+from .exceptions import ConflictError
+from .mixins import get_next_offset
+from .validation import parse_bool, coerce_value
+from .faults import SimulatorProfile, SERVER_ERROR, CONFLICT as CONFLICT_ERROR, DISCONNECT, lognormal
+
+# The page size Kong uses when none is requested
+DEFAULT_PAGE_SIZE = 100
+
+
+API_FIELDS = ('upstream_url', 'name', 'request_host', 'request_path', 'strip_request_path', 'preserve_host')
+
+API_BOOLEAN_FIELDS = ('strip_request_path', 'preserve_host')
+
+# Maps the credential segments of consumer urls to the names of the admins (and endpoints)
+CREDENTIALS = {
+    'basicauth': 'basic_auth',
+    'keyauth': 'key_auth',
+    'oauth2': 'oauth2',
+}
+
+
+class NotFound(Exception):
+    pass
+
+
+def get_plugin_fields(data):
+    """
+    Splits the `config.<field>` entries from the form data of a plugin configuration request.
+
+    :rtype: dict
+    """
+    schema = PluginAdminSimulator.PLUGINS.get(data.get('name'), {}).get('fields', {})
+    fields = {}
+    for key, value in data.items():
+        if key.startswith('config.'):
+            field = key[len('config.'):]
+            fields[field] = coerce_value(value, schema.get(field, {}))
+    return fields
+
+
+class SimulatorServer(object):
+    """
+    Asynchronous HTTP server in front of a KongAdminSimulator. Requests are handled on a single event loop; as the
+      simulator works in memory, every request is answered without blocking it.
+    """
+
+    def __init__(self, simulator=None, host='127.0.0.1', port=8001, profile=None):
+        """
+        :param simulator: The simulator to expose. Defaults to a new, empty one.
+        :type simulator: kong.simulator.KongAdminSimulator
+        :param host: The interface to listen on
+        :type host: six.text_type
+        :param port: The port to listen on, or 0 to pick a free port
+        :type port: int
+        :param profile: Injects latency, errors (as 500 and 409 responses, or dropped connections) and throughput
+            limits into every request. Give the simulator itself no profile, or both get applied.
+        :type profile: kong.faults.SimulatorProfile
+        """
+        assert web is not None, 'The simulator server requires aiohttp (pip install python-kong[async])'
+
+        self.simulator = simulator or KongAdminSimulator()
+        self.host = host
+        self.port = port
+        self.profile = profile
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'http://%s:%d' % (self.host, self.port)
+
+    def make_app(self):
+        app = web.Application()
+
+        self._add_routes(app, '/', None, get=self.get_root)
+
+        self._add_routes(app, '/apis', 'apis', get=('list', self.list_apis), post=('create', self.create_api),
+                         put=('create_or_update', self.create_or_update_api))
+        self._add_routes(app, '/apis/{name_or_id}', 'apis', get=('retrieve', self.retrieve_api),
+                         patch=('update', self.update_api), delete=('delete', self.delete_api))
+        self._add_routes(app, '/apis/{name_or_id}/plugins', 'apis.plugins',
+                         get=('list', self.list_plugin_configurations),
+                         post=('create', self.create_plugin_configuration),
+                         put=('create_or_update', self.create_or_update_plugin_configuration))
+        self._add_routes(app, '/apis/{name_or_id}/plugins/{plugin_id}', 'apis.plugins',
+                         get=('retrieve', self.retrieve_plugin_configuration),
+                         patch=('update', self.update_plugin_configuration),
+                         delete=('delete', self.delete_plugin_configuration))
+
+        self._add_routes(app, '/consumers', 'consumers', get=('list', self.list_consumers),
+                         post=('create', self.create_consumer),
+                         put=('create_or_update', self.create_or_update_consumer))
+        self._add_routes(app, '/consumers/{username_or_id}', 'consumers', get=('retrieve', self.retrieve_consumer),
+                         patch=('update', self.update_consumer), delete=('delete', self.delete_consumer))
+        self._add_routes(app, '/consumers/{username_or_id}/{credential:basicauth|keyauth|oauth2}',
+                         'consumers.{credential}', get=('list', self.list_credentials),
+                         post=('create', self.create_credential),
+                         put=('create_or_update', self.create_or_update_credential))
+        self._add_routes(app, '/consumers/{username_or_id}/{credential:basicauth|keyauth|oauth2}/{credential_id}',
+                         'consumers.{credential}', get=('retrieve', self.retrieve_credential),
+                         patch=('update', self.update_credential), delete=('delete', self.delete_credential))
+
+        self._add_routes(app, '/plugins', 'plugins', get=('list', self.list_plugins))
+        self._add_routes(app, '/plugins/{plugin_name}/schema', 'plugins',
+                         get=('retrieve_schema', self.retrieve_plugin_schema))
+
+        return app
+
+    def run(self):
+        """
+        Serves until interrupted.
+        """
+        web.run_app(self.make_app(), host=self.host, port=self.port)
+
+    def start(self):
+        """
+        Starts serving in a background thread. Returns once the server accepts connections.
+
+        :raises OSError: If the server can't listen on its host and port (like when the port is in use)
+        """
+        started = threading.Event()
+        errors = []
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._runner = web.AppRunner(self.make_app(), access_log=None)
+            try:
+                self._loop.run_until_complete(self._runner.setup())
+                site = web.TCPSite(self._runner, self.host, self.port)
+                self._loop.run_until_complete(site.start())
+                self.port = self._runner.addresses[0][1]
+            except Exception as e:
+                errors.append(e)
+                self._loop.run_until_complete(self._runner.cleanup())
+                self._loop.close()
+                return
+            finally:
+                started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._runner.cleanup())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=serve)
+        self._thread.daemon = True
+        self._thread.start()
+        started.wait()
+        if errors:
+            self._thread.join()
+            self._thread = None
+            self._loop = None
+            self._runner = None
+            raise errors[0]
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+        self._thread = None
+        self._loop = None
+        self._runner = None
+
+    ####################################################################################################################
+    # Root
+    ####################################################################################################################
+
+    def get_root(self, request, data):
+        return OK, self.simulator.node_info()
+
+    ####################################################################################################################
+    # APIs
+    ####################################################################################################################
+
+    def list_apis(self, request, data):
+        return self._list(request, self.simulator.apis)
+
+    def create_api(self, request, data):
+        return CREATED, self.simulator.apis.create(**self._api_fields(data))
+
+    def create_or_update_api(self, request, data):
+        if data.get('id') is not None:
+            return OK, self._found(self.simulator.apis.create_or_update(api_id=data['id'], **self._api_fields(data)))
+        return CREATED, self.simulator.apis.create_or_update(**self._api_fields(data))
+
+    def retrieve_api(self, request, data):
+        return OK, self._found(self.simulator.apis.retrieve(request.match_info['name_or_id']))
+
+    def update_api(self, request, data):
+        fields = self._api_fields(data)
+        upstream_url = fields.pop('upstream_url', None) or self._get_api(request)['upstream_url']
+        return OK, self._found(self.simulator.apis.update(request.match_info['name_or_id'], upstream_url, **fields))
+
+    def delete_api(self, request, data):
+        self._get_api(request)
+        self.simulator.apis.delete(request.match_info['name_or_id'])
+        return NO_CONTENT, None
+
+    def list_plugin_configurations(self, request, data):
+        return self._list(request, self._get_plugin_admin(request))
+
+    def create_plugin_configuration(self, request, data):
+        return CREATED, self._get_plugin_admin(request).create(data.get('name'), **self._plugin_fields(data))
+
+    def create_or_update_plugin_configuration(self, request, data):
+        plugin_admin = self._get_plugin_admin(request)
+        if data.get('id') is not None:
+            return OK, plugin_admin.create_or_update(
+                data.get('name'), plugin_configuration_id=data['id'], **self._plugin_fields(data))
+        return CREATED, plugin_admin.create_or_update(data.get('name'), **self._plugin_fields(data))
+
+    def retrieve_plugin_configuration(self, request, data):
+        return OK, self._found(self._get_plugin_admin(request).retrieve(request.match_info['plugin_id']))
+
+    def update_plugin_configuration(self, request, data):
+        plugin_admin = self._get_plugin_admin(request)
+        plugin_configuration = self._found(plugin_admin.retrieve(request.match_info['plugin_id']))
+        return OK, plugin_admin.update(
+            plugin_configuration['id'], **self._plugin_fields(dict(data, name=plugin_configuration['name'])))
+
+    def delete_plugin_configuration(self, request, data):
+        plugin_admin = self._get_plugin_admin(request)
+        self._found(plugin_admin.retrieve(request.match_info['plugin_id']))
+        plugin_admin.delete(request.match_info['plugin_id'])
+        return NO_CONTENT, None
+
+    ####################################################################################################################
+    # Consumers
+    ####################################################################################################################
+
+    def list_consumers(self, request, data):
+        return self._list(request, self.simulator.consumers)
+
+    def create_consumer(self, request, data):
+        return CREATED, self.simulator.consumers.create(username=data.get('username'), custom_id=data.get('custom_id'))
+
+    def create_or_update_consumer(self, request, data):
+        if data.get('id') is not None:
+            return OK, self._found(self.simulator.consumers.create_or_update(
+                consumer_id=data['id'], username=data.get('username'), custom_id=data.get('custom_id')))
+        return CREATED, self.simulator.consumers.create_or_update(
+            username=data.get('username'), custom_id=data.get('custom_id'))
+
+    def retrieve_consumer(self, request, data):
+        return OK, self._found(self.simulator.consumers.retrieve(request.match_info['username_or_id']))
+
+    def update_consumer(self, request, data):
+        self._get_consumer(request)
+        return OK, self.simulator.consumers.update(request.match_info['username_or_id'], **data)
+
+    def delete_consumer(self, request, data):
+        self._get_consumer(request)
+        self.simulator.consumers.delete(request.match_info['username_or_id'])
+        return NO_CONTENT, None
+
+    def list_credentials(self, request, data):
+        return self._list(request, self._get_credential_admin(request))
+
+    def create_credential(self, request, data):
+        return CREATED, self._get_credential_admin(request).create(**data)
+
+    def create_or_update_credential(self, request, data):
+        credential_admin = self._get_credential_admin(request)
+        credential_id = data.pop('id', None)
+        if credential_id is not None:
+            return OK, self._found(credential_admin.update(credential_id, **data))
+        return CREATED, credential_admin.create(**data)
+
+    def retrieve_credential(self, request, data):
+        return OK, self._found(self._get_credential_admin(request).retrieve(request.match_info['credential_id']))
+
+    def update_credential(self, request, data):
+        return OK, self._found(self._get_credential_admin(request).update(request.match_info['credential_id'], **data))
+
+    def delete_credential(self, request, data):
+        credential_admin = self._get_credential_admin(request)
+        self._found(credential_admin.retrieve(request.match_info['credential_id']))
+        credential_admin.delete(request.match_info['credential_id'])
+        return NO_CONTENT, None
+
+    ####################################################################################################################
+    # Plugins
+    ####################################################################################################################
+
+    def list_plugins(self, request, data):
+        return OK, {'enabled_plugins': list(self.simulator.plugins.list()['enabled_plugins'])}
+
+    def retrieve_plugin_schema(self, request, data):
+        return OK, self._found(self.simulator.plugins.retrieve_schema(request.match_info['plugin_name']))
+
+    ####################################################################################################################
+    # Helpers
+    ####################################################################################################################
+
+    def _add_routes(self, app, path, resource, **handlers):
+        """
+        :param resource: The name of the resource, used to name the endpoints for the profile (see kong.faults)
+        :param handlers: Maps HTTP methods to (operation, handler) tuples, or just a handler for endpoints that are
+            not subject to the profile
+        """
+        # The clients always add a trailing slash, Kong accepts both
+        paths = [path] if path == '/' else [path, '%s/' % path]
+        for method, handler in handlers.items():
+            endpoint = None
+            if isinstance(handler, tuple):
+                operation, handler = handler
+                endpoint = '%s.%s' % (resource, operation)
+
+            for route_path in paths:
+                app.router.add_route(method.upper(), route_path, self._wrap(handler, endpoint))
+
+    def _wrap(self, handler, endpoint=None):
+        async def handle(request):
+            if self.profile is not None and endpoint is not None:
+                error = await self._inject_faults(request, endpoint)
+                if error is not None:
+                    return error
+
+            data = {}
+            if request.method in ('POST', 'PUT', 'PATCH'):
+                if request.content_type == 'application/json':
+                    data = await request.json()
+                else:
+                    data = dict((await request.post()).items())
+
+            try:
+                status, body = handler(request, data)
+            except NotFound:
+                status, body = NOT_FOUND, {'message': 'Not found'}
+            except ConflictError as e:
+                status, body = CONFLICT, {'message': str(e)}
+            except (ValueError, TypeError, AssertionError) as e:
+                status, body = BAD_REQUEST, {'message': str(e) or 'Bad request'}
+
+            if body is None:
+                return web.Response(status=status)
+            return web.json_response(body, status=status, dumps=json.dumps)
+        return handle
+
+    async def _inject_faults(self, request, endpoint):
+        """
+        Throttles and delays the request without blocking the event loop.
+
+        :return: The response of an injected error, if any
+        """
+        wait = self.profile.throttle_delay()
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = self.profile.throttle_delay()
+
+        fault = self.profile.decide(endpoint.format(credential=CREDENTIALS.get(request.match_info.get('credential'))))
+        if fault.delay:
+            await asyncio.sleep(fault.delay)
+
+        if fault.error == SERVER_ERROR:
+            return web.json_response({'message': 'An unexpected error occurred'}, status=INTERNAL_SERVER_ERROR)
+        elif fault.error == CONFLICT_ERROR:
+            return web.json_response({'message': 'Injected conflict'}, status=CONFLICT)
+        elif fault.error == DISCONNECT:
+            request.transport.close()
+            return web.Response(status=INTERNAL_SERVER_ERROR)
+
+    def _list(self, request, admin):
+        query = dict(request.query.items())
+        size = int(query.pop('size', DEFAULT_PAGE_SIZE))
+        offset = query.pop('offset', None)
+
+        result = admin.list(size=size, offset=offset, **query)
+
+        # The simulator doesn't know where it is served; point the next link at this server
+        next_offset = get_next_offset(result)
+        if next_offset is not None:
+            result['next'] = str(request.url.update_query(size=size, offset=next_offset))
+        if not query:
+            result['total'] = admin.count()
+        return OK, result
+
+    def _found(self, result):
+        if result is None:
+            raise NotFound()
+        return result
+
+    def _get_api(self, request):
+        return self._found(self.simulator.apis.retrieve(request.match_info['name_or_id']))
+
+    def _get_consumer(self, request):
+        return self._found(self.simulator.consumers.retrieve(request.match_info['username_or_id']))
+
+    def _get_plugin_admin(self, request):
+        return self.simulator.apis.plugins(self._get_api(request)['id'])
+
+    def _get_credential_admin(self, request):
+        consumer_id = self._get_consumer(request)['id']
+        return {
+            'basicauth': self.simulator.consumers.basic_auth,
+            'keyauth': self.simulator.consumers.key_auth,
+            'oauth2': self.simulator.consumers.oauth2,
+        }[request.match_info['credential']](consumer_id)
+
+    def _api_fields(self, data):
+        fields = dict((key, data[key]) for key in API_FIELDS if key in data)
+        for key in API_BOOLEAN_FIELDS:
+            if key in fields:
+                fields[key] = parse_bool(fields[key])
+        return fields
+
+    def _plugin_fields(self, data):
+        fields = get_plugin_fields(data)
+        if 'enabled' in data:
+            fields['enabled'] = parse_bool(data['enabled'])
+        if data.get('consumer_id') is not None:
+            fields['consumer_id'] = data['consumer_id']
+        return fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serves a KongAdminSimulator over HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='The interface to listen on')
+    parser.add_argument('--port', type=int, default=8001, help='The port to listen on')
+    parser.add_argument('--latency', type=float, default=0, help='The median latency of every request (in seconds)')
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help='The spread of the (log-normal) latency')
+    parser.add_argument('--server-error-rate', type=float, default=0, help='The fraction of requests failing with 500')
+    parser.add_argument('--conflict-rate', type=float, default=0, help='The fraction of writes failing with 409')
+    parser.add_argument('--disconnect-rate', type=float, default=0, help='The fraction of dropped connections')
+    parser.add_argument('--max-rate', type=float, help='The maximum amount of requests per second')
+    parser.add_argument('--seed', type=int, help='Seeds the random generator, for reproducible runs')
+    args = parser.parse_args()
+
+    profile = SimulatorProfile(
+        latency={'*': lognormal(args.latency, args.latency_sigma)} if args.latency else None,
+        error_rates={
+            SERVER_ERROR: args.server_error_rate,
+            CONFLICT_ERROR: args.conflict_rate,
+            DISCONNECT: args.disconnect_rate,
+        },
+        max_rate=args.max_rate, seed=args.seed)
+
+    SimulatorServer(host=args.host, port=args.port, profile=profile).run()
+
+
+if __name__ == '__main__':
+    main()
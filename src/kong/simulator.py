@@ -2,17 +2,24 @@
 from __future__ import unicode_literals, print_function
 
 import uuid
-import copy
 import hashlib
+import threading
+
+from six.moves import range
 
 from .contract import KongAdminContract, APIPluginConfigurationAdminContract, APIAdminContract, ConsumerAdminContract, \
     PluginAdminContract, BasicAuthAdminContract, KeyAuthAdminContract, OAuth2AdminContract
 from .utils import timestamp, uuid_or_string, add_url_params, assert_dict_keys_in, ensure_trailing_slash
 from .compat import OrderedDict
 from .exceptions import ConflictError
+from .faults import FaultInjectingAdmin
+from .validation import PluginConfigValidator
 
 INVALID_FIELD_ERROR_TEMPLATE = '%r is not a valid field. Allowed fields: %r'
 
+# Reported as the version of Kong by the simulator
+SIMULATOR_VERSION = 'simulator'
+
 
 def filter_api_struct(api_struct, filter_dict):
     """
@@ -30,7 +37,7 @@ def filter_dict_list(list_of_dicts, **field_filter):
     def _filter(_dicts, key, value):
         return [d for d in _dicts if d[key] == value]
 
-    list_of_dicts = copy.copy(list_of_dicts)
+    list_of_dicts = list(list_of_dicts)
     for key in field_filter:
         list_of_dicts = _filter(list_of_dicts, key, field_filter[key])
 
@@ -38,15 +45,36 @@ def filter_dict_list(list_of_dicts, **field_filter):
 
 
 class SimulatorDataStore(object):
-    def __init__(self, api_url, data_struct_filter=None):
+    def __init__(self, api_url, data_struct_filter=None, unique_keys=None):
+        """
+        :param api_url: The url of the collection, used to build `next` urls
+        :type api_url: six.text_type
+        :param data_struct_filter: Fields to leave out of responses while they hold the given (default) value
+        :type data_struct_filter: dict
+        :param unique_keys: The fields that identify a record besides its id (like 'name'). These are indexed, so
+            lookups and conflict checks on them don't have to scan every record.
+        :type unique_keys: collections.Iterable
+        """
         self.api_url = api_url
         self._data_struct_filter = data_struct_filter or {}
         self._data = OrderedDict()
+        self._indexes = dict((key, {}) for key in unique_keys or ())
+
+        # Insertion order of the ids (None for deleted records) and the position of every id in it, so list() can
+        #   jump straight to an offset
+        self._order = []
+        self._positions = {}
+
+        # Guards conflict checks and writes, so the store can be shared by threads (bulk operations)
+        self._lock = threading.RLock()
 
     def destroy(self):
         self.api_url = None
         self._data_struct_filter = None
         self._data = None
+        self._indexes = None
+        self._order = None
+        self._positions = None
 
     def count(self):
         return len(self._data.keys())
@@ -54,94 +82,124 @@ class SimulatorDataStore(object):
     def create(self, data_struct, check_conflict_keys=None):
         assert 'id' not in data_struct
 
-        # Prevent conflicts
-        if check_conflict_keys:
-            errors = []
-            for key in check_conflict_keys:
-                assert key in data_struct
-
-                existing_value = self._get_by_field(key, data_struct[key])
-                if existing_value is not None:
-                    errors.append('%s already exists with value \'%s\'' % (key, existing_value[key]))
-            if errors:
-                raise ConflictError(', '.join(errors))
+        with self._lock:
+            # Prevent conflicts (like Kong, multiple records can leave a unique field empty)
+            if check_conflict_keys:
+                errors = []
+                for key in check_conflict_keys:
+                    assert key in data_struct
 
-        id = str(uuid.uuid4())
-        data_struct['id'] = id
+                    if data_struct[key] is None:
+                        continue
 
-        self._data[id] = data_struct
-        return filter_api_struct(data_struct, self._data_struct_filter)
+                    existing_value = self._get_by_field(key, data_struct[key])
+                    if existing_value is not None:
+                        errors.append('%s already exists with value \'%s\'' % (key, existing_value[key]))
+                if errors:
+                    raise ConflictError(', '.join(errors))
 
-    def update(self, value_or_id, key, data_struct_update):
-        value_or_id = uuid_or_string(value_or_id)
+            id = str(uuid.uuid4())
+            data_struct['id'] = id
 
-        if value_or_id in self._data:
-            self._data[value_or_id].update(data_struct_update)
-            return filter_api_struct(self._data[value_or_id], self._data_struct_filter)
+            self._data[id] = data_struct
+            self._positions[id] = len(self._order)
+            self._order.append(id)
+            self._index(data_struct)
+            return filter_api_struct(data_struct, self._data_struct_filter)
 
-        if key is not None:
-            for id in self._data:
-                if self._data[id][key] == value_or_id:
-                    self._data[id].update(data_struct_update)
-                    return filter_api_struct(self._data[id], self._data_struct_filter)
+    def update(self, value_or_id, key, data_struct_update):
+        with self._lock:
+            data_struct = self._find(value_or_id, key)
+            if data_struct is not None:
+                self._unindex(data_struct)
+                data_struct.update(data_struct_update)
+                self._index(data_struct)
+                return filter_api_struct(data_struct, self._data_struct_filter)
 
     def retrieve(self, value_or_id, key):
-        value_or_id = uuid_or_string(value_or_id)
-
-        if value_or_id in self._data:
-            return filter_api_struct(self._data[value_or_id], self._data_struct_filter)
-
-        if key is not None:
-            for id in self._data:
-                if self._data[id][key] == value_or_id:
-                    return filter_api_struct(self._data[id], self._data_struct_filter)
+        data_struct = self._find(value_or_id, key)
+        if data_struct is not None:
+            return filter_api_struct(data_struct, self._data_struct_filter)
 
     def list(self, size, offset, **filter_fields):
-        data_list = [filter_api_struct(data_struct, self._data_struct_filter)
-                     for data_struct in filter_dict_list(self._data.values(), **filter_fields)]
-
-        offset_index = 0
-        if offset is not None:
-            keys = list([item['id'] for item in self._data.values()])
-            offset_index = keys.index(uuid_or_string(offset))
-
-        sliced_data = data_list[offset_index:offset_index + size]
-
-        next_url = None
-        next_index = offset_index + size
-        if next_index < len(data_list):
-            next_offset = data_list[next_index]['id']
-            next_url = add_url_params(self.api_url, {
-                'size': size,
-                'offset': next_offset
-            })
+        with self._lock:
+            position = 0
+            if offset is not None:
+                offset = uuid_or_string(offset)
+                if offset not in self._positions:
+                    raise ValueError('Unknown offset: %s' % offset)
+                position = self._positions[offset]
+
+            # Walk from the offset, only collecting the requested records (plus one to find the next offset)
+            data_structs = []
+            for index in range(position, len(self._order)):
+                id = self._order[index]
+                if id is None:
+                    continue
+                data_struct = self._data[id]
+                if all(data_struct[key] == value for key, value in filter_fields.items()):
+                    data_structs.append(data_struct)
+                    if len(data_structs) > size:
+                        break
 
         result = {
             # 'total': len(sliced_data),  # Appearantly, the real API doesn't return this value either...
-            'data': sliced_data,
+            'data': [filter_api_struct(data_struct, self._data_struct_filter) for data_struct in data_structs[:size]],
         }
 
-        if next_url:
-            result['next'] = next_url
+        if len(data_structs) > size:
+            result['next'] = add_url_params(self.api_url, {
+                'size': size,
+                'offset': data_structs[size]['id']
+            })
 
         return result
 
     def delete(self, value_or_id, key):
+        with self._lock:
+            data_struct = self._find(value_or_id, key)
+            if data_struct is not None:
+                self._unindex(data_struct)
+                del self._data[data_struct['id']]
+                self._order[self._positions.pop(data_struct['id'])] = None
+
+                # Compact the order once most of it consists of deleted records
+                if len(self._order) > 2 * len(self._positions) + 64:
+                    self._order = [id for id in self._order if id is not None]
+                    self._positions = dict((id, position) for position, id in enumerate(self._order))
+
+    def _find(self, value_or_id, key):
         value_or_id = uuid_or_string(value_or_id)
 
-        if value_or_id in self._data:
-            del self._data[value_or_id]
-
-        if key is not None:
-            for id in self._data:
-                if self._data[id][key] == value_or_id:
-                    del self._data[id]
-                    break
+        data_struct = self._data.get(value_or_id)
+        if data_struct is None and key is not None:
+            data_struct = self._get_by_field(key, value_or_id)
+        return data_struct
 
     def _get_by_field(self, field, value):
-        for data_struct in self._data.values():
-            if data_struct[field] == value:
-                return data_struct
+        index = self._indexes.get(field)
+        if index is None:
+            for data_struct in self._data.values():
+                if data_struct[field] == value:
+                    return data_struct
+            return None
+
+        id = index.get(value)
+        if id is not None:
+            return self._data[id]
+
+    def _index(self, data_struct):
+        for key, index in self._indexes.items():
+            value = data_struct.get(key)
+            if value is not None:
+                # Like the linear scan it replaces, the oldest record wins if an update introduced a duplicate
+                index.setdefault(value, data_struct['id'])
+
+    def _unindex(self, data_struct):
+        for key, index in self._indexes.items():
+            value = data_struct.get(key)
+            if value is not None and index.get(value) == data_struct['id']:
+                del index[value]
 
 
 class APIPluginConfigurationAdminSimulator(APIPluginConfigurationAdminContract):
@@ -158,23 +216,13 @@ class APIPluginConfigurationAdminSimulator(APIPluginConfigurationAdminContract):
         self._data = None
 
     def create(self, plugin_name, enabled=None, consumer_id=None, **fields):
-        plugins = PluginAdminSimulator.PLUGINS
-
-        if plugin_name not in plugins.keys():
-            raise ValueError('Unknown plugin_name: %s' % plugin_name)
+        validator = PLUGIN_CONFIG_VALIDATOR
+        validator.get_validator(plugin_name)
 
         if plugin_name in self._data:
             raise ConflictError('Plugin configuration already exists')
 
-        known_fields = plugins[plugin_name].get('fields')
-
-        for key in fields:
-            if key not in known_fields:
-                raise ValueError('Unknown value field: %s' % key)
-
-        for key in known_fields:
-            if known_fields[key].get('required', False) and key not in fields:
-                raise ValueError('Missing required value field: %s' % key)
+        validator.validate(plugin_name, fields)
 
         id = str(uuid.uuid4())
         api_data = self.api_admin.retrieve(self.api_name_or_id)
@@ -212,12 +260,7 @@ class APIPluginConfigurationAdminSimulator(APIPluginConfigurationAdminContract):
         if current_plugin_name is None or current_plugin_id is None:
             raise ValueError('Unknown plugin_id: %s' % plugin_id)
 
-        if current_plugin_name not in PluginAdminSimulator.PLUGINS.keys():
-            raise ValueError('Unknown plugin_name: %s' % current_plugin_name)
-
-        for key in fields:
-            if key not in PluginAdminSimulator.PLUGINS[current_plugin_name]['fields']:
-                raise ValueError('Unknown value field "%s" for plugin: %s' % (key, current_plugin_name))
+        PLUGIN_CONFIG_VALIDATOR.validate(current_plugin_name, fields, partial=True)
 
         data_struct_update = {
             'config': fields
@@ -294,7 +337,8 @@ class APIAdminSimulator(APIAdminContract):
             data_struct_filter={
                 'request_host': None,
                 'request_path': None
-            })
+            },
+            unique_keys=('name', 'request_host'))
         self._plugin_admins = {}
 
     def destroy(self):
@@ -392,7 +436,8 @@ class BasicAuthAdminSimulator(BasicAuthAdminContract):
     def __init__(self, consumer_admin, consumer_id, api_url):
         self.consumer_admin = consumer_admin
         self.consumer_id = consumer_id
-        self._store = SimulatorDataStore(api_url or 'http://localhost:8001/consumers/%s/basicauth' % self.consumer_id)
+        self._store = SimulatorDataStore(
+            api_url or 'http://localhost:8001/consumers/%s/basicauth' % self.consumer_id, unique_keys=('username',))
 
     def destroy(self):
         self.consumer_admin = None
@@ -441,7 +486,8 @@ class KeyAuthAdminSimulator(KeyAuthAdminContract):
     def __init__(self, consumer_admin, consumer_id, api_url):
         self.consumer_admin = consumer_admin
         self.consumer_id = consumer_id
-        self._store = SimulatorDataStore(api_url or 'http://localhost:8001/consumers/%s/keyauth' % self.consumer_id)
+        self._store = SimulatorDataStore(
+            api_url or 'http://localhost:8001/consumers/%s/keyauth' % self.consumer_id, unique_keys=('key',))
 
     def destroy(self):
         self.consumer_admin = None
@@ -493,7 +539,9 @@ class OAuth2AdminSimulator(OAuth2AdminContract):
     def __init__(self, consumer_admin, consumer_id, api_url):
         self.consumer_admin = consumer_admin
         self.consumer_id = consumer_id
-        self._store = SimulatorDataStore(api_url or 'http://localhost:8001/consumers/%s/oauth2' % self.consumer_id)
+        self._store = SimulatorDataStore(
+            api_url or 'http://localhost:8001/consumers/%s/oauth2' % self.consumer_id,
+            unique_keys=('name', 'redirect_uri'))
 
     def destroy(self):
         self.consumer_admin = None
@@ -547,7 +595,8 @@ class ConsumerAdminSimulator(ConsumerAdminContract):
             data_struct_filter={
                 'custom_id': None,
                 'username': None
-            })
+            },
+            unique_keys=('username', 'custom_id'))
         self._basic_auth_admins = {}
         self._key_auth_admins = {}
         self._oauth2_admins = {}
@@ -715,12 +764,34 @@ class PluginAdminSimulator(PluginAdminContract):
         return self.PLUGINS.get(plugin_name)
 
 
+# Checks the plugin configurations of all simulators, like the client does with validate_plugins=True
+PLUGIN_CONFIG_VALIDATOR = PluginConfigValidator(PluginAdminSimulator())
+
+
 class KongAdminSimulator(KongAdminContract):
-    def __init__(self, api_url=None):
-        super(KongAdminSimulator, self).__init__(
-            apis=APIAdminSimulator(api_url=api_url),
-            consumers=ConsumerAdminSimulator(api_url=api_url),
-            plugins=PluginAdminSimulator())
+    def __init__(self, api_url=None, profile=None):
+        """
+        :param api_url: The url of the simulated admin endpoint
+        :type api_url: six.text_type
+        :param profile: Injects latency, errors and throughput limits into every call
+        :type profile: kong.faults.SimulatorProfile
+        """
+        apis = APIAdminSimulator(api_url=api_url)
+        consumers = ConsumerAdminSimulator(api_url=api_url)
+        plugins = PluginAdminSimulator()
+
+        if profile is not None:
+            apis = FaultInjectingAdmin(apis, profile, 'apis')
+            consumers = FaultInjectingAdmin(consumers, profile, 'consumers')
+            plugins = FaultInjectingAdmin(plugins, profile, 'plugins')
+
+        super(KongAdminSimulator, self).__init__(apis=apis, consumers=consumers, plugins=plugins)
+
+    def node_info(self):
+        return {
+            'tagline': 'Welcome to Kong',
+            'version': SIMULATOR_VERSION,
+        }
 
     def close(self):
         self.apis.destroy()
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Backup and restore of the full admin state as NDJSON (one JSON document per line), streamed in both directions so
+  memory use doesn't grow with the amount of entities:
+
+    with io.open('kong.ndjson', 'w', encoding='utf-8') as f:
+        export_snapshot(client, f)
+
+    with io.open('kong.ndjson', encoding='utf-8') as f:
+        result = import_snapshot(other_client, f, concurrency=20)
+    assert not result.errors
+
+The first line is a header, then every consumer is followed by its credentials and every API by its plugin
+  configurations:
+
+    {"kind": "snapshot", "version": 1}
+    {"kind": "consumers", "data": {"id": "...", "username": "bob", ...}}
+    {"kind": "key_auth", "parent": "<consumer id>", "data": {"id": "...", "key": "...", ...}}
+    {"kind": "apis", "data": {"id": "...", "name": "mockbin", ...}}
+    {"kind": "plugins", "parent": "<api id>", "consumer": "bob", "data": {"id": "...", "name": "cors", ...}}
+
+Ids are not kept when importing, as the admin API assigns them. Plugin configurations for a specific consumer are
+  linked to the consumer created for the same consumer id, which is why consumers are exported (and imported) before
+  APIs. When that consumer was not created by the import (like when it already existed), it is looked up by its username
+  (`consumer`) or, if it has none, its custom_id (`consumer_custom_id`). A plugin configuration of which the consumer
+  can't be found is reported as an error, rather than created for all consumers. Basic auth passwords are exported as
+  returned by the admin API, which may be hashed.
+"""
+from __future__ import unicode_literals, print_function
+import itertools
+import json
+from collections import namedtuple
+
+import six
+
+from .bulk import bulk_apply, bind_timeouts, DEFAULT_BULK_CONCURRENCY
+from .records import to_dict
+from .sync import Change, CHILD_KINDS, PARENT_KINDS, CONSUMERS, APIS, PLUGINS, CREATE, get_admin, get_keys, \
+    apply_change, DEFAULT_PAGE_SIZE
+
+SNAPSHOT_VERSION = 1
+
+# The order in which the top-level kinds are exported and imported
+EXPORT_ORDER = (CONSUMERS, APIS)
+
+# The fields of the records that are passed to `create` when importing
+CREATE_FIELDS = {
+    'apis': ('name', 'upstream_url', 'request_host', 'request_path', 'strip_request_path', 'preserve_host'),
+    'plugins': ('name', 'enabled', 'config'),
+    'consumers': ('username', 'custom_id'),
+    'basic_auth': ('username', 'password'),
+    'key_auth': ('key',),
+    'oauth2': ('name', 'redirect_uri', 'client_id', 'client_secret'),
+}
+
+
+class ImportResult(namedtuple('ImportResult', ['counts', 'errors'])):
+    """
+    :ivar counts: Maps kinds to the amount of entities created
+    :ivar errors: (line, exception) tuples for the entities that could not be created
+    """
+    __slots__ = ()
+
+
+def export_snapshot(client, fileobj, concurrency=DEFAULT_BULK_CONCURRENCY, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Writes every consumer (with its credentials) and every API (with its plugin configurations) to the file. The
+      entities belonging to `concurrency` consumers or APIs are fetched at a time.
+
+    :param client: The admin to export
+    :type client: kong.contract.KongAdminContract
+    :param fileobj: A file-like object opened for writing text
+    :param concurrency: The maximum amount of requests in flight
+    :type concurrency: int
+    :param page_size: The amount of records to request per page
+    :type page_size: int
+    :rtype: dict
+    :return: Maps kinds to the amount of entities written
+    """
+    counts = dict((kind, 0) for kind in CREATE_FIELDS)
+    consumer_keys = {}
+
+    def get_consumer_keys(consumer_id):
+        if consumer_id not in consumer_keys:
+            consumer = client.consumers.retrieve(consumer_id)
+            consumer_keys[consumer_id] = dict(
+                (key, consumer[field]) for key, field in (('consumer', 'username'), ('consumer_custom_id', 'custom_id'))
+                if consumer.get(field) is not None)
+        return consumer_keys[consumer_id]
+
+    def fetch_lines(kind, record):
+        # Records (of a client with records=True) are written as the dicts returned by the admin API
+        lines = [{'kind': kind, 'data': to_dict(record)}]
+        for child_kind in CHILD_KINDS[kind]:
+            for child in get_admin(client, child_kind, record['id']).iterate(window_size=page_size):
+                line = {'kind': child_kind, 'parent': record['id'], 'data': to_dict(child)}
+                if child.get('consumer_id'):
+                    line.update(get_consumer_keys(child['consumer_id']))
+                lines.append(line)
+        return lines
+
+    write_line(fileobj, {'kind': 'snapshot', 'version': SNAPSHOT_VERSION})
+    for kind in EXPORT_ORDER:
+        specs = ({'kind': kind, 'record': record} for record in get_admin(client, kind).iterate(window_size=page_size))
+        for outcome in bulk_apply(bind_timeouts(client, fetch_lines), specs, concurrency=concurrency):
+            if not outcome.succeeded:
+                raise outcome.error
+            for line in outcome.result:
+                write_line(fileobj, line)
+                counts[line['kind']] += 1
+    return counts
+
+
+def write_line(fileobj, line):
+    fileobj.write(six.text_type(json.dumps(line, sort_keys=True)))
+    fileobj.write('\n')
+
+
+def read_groups(fileobj):
+    """
+    :rtype: collections.Iterator[list]
+    :return: Iterator yielding the lines of every consumer or API followed by its credentials or plugins
+    """
+    lines = (json.loads(line) for line in fileobj if line.strip())
+
+    header = next(lines, None)
+    if header is None or header.get('kind') != 'snapshot':
+        raise ValueError('Not a snapshot: the first line should be the header')
+    if header.get('version') != SNAPSHOT_VERSION:
+        raise ValueError('Unsupported snapshot version: %s' % header.get('version'))
+
+    group = []
+    for line in lines:
+        if line['kind'] in CHILD_KINDS:
+            if group:
+                yield group
+            group = [line]
+        elif line['kind'] in PARENT_KINDS:
+            if not group or line.get('parent') != group[0]['data']['id']:
+                raise ValueError('%s %s is not preceded by its %s' % (
+                    line['kind'], line['data'].get('id'), PARENT_KINDS[line['kind']]))
+            group.append(line)
+        else:
+            raise ValueError('Unknown kind: %s' % line['kind'])
+    if group:
+        yield group
+
+
+def import_snapshot(client, fileobj, concurrency=DEFAULT_BULK_CONCURRENCY):
+    """
+    Creates the entities of a snapshot, as written by export_snapshot, keeping up to `concurrency` consumers or APIs
+      (each with its credentials or plugins) in flight. All consumers are created before the first API. When a
+      consumer or API can't be created (like when it already exists), the entities belonging to it are skipped.
+
+    :param client: The admin to import into
+    :type client: kong.contract.KongAdminContract
+    :param fileobj: A file-like object opened for reading text, or any iterable of lines
+    :param concurrency: The maximum amount of requests in flight
+    :type concurrency: int
+    :rtype: ImportResult
+    """
+    counts = dict((kind, 0) for kind in CREATE_FIELDS)
+    errors = []
+    consumer_ids = {}  # id in the snapshot -> id of the consumer created for it
+
+    def get_consumer_id(line):
+        consumer_id = consumer_ids.get(line['data'].get('consumer_id'))
+        if consumer_id is not None:
+            return consumer_id
+        if line.get('consumer') is not None:
+            return client.consumers.retrieve(line['consumer'])['id']
+        if line.get('consumer_custom_id') is not None:
+            consumers = client.consumers.list(custom_id=line['consumer_custom_id'])['data']
+            if consumers:
+                return consumers[0]['id']
+        raise ValueError('Consumer %s of %s %s not found' % (
+            line['data'].get('consumer_id'), line['kind'], line['data'].get('id')))
+
+    def create(line, parent_id=None):
+        data = line['data']
+        fields = dict((field, data[field]) for field in CREATE_FIELDS[line['kind']] if data.get(field) is not None)
+        if line['kind'] == PLUGINS and data.get('consumer_id'):
+            fields['consumer_id'] = get_consumer_id(line)
+        change = Change(CREATE, line['kind'], get_keys(line['kind'], data)[0], line.get('parent'), fields, None, None)
+        return apply_change(client, change, parent_id)
+
+    def import_group(group):
+        created = []
+        try:
+            parent = create(group[0])
+        except Exception as e:
+            return created, [(line, e) for line in group]
+
+        if group[0]['kind'] == CONSUMERS:
+            consumer_ids[group[0]['data']['id']] = parent['id']
+        created.append(group[0]['kind'])
+        group_errors = []
+        for line in group[1:]:
+            try:
+                create(line, parent['id'])
+                created.append(line['kind'])
+            except Exception as e:
+                group_errors.append((line, e))
+        return created, group_errors
+
+    groups = read_groups(fileobj)
+    import_group = bind_timeouts(client, import_group)
+    for kind, kind_groups in itertools.groupby(groups, key=lambda group: group[0]['kind']):
+        for outcome in bulk_apply(import_group, ({'group': group} for group in kind_groups), concurrency=concurrency):
+            created, group_errors = outcome.result
+            for created_kind in created:
+                counts[created_kind] += 1
+            errors.extend(group_errors)
+    return ImportResult(counts, errors)
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental parsing of the pages returned by `list` calls, so the items of a large page can be processed while it is
+  still being received, and only one item (rather than the whole page) is decoded in memory at a time:
+
+    for consumer in client.consumers.iterate(window_size=1000, stream=True):
+        ...
+
+    page = client.consumers.list(size=1000, stream=True)
+    for consumer in page['data']:
+        ...
+    page['next']  # Available once all items have been read
+
+A page is a JSON object like {"data": [...], "next": "...", "total": 1000}. The items of the `data` array are cut out of
+  the body as it arrives and decoded one by one with the client's codec, so besides the item being yielded only the
+  items completed by the last chunk read (DEFAULT_CHUNK_SIZE bytes) are held. The other fields are decoded as they
+  come along; as Kong doesn't order the fields of a page, `next` is only guaranteed to be known after the last item.
+"""
+from __future__ import unicode_literals, print_function
+import collections
+import re
+
+from .codec import get_codec
+
+# The amount of bytes read from a response at a time
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# The field of a page holding the items
+DATA_FIELD = 'data'
+
+WHITESPACE = re.compile(br'[ \t\r\n]*')
+
+# A complete string, or the start of an unterminated one (a lone quote)
+STRING = re.compile(br'"[^"\\]*(?:\\.[^"\\]*)*"|"', re.DOTALL)
+
+# The tokens that matter when looking for the end of an object or array: strings (so brackets inside them are skipped)
+#   and brackets
+STRUCTURE = re.compile(br'"[^"\\]*(?:\\.[^"\\]*)*"|"|[\[\]{}]', re.DOTALL)
+
+# An object or array without nested objects or arrays (like most items), matched in one go. Written as runs of other
+#   characters between strings, so a failing match doesn't backtrack more than linearly.
+FLAT_VALUE = re.compile(br'[\[{][^"\[\]{}]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"\[\]{}]*)*[\]}]', re.DOTALL)
+
+# A flat item of the data array, with the whitespace and comma around it
+FLAT_ITEM = re.compile(br'[ \t\r\n,]*(' + FLAT_VALUE.pattern + br')', re.DOTALL)
+
+# The end of a number, true, false or null
+SCALAR_END = re.compile(br'[,\]} \t\r\n]')
+
+# Parser states
+EXPECT_OBJECT, EXPECT_KEY, EXPECT_COLON, EXPECT_VALUE, IN_DATA, DONE = range(6)
+
+
+def find_value_end(buffer, position):
+    """
+    :param buffer: The (partial) body
+    :type buffer: bytes
+    :param position: The position where a JSON value starts
+    :type position: int
+    :rtype: int
+    :return: The position just after the value, or None if the value is not complete yet
+    """
+    first = buffer[position:position + 1]
+    if first == b'"':
+        match = STRING.match(buffer, position)
+        return match.end() if match.end() - position > 1 else None
+
+    if first in (b'{', b'['):
+        match = FLAT_VALUE.match(buffer, position)
+        if match is not None:
+            return match.end()
+
+        depth = 0
+        for match in STRUCTURE.finditer(buffer, position):
+            token = match.group()
+            if token == b'"':
+                return None
+            if token in (b'{', b'['):
+                depth += 1
+            elif token in (b'}', b']'):
+                depth -= 1
+                if depth == 0:
+                    return match.end()
+        return None
+
+    match = SCALAR_END.search(buffer, position)
+    return None if match is None else match.start()
+
+
+class PageParser(object):
+    """
+    Push parser for a page: feed it the body in chunks of any size, and it returns the items that were completed.
+    """
+
+    def __init__(self, codec=None):
+        """
+        :param codec: The codec to decode the items and fields with
+        :type codec: kong.codec.JSONCodec
+        """
+        self.codec = get_codec(codec)
+        self.fields = {}
+        self._buffer = b''
+        self._state = EXPECT_OBJECT
+        self._key = None
+
+    @property
+    def done(self):
+        return self._state == DONE
+
+    def feed(self, chunk):
+        """
+        :param chunk: The next part of the body
+        :type chunk: bytes
+        :rtype: list
+        :return: The items completed by the chunk
+        """
+        buffer = self._buffer + chunk if self._buffer else chunk
+        items = []
+        position = self._parse(buffer, items)
+        # Only the start of the item (or field) that isn't complete yet is kept
+        self._buffer = buffer[position:]
+        return items
+
+    def close(self):
+        """
+        :raises ValueError: If the body ended before the page was complete
+        """
+        if self._state != DONE or self._buffer.strip():
+            raise ValueError('Incomplete or invalid page: %r' % self._buffer[:100])
+
+    def _parse(self, buffer, items):
+        position = 0
+        size = len(buffer)
+        while True:
+            position = WHITESPACE.match(buffer, position).end()
+            if position >= size:
+                return position
+            char = buffer[position:position + 1]
+
+            if self._state == EXPECT_OBJECT:
+                self._expect(char, b'{', buffer, position)
+                self._state = EXPECT_KEY
+                position += 1
+
+            elif self._state == EXPECT_KEY:
+                if char == b',':
+                    position += 1
+                elif char == b'}':
+                    self._state = DONE
+                    position += 1
+                else:
+                    self._expect(char, b'"', buffer, position)
+                    end = find_value_end(buffer, position)
+                    if end is None:
+                        return position
+                    self._key = self.codec.loads(buffer[position:end])
+                    self._state = EXPECT_COLON
+                    position = end
+
+            elif self._state == EXPECT_COLON:
+                self._expect(char, b':', buffer, position)
+                self._state = EXPECT_VALUE
+                position += 1
+
+            elif self._state == EXPECT_VALUE:
+                if self._key == DATA_FIELD and char == b'[':
+                    self._state = IN_DATA
+                    position += 1
+                else:
+                    end = find_value_end(buffer, position)
+                    if end is None:
+                        return position
+                    self.fields[self._key] = self.codec.loads(buffer[position:end])
+                    self._state = EXPECT_KEY
+                    position = end
+
+            elif self._state == IN_DATA:
+                # Fast path for consecutive flat items, saving a round through the loop per item
+                match = FLAT_ITEM.match(buffer, position)
+                if match is not None:
+                    while match is not None:
+                        items.append(self.codec.loads(match.group(1)))
+                        position = match.end()
+                        match = FLAT_ITEM.match(buffer, position)
+                    continue
+
+                if char == b',':
+                    position += 1
+                elif char == b']':
+                    self._state = EXPECT_KEY
+                    position += 1
+                else:
+                    end = find_value_end(buffer, position)
+                    if end is None:
+                        return position
+                    items.append(self.codec.loads(buffer[position:end]))
+                    position = end
+
+            else:
+                raise ValueError('Unexpected data after the page: %r' % buffer[position:position + 100])
+
+    def _expect(self, char, expected, buffer, position):
+        if char != expected:
+            raise ValueError('Expected %r at %r' % (expected, buffer[position:position + 100]))
+
+
+class StreamedPage(object):
+    """
+    The result of `list(..., stream=True)`, in place of the page dict: `page['data']` is an iterator over the items as
+      they are received, and the other fields (`page['next']`, `page.get('total')`) become available while reading it.
+      Asking for a field that has not been received yet reads the rest of the page, keeping the items that weren't
+      consumed for `page['data']`.
+    """
+
+    def __init__(self, response, codec=None, convert=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        :param response: A response to a `list` request, sent with stream=True
+        :type response: requests.Response
+        :param codec: The codec to decode the items and fields with
+        :type codec: kong.codec.JSONCodec
+        :param convert: Function called with every decoded item, returning the item to yield
+        :type convert: callable
+        :param chunk_size: The amount of bytes to read at a time
+        :type chunk_size: int
+        """
+        self.response = response
+        self.convert = convert
+        self.chunk_size = chunk_size
+        self._parser = PageParser(codec)
+        self._chunks = None
+        self._pending = collections.deque()
+        self._exhausted = False
+
+    def __repr__(self):
+        return '<StreamedPage: %s>' % self.response.url
+
+    def __getitem__(self, key):
+        if key == DATA_FIELD:
+            return self.iterate()
+        while key not in self._parser.fields and not self._exhausted:
+            self._pending.extend(self._read())
+        return self._parser.fields[key]
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def iterate(self):
+        """
+        :rtype: collections.Iterator
+        :return: Iterator yielding the items of the page
+        """
+        try:
+            while True:
+                while self._pending:
+                    yield self._pending.popleft()
+                if self._exhausted:
+                    return
+                self._pending.extend(self._read())
+        finally:
+            # Also when the caller stops early, so the connection isn't held on to
+            self.close()
+
+    def close(self):
+        """
+        Releases the connection, which is also done once the page has been read completely.
+        """
+        self.response.close()
+
+    def _read(self):
+        if self._chunks is None:
+            self._chunks = self.response.iter_content(chunk_size=self.chunk_size)
+
+        return self._feed(next(self._chunks, None))
+
+    def _feed(self, chunk):
+        """
+        :param chunk: The next part of the body, or None if it has been read completely
+        :type chunk: bytes
+        :rtype: list
+        :return: The (converted) items completed by the chunk
+        """
+        if chunk is None:
+            self._exhausted = True
+            self._parser.close()
+            self.close()
+            return []
+
+        items = self._parser.feed(chunk)
+        if self.convert is not None:
+            items = [self.convert(item) for item in items]
+        return items
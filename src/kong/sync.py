@@ -0,0 +1,468 @@
+# -*- coding: utf-8 -*-
+"""
+Declarative configuration: brings a Kong admin (a KongAdminClient or KongAdminSimulator) in line with a desired state,
+  sending only the requests needed to get there:
+
+    desired = load_state('kong.yaml')
+    plan = sync(client, desired, dry_run=True)
+    print('\\n'.join(plan.report()))
+
+    result = sync(client, desired, concurrency=20)
+    assert result.succeeded, result.errors
+
+The desired state lists APIs with their plugin configurations, and consumers with their credentials:
+
+    apis:
+      - name: mockbin
+        upstream_url: https://mockbin.com/
+        request_host: mockbin.com
+        plugins:
+          - name: rate-limiting
+            config: {minute: 20}
+    consumers:
+      - username: bob
+        custom_id: "1234"
+        basic_auth: [{username: bob, password: secret}]
+        key_auth: [{key: 0a1b2c3d}]
+        oauth2: [{name: app, redirect_uri: "https://example.com/"}]
+
+Entities are matched by key: APIs by name, plugins by name (and consumer_id, as 'name:consumer_id'), consumers by
+  username (or custom_id), basic auth credentials by username, key auth credentials by key and OAuth2 applications by
+  name. Only the fields in the desired state are compared, so defaults filled in by Kong don't cause updates.
+  Passwords can't be compared (Kong stores them hashed), so basic auth credentials are never updated.
+
+Changes are applied in dependency order, each phase with bounded concurrency: deletes of plugins and credentials,
+  deletes of APIs and consumers, creates and updates of APIs and consumers, and finally creates and updates of plugins
+  and credentials. Deleting an API or consumer deletes its plugins or credentials along with it.
+"""
+from __future__ import unicode_literals, print_function
+import io
+import json
+from collections import namedtuple
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover
+    yaml = None
+
+from .bulk import bulk_apply, bind_timeouts, DEFAULT_BULK_CONCURRENCY
+from .utils import ensure_trailing_slash
+from .compat import OrderedDict
+
+# Kinds of entities
+APIS = 'apis'
+PLUGINS = 'plugins'
+CONSUMERS = 'consumers'
+BASIC_AUTH = 'basic_auth'
+KEY_AUTH = 'key_auth'
+OAUTH2 = 'oauth2'
+
+# Maps top-level kinds to the kinds of the entities that belong to them
+CHILD_KINDS = OrderedDict([
+    (APIS, (PLUGINS,)),
+    (CONSUMERS, (BASIC_AUTH, KEY_AUTH, OAUTH2)),
+])
+
+# Maps the kinds of plugins and credentials to the kind of entity they belong to
+PARENT_KINDS = dict((child_kind, kind) for kind, child_kinds in CHILD_KINDS.items() for child_kind in child_kinds)
+
+# Actions
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+
+# Fields that are never compared, as the admin API doesn't return them as sent
+UNCOMPARABLE_FIELDS = {
+    BASIC_AUTH: ('password',),
+}
+
+# Amount of records to request per page when fetching the current state
+DEFAULT_PAGE_SIZE = 100
+
+
+def get_keys(kind, record):
+    """
+    :param kind: The kind of the entity, like APIS or KEY_AUTH
+    :type kind: six.text_type
+    :param record: The desired state of the entity, or the current one as returned by the admin API
+    :type record: dict
+    :rtype: list
+    :return: The keys identifying the entity. The desired state is matched on the first key, current records are
+        found by any of them.
+    """
+    if kind == APIS:
+        keys = [record.get('name')]
+    elif kind == PLUGINS:
+        name, consumer_id = record.get('name'), record.get('consumer_id')
+        keys = [name if consumer_id is None else '%s:%s' % (name, consumer_id)]
+    elif kind == CONSUMERS:
+        keys = [record.get('username'), 'custom_id=%s' % record['custom_id'] if record.get('custom_id') else None]
+    elif kind == BASIC_AUTH:
+        keys = [record.get('username')]
+    elif kind == KEY_AUTH:
+        keys = [record.get('key')]
+    elif kind == OAUTH2:
+        keys = [record.get('name')]
+    else:
+        raise ValueError('Unknown kind: %s' % kind)
+    return [key for key in keys if key is not None]
+
+
+def get_admin(client, kind, parent_id=None):
+    """
+    :return: The admin managing the entities of the given kind (belonging to the given parent)
+    """
+    if kind in (APIS, CONSUMERS):
+        return getattr(client, kind)
+    elif kind == PLUGINS:
+        return client.apis.plugins(parent_id)
+    return getattr(client.consumers, kind)(parent_id)
+
+
+def normalize(field, value):
+    if field == 'upstream_url' and value:
+        return ensure_trailing_slash(value)
+    return value
+
+
+def get_differences(desired, current, path=''):
+    """
+    :param desired: The desired fields
+    :type desired: dict
+    :param current: The current fields
+    :type current: dict
+    :rtype: list
+    :return: (field, current value, desired value) tuples for every desired field that differs. Nested dictionaries
+        (like plugin configurations) are compared field by field.
+    """
+    differences = []
+    for field, value in desired.items():
+        current_value = current.get(field)
+        if isinstance(value, dict) and isinstance(current_value, dict):
+            differences.extend(get_differences(value, current_value, '%s%s.' % (path, field)))
+        elif normalize(field, value) != normalize(field, current_value):
+            differences.append(('%s%s' % (path, field), current_value, value))
+    return differences
+
+
+def load_state(path_or_file):
+    """
+    Loads a desired state from a JSON or YAML file. YAML requires PyYAML:
+
+        $ pip install pyyaml
+
+    :param path_or_file: The path of the file (YAML if it ends with .yaml or .yml) or a file-like object
+    :rtype: dict
+    """
+    if hasattr(path_or_file, 'read'):
+        content = path_or_file.read()
+        is_yaml = yaml is not None and not content.lstrip().startswith('{')
+    else:
+        with io.open(path_or_file, encoding='utf-8') as f:
+            content = f.read()
+        is_yaml = path_or_file.endswith(('.yaml', '.yml'))
+
+    if is_yaml:
+        if yaml is None:  # pragma: no cover
+            raise ImportError('PyYAML is required to load YAML files: pip install pyyaml')
+        state = yaml.safe_load(content)
+    else:
+        state = json.loads(content)
+
+    validate_state(state or {})
+    return state or {}
+
+
+def validate_state(state):
+    """
+    :raises ValueError: If the desired state is malformed, or lists an entity twice
+    """
+    unknown = set(state) - set(CHILD_KINDS)
+    if unknown:
+        raise ValueError('Unknown kinds: %s' % ', '.join(sorted(unknown)))
+
+    for kind, child_kinds in CHILD_KINDS.items():
+        validate_records(kind, state.get(kind) or [], '%s' % kind)
+        for record in state.get(kind) or []:
+            for child_kind in child_kinds:
+                validate_records(child_kind, record.get(child_kind) or [], '%s %s' % (kind, get_keys(kind, record)[0]))
+
+
+def validate_records(kind, records, context):
+    seen = set()
+    for record in records:
+        keys = get_keys(kind, record)
+        if not keys:
+            raise ValueError('%s: every %s entity needs a key' % (context, kind))
+        if keys[0] in seen:
+            raise ValueError('%s: %s %r is listed more than once' % (context, kind, keys[0]))
+        seen.add(keys[0])
+
+
+class Change(namedtuple('Change', ['action', 'kind', 'key', 'parent', 'fields', 'current', 'differences'])):
+    """
+    A single create, update or delete.
+
+    :ivar action: CREATE, UPDATE or DELETE
+    :ivar kind: The kind of the entity, like APIS or KEY_AUTH
+    :ivar key: The key of the entity, see get_keys
+    :ivar parent: The key of the API or consumer the entity belongs to, if any
+    :ivar fields: The desired fields (without the entities belonging to it), or None when deleting
+    :ivar current: The current record, or None when creating
+    :ivar differences: (field, current value, desired value) tuples, when updating
+    """
+    __slots__ = ()
+
+    def describe(self):
+        name = self.key if self.parent is None else '%s/%s' % (self.parent, self.key)
+        if self.action == CREATE:
+            return '+ %s %s' % (self.kind, name)
+        elif self.action == DELETE:
+            return '- %s %s' % (self.kind, name)
+        return '~ %s %s: %s' % (self.kind, name, ', '.join(
+            '%s %r -> %r' % difference for difference in self.differences))
+
+
+class SyncPlan(object):
+    """
+    The changes needed to go from the current state to the desired state, grouped in phases that are applied one
+      after the other.
+    """
+
+    def __init__(self):
+        self.phases = ([], [], [], [])
+        # Maps (kind, key) of the APIs and consumers to their ids, filled in further as they are created
+        self.parent_ids = {}
+
+    def __len__(self):
+        return sum(len(phase) for phase in self.phases)
+
+    def __iter__(self):
+        for phase in self.phases:
+            for change in phase:
+                yield change
+
+    def add(self, change):
+        is_child = change.parent is not None
+        if change.action == DELETE:
+            self.phases[0 if is_child else 1].append(change)
+        else:
+            self.phases[3 if is_child else 2].append(change)
+
+    def summary(self):
+        """
+        :rtype: dict
+        :return: Maps (kind, action) to the amount of changes
+        """
+        result = {}
+        for change in self:
+            result[(change.kind, change.action)] = result.get((change.kind, change.action), 0) + 1
+        return result
+
+    def report(self):
+        """
+        :rtype: list
+        :return: A line per change, in the order they are applied
+        """
+        return [change.describe() for change in self]
+
+
+class SyncResult(namedtuple('SyncResult', ['plan', 'results'])):
+    """
+    :ivar plan: The SyncPlan that was applied
+    :ivar results: A kong.bulk.BulkResult per change, whose spec holds the change
+    """
+    __slots__ = ()
+
+    @property
+    def errors(self):
+        return [(result.spec['change'], result.error) for result in self.results if not result.succeeded]
+
+    @property
+    def succeeded(self):
+        return not self.errors
+
+
+def fetch_current(admin, kind, page_size=DEFAULT_PAGE_SIZE):
+    """
+    :rtype: dict
+    :return: Maps every key of every record of the admin to the record
+    """
+    index = {}
+    for record in admin.iterate(window_size=page_size):
+        for key in get_keys(kind, record):
+            index[key] = record
+    return index
+
+
+def plan_records(plan, kind, desired_records, current_index, parent=None, prune=True):
+    """
+    Adds the changes for a collection to the plan.
+
+    :return: (desired record, current record) tuples of the entities that exist in both states
+    """
+    matched = []
+    matched_ids = set()
+    child_kinds = CHILD_KINDS.get(kind, ())
+
+    for record in desired_records:
+        key = get_keys(kind, record)[0]
+        fields = dict((field, value) for field, value in record.items() if field not in child_kinds)
+        current = current_index.get(key)
+
+        if current is None:
+            plan.add(Change(CREATE, kind, key, parent, fields, None, None))
+            for child_kind in child_kinds:
+                plan_records(plan, child_kind, record.get(child_kind) or [], {}, parent=key, prune=prune)
+            continue
+
+        matched.append((record, current))
+        matched_ids.add(current['id'])
+
+        comparable = dict((field, value) for field, value in fields.items()
+                          if field not in UNCOMPARABLE_FIELDS.get(kind, ()))
+        differences = get_differences(comparable, current)
+        if differences:
+            plan.add(Change(UPDATE, kind, key, parent, fields, current, differences))
+
+    if prune:
+        deleted_ids = set()
+        for current in current_index.values():
+            if current['id'] not in matched_ids and current['id'] not in deleted_ids:
+                deleted_ids.add(current['id'])
+                plan.add(Change(DELETE, kind, get_keys(kind, current)[0], parent, None, current, None))
+
+    return matched
+
+
+def make_plan(client, desired, prune=True, concurrency=DEFAULT_BULK_CONCURRENCY, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Fetches the current state and computes the changes needed to get to the desired state. Plugins and credentials
+      are only fetched for the APIs and consumers that exist in both states, `concurrency` collections at a time.
+
+    :param client: The admin to sync
+    :type client: kong.contract.KongAdminContract
+    :param desired: The desired state, see load_state
+    :type desired: dict
+    :param prune: Whether or not to delete entities that are not in the desired state
+    :type prune: bool
+    :param concurrency: The maximum amount of requests in flight
+    :type concurrency: int
+    :param page_size: The amount of records to request per page
+    :type page_size: int
+    :rtype: SyncPlan
+    """
+    validate_state(desired)
+    plan = SyncPlan()
+
+    specs = []
+    for kind, child_kinds in CHILD_KINDS.items():
+        current_index = fetch_current(get_admin(client, kind), kind, page_size)
+        for record, current in plan_records(plan, kind, desired.get(kind) or [], current_index, prune=prune):
+            key = get_keys(kind, record)[0]
+            plan.parent_ids[(kind, key)] = current['id']
+            for child_kind in child_kinds:
+                specs.append({'index': len(specs), 'child_kind': child_kind, 'parent_id': current['id'],
+                              'parent_key': key, 'parent_record': record})
+
+    def fetch_children(child_kind, parent_id, **kwargs):
+        return fetch_current(get_admin(client, child_kind, parent_id), child_kind, page_size)
+
+    current_indexes = [None] * len(specs)
+    for outcome in bulk_apply(bind_timeouts(client, fetch_children), specs, concurrency=concurrency):
+        if not outcome.succeeded:
+            raise outcome.error
+        current_indexes[outcome.spec['index']] = outcome.result
+
+    # Planned in the order of the desired state, regardless of the order in which the fetches completed
+    for spec, current_index in zip(specs, current_indexes):
+        plan_records(plan, spec['child_kind'], spec['parent_record'].get(spec['child_kind']) or [], current_index,
+                     parent=spec['parent_key'], prune=prune)
+
+    return plan
+
+
+def apply_change(client, change, parent_id=None):
+    """
+    Sends the request(s) for a single change.
+
+    :param parent_id: The id of the API or consumer the entity belongs to, if any
+    :return: The record as returned by the admin API, or None when deleting
+    """
+    admin = get_admin(client, change.kind, parent_id)
+    if change.action == DELETE:
+        return admin.delete(change.current['id'])
+
+    fields = dict(change.fields)
+    if change.kind == PLUGINS:
+        config = fields.pop('config', None) or {}
+        if change.action == UPDATE:
+            # Fields not in the desired state are left as they are
+            config = dict(change.current.get('config') or {}, **config)
+            return admin.update(change.current['id'], enabled=fields.get('enabled'),
+                                consumer_id=fields.get('consumer_id'), **config)
+        return admin.create(fields['name'], enabled=fields.get('enabled'), consumer_id=fields.get('consumer_id'),
+                            **config)
+
+    if change.action == CREATE:
+        return admin.create(**fields)
+    elif change.kind == APIS:
+        return admin.update(change.current['id'], fields.pop('upstream_url', change.current['upstream_url']),
+                            **fields)
+    return admin.update(change.current['id'], **fields)
+
+
+def apply_plan(client, plan, concurrency=DEFAULT_BULK_CONCURRENCY):
+    """
+    Applies the changes of a plan, phase by phase, keeping up to `concurrency` requests in flight. A failing change
+      does not abort the others; changes to the plugins or credentials of an API or consumer that could not be created
+      fail as well.
+
+    :type client: kong.contract.KongAdminContract
+    :type plan: SyncPlan
+    :rtype: SyncResult
+    """
+    def apply(change):
+        parent_id = None
+        if change.parent is not None:
+            parent_id = plan.parent_ids.get((PARENT_KINDS[change.kind], change.parent))
+            if parent_id is None:
+                raise ValueError('%s %s does not exist' % (PARENT_KINDS[change.kind], change.parent))
+        return apply_change(client, change, parent_id)
+
+    apply = bind_timeouts(client, apply)
+
+    results = []
+    for phase in plan.phases:
+        for outcome in bulk_apply(apply, ({'change': change} for change in phase), concurrency=concurrency):
+            change = outcome.spec['change']
+            if outcome.succeeded and change.parent is None and change.action != DELETE:
+                plan.parent_ids[(change.kind, change.key)] = outcome.result['id']
+            results.append(outcome)
+    return SyncResult(plan, results)
+
+
+def sync(client, desired, dry_run=False, prune=True, concurrency=DEFAULT_BULK_CONCURRENCY,
+         page_size=DEFAULT_PAGE_SIZE):
+    """
+    Brings the admin in line with the desired state.
+
+    :param client: The admin to sync
+    :type client: kong.contract.KongAdminContract
+    :param desired: The desired state, see load_state
+    :type desired: dict
+    :param dry_run: Whether or not to only compute the changes, without applying them
+    :type dry_run: bool
+    :param prune: Whether or not to delete entities that are not in the desired state
+    :type prune: bool
+    :param concurrency: The maximum amount of requests in flight
+    :type concurrency: int
+    :param page_size: The amount of records to request per page when fetching the current state
+    :type page_size: int
+    :rtype: SyncPlan | SyncResult
+    :return: The plan when doing a dry run, otherwise the outcome of applying it
+    """
+    plan = make_plan(client, desired, prune=prune, concurrency=concurrency, page_size=page_size)
+    if dry_run:
+        return plan
+    return apply_plan(client, plan, concurrency=concurrency)
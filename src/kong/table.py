@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""
+A columnar, in-memory table of all consumers and the amount of credentials they have, for analytics over millions of
+  consumers without keeping millions of dicts around:
+
+    table = ConsumerTable.load(client, concurrency=20)
+
+    # Which consumers have no key-auth?
+    rows = table.without_credentials(KEY_AUTH)
+    for consumer in table.records(rows):
+        print(consumer['username'])
+
+    # Set operations combine selections
+    rows = table.where('username', lambda username: username.startswith('test-')) & table.with_credentials(OAUTH2)
+    print(len(rows))
+
+The kinds of credentials (KEY_AUTH and the like) are those of kong.sync.
+
+Every field is a column: ids are kept as 16 bytes per consumer in a bytearray (Kong's ids are UUIDs), usernames and
+  custom_ids as codes into pools of interned strings, timestamps and credential counts in arrays. Selections (RowSet)
+  are bitsets of rows, so combining them doesn't touch the columns at all, and a filter on usernames evaluates its
+  predicate once per distinct string rather than once per consumer.
+"""
+from __future__ import unicode_literals, print_function
+import binascii
+import uuid
+from array import array
+
+import six
+from six.moves import range
+
+from .bulk import bulk_apply, bind_timeouts, DEFAULT_BULK_CONCURRENCY
+from .sync import CONSUMERS, CHILD_KINDS, get_admin, DEFAULT_PAGE_SIZE
+
+# The code of a missing string, and the value of a missing timestamp
+MISSING = -1
+
+# The amount of bytes of an id in the id column
+ID_SIZE = 16
+
+# The fields of the consumers that are kept in string pools
+STRING_FIELDS = ('username', 'custom_id')
+
+
+class StringPool(object):
+    """
+    Interned strings, each assigned a small integer code.
+    """
+
+    def __init__(self):
+        self.strings = []
+        self.codes = {}
+
+    def __len__(self):
+        return len(self.strings)
+
+    def intern(self, value):
+        """
+        :rtype: int
+        :return: The code of the string, MISSING for None
+        """
+        if value is None:
+            return MISSING
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def get(self, code):
+        return None if code == MISSING else self.strings[code]
+
+    def find(self, predicate):
+        """
+        :param predicate: Function called for every distinct string, or a string to look up
+        :rtype: set
+        :return: The codes of the matching strings
+        """
+        if not callable(predicate):
+            code = self.codes.get(predicate)
+            return set() if code is None else set([code])
+        return set(code for code, value in enumerate(self.strings) if predicate(value))
+
+
+class RowSet(object):
+    """
+    An immutable selection of rows of a table, as a bitset: bit `n` is set if row `n` is selected.
+    """
+    __slots__ = ('size', 'bits')
+
+    def __init__(self, size, bits=0):
+        """
+        :param size: The amount of rows of the table
+        :type size: int
+        :param bits: The bitset
+        :type bits: int
+        """
+        self.size = size
+        self.bits = bits
+
+    @classmethod
+    def from_rows(cls, size, rows):
+        # Setting bits one by one in an int is quadratic, so they are collected in a bytearray first
+        mask = bytearray((size + 7) // 8)
+        for row in rows:
+            mask[row >> 3] |= 1 << (row & 7)
+        return cls(size, mask_to_bits(mask))
+
+    @classmethod
+    def all(cls, size):
+        return cls(size, (1 << size) - 1)
+
+    def __repr__(self):
+        return '<RowSet: %d of %d rows>' % (len(self), self.size)
+
+    def __len__(self):
+        return bin(self.bits).count('1')
+
+    def __bool__(self):
+        return self.bits != 0
+    __nonzero__ = __bool__
+
+    def __contains__(self, row):
+        return 0 <= row < self.size and bool(self.bits >> row & 1)
+
+    def __iter__(self):
+        for index, byte in enumerate(bits_to_mask(self.bits)):
+            if byte:
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        yield index * 8 + bit
+
+    def __eq__(self, other):
+        return isinstance(other, RowSet) and self.size == other.size and self.bits == other.bits
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.size, self.bits))
+
+    def _check(self, other):
+        if not isinstance(other, RowSet) or other.size != self.size:
+            raise ValueError('Only rows of the same table can be combined')
+
+    def __and__(self, other):
+        self._check(other)
+        return RowSet(self.size, self.bits & other.bits)
+
+    def __or__(self, other):
+        self._check(other)
+        return RowSet(self.size, self.bits | other.bits)
+
+    def __sub__(self, other):
+        self._check(other)
+        return RowSet(self.size, self.bits & ~other.bits)
+
+    def __xor__(self, other):
+        self._check(other)
+        return RowSet(self.size, self.bits ^ other.bits)
+
+    def __invert__(self):
+        return RowSet(self.size, ~self.bits & ((1 << self.size) - 1))
+
+
+def mask_to_bits(mask):
+    """
+    :param mask: A bitset as a bytearray, least significant byte first
+    :rtype: int
+    """
+    return int(binascii.hexlify(bytes(mask[::-1])), 16) if mask else 0
+
+
+def bits_to_mask(bits):
+    """
+    :rtype: bytearray
+    :return: A bitset as a bytearray, least significant byte first
+    """
+    digits = '%x' % bits
+    return bytearray(binascii.unhexlify(('0' if len(digits) % 2 else '') + digits))[::-1]
+
+
+class ConsumerTable(object):
+    """
+    Columns of the consumers (id, username, custom_id, created_at) and of the amount of credentials of every kind they
+      have. Rows are only appended, in the order the consumers were loaded.
+    """
+
+    def __init__(self, credential_kinds=CHILD_KINDS[CONSUMERS]):
+        """
+        :param credential_kinds: The kinds of credentials to count: BASIC_AUTH, KEY_AUTH and/or OAUTH2
+        :type credential_kinds: tuple
+        """
+        self.credential_kinds = tuple(credential_kinds)
+        self.pools = dict((field, StringPool()) for field in STRING_FIELDS)
+        self.ids = bytearray()
+        self.columns = dict((field, array(str('l'))) for field in STRING_FIELDS)
+        self.created_at = array(str('d'))
+        self.credential_counts = dict((kind, array(str('l'))) for kind in self.credential_kinds)
+        self.index = {}  # id (as bytes) -> row
+
+    def __len__(self):
+        return len(self.created_at)
+
+    @classmethod
+    def load(cls, client, credential_kinds=CHILD_KINDS[CONSUMERS], concurrency=DEFAULT_BULK_CONCURRENCY,
+             page_size=DEFAULT_PAGE_SIZE):
+        """
+        Streams the consumers from the admin into a new table, counting the credentials of `concurrency` consumers at
+          a time. Only the table is kept in memory, not the pages.
+
+        :param client: The admin to load the consumers from
+        :type client: kong.contract.KongAdminContract
+        :param credential_kinds: The kinds of credentials to count
+        :type credential_kinds: tuple
+        :param concurrency: The maximum amount of requests in flight
+        :type concurrency: int
+        :param page_size: The amount of consumers to request per page
+        :type page_size: int
+        :rtype: ConsumerTable
+        """
+        table = cls(credential_kinds)
+
+        def count_credentials(consumer):
+            return dict((kind, get_admin(client, kind, consumer['id']).count()) for kind in table.credential_kinds)
+
+        specs = ({'consumer': consumer} for consumer in client.consumers.iterate(window_size=page_size))
+        for outcome in bulk_apply(bind_timeouts(client, count_credentials), specs, concurrency=concurrency):
+            if not outcome.succeeded:
+                raise outcome.error
+            table.append(outcome.spec['consumer'], outcome.result)
+        return table
+
+    def append(self, consumer, credential_counts=None):
+        """
+        :param consumer: The consumer as returned by the admin API
+        :type consumer: dict
+        :param credential_counts: Maps kinds of credentials to the amount of them the consumer has
+        :type credential_counts: dict
+        :rtype: int
+        :return: The row of the consumer
+        """
+        consumer_id = uuid.UUID(six.text_type(consumer['id'])).bytes
+        if consumer_id in self.index:
+            raise ValueError('Consumer already in the table: %s' % consumer['id'])
+
+        row = len(self)
+        self.ids.extend(consumer_id)
+        for field in STRING_FIELDS:
+            self.columns[field].append(self.pools[field].intern(consumer.get(field)))
+        self.created_at.append(consumer.get('created_at') or MISSING)
+        for kind in self.credential_kinds:
+            self.credential_counts[kind].append((credential_counts or {}).get(kind, 0))
+        self.index[consumer_id] = row
+        return row
+
+    def get_row(self, consumer_id):
+        """
+        :return: The row of the consumer, or None if it's not in the table
+        """
+        return self.index.get(uuid.UUID(six.text_type(consumer_id)).bytes)
+
+    def get_id(self, row):
+        return six.text_type(uuid.UUID(bytes=bytes(self.ids[row * ID_SIZE:(row + 1) * ID_SIZE])))
+
+    def get(self, row):
+        """
+        :rtype: dict
+        :return: The consumer of a row, with the amount of credentials of every kind under `credentials`
+        """
+        record = {'id': self.get_id(row)}
+        for field in STRING_FIELDS:
+            value = self.pools[field].get(self.columns[field][row])
+            if value is not None:
+                record[field] = value
+        if self.created_at[row] != MISSING:
+            record['created_at'] = int(self.created_at[row])
+        record['credentials'] = dict((kind, counts[row]) for kind, counts in self.credential_counts.items())
+        return record
+
+    def records(self, rows=None):
+        """
+        :param rows: The rows to return, all rows if omitted
+        :type rows: RowSet
+        :rtype: collections.Iterator[dict]
+        """
+        return (self.get(row) for row in (range(len(self)) if rows is None else rows))
+
+    def all(self):
+        return RowSet.all(len(self))
+
+    def select(self, column, predicate):
+        """
+        :param column: An array with a value per row
+        :param predicate: Function called with the value of every row
+        :rtype: RowSet
+        """
+        return RowSet.from_rows(len(self), (row for row, value in enumerate(column) if predicate(value)))
+
+    def where(self, field, predicate):
+        """
+        :param field: 'username' or 'custom_id'
+        :type field: six.text_type
+        :param predicate: Function called once for every distinct value of the field, or a value to look for
+        :rtype: RowSet
+        :return: The rows of which the field matches
+        """
+        if field not in STRING_FIELDS:
+            raise ValueError('Unknown field: %s, expected one of: %s' % (field, ', '.join(STRING_FIELDS)))
+        codes = self.pools[field].find(predicate)
+        if not codes:
+            return RowSet(len(self))
+        return self.select(self.columns[field], codes.__contains__)
+
+    def missing(self, field):
+        """
+        :return: The rows without a value for the field
+        """
+        return self.select(self.columns[field], lambda code: code == MISSING)
+
+    def with_credentials(self, kind, minimum=1):
+        """
+        :param kind: BASIC_AUTH, KEY_AUTH or OAUTH2
+        :type kind: six.text_type
+        :param minimum: The minimum amount of credentials of the kind
+        :type minimum: int
+        :rtype: RowSet
+        """
+        return self.select(self.credential_counts[kind], lambda count: count >= minimum)
+
+    def without_credentials(self, kind):
+        return ~self.with_credentials(kind)
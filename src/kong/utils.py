@@ -2,11 +2,12 @@
 from __future__ import unicode_literals, print_function
 import time
 import uuid
-from json import dumps
 
 import six
 
-from .compat import urlparse, urlencode, unquote, parse_qs, parse_qsl, ParseResult, OrderedDict, utf8_or_str
+from .compat import urlparse, urljoin, urlencode, unquote, parse_qs, parse_qsl, ParseResult, OrderedDict, \
+    utf8_or_str
+from .codec import get_codec, STDLIB_CODEC
 
 
 def timestamp():
@@ -35,11 +36,13 @@ def uuid_or_string(data):
     raise ValueError('Expected string or UUID, got %r' % data)
 
 
-def add_url_params(url, params):
+def add_url_params(url, params, codec=None):
     """ Add GET params to provided URL being aware of existing.
 
     :param url: string of target URL
     :param params: dict containing requested params to be added
+    :param codec: the kong.codec.JSONCodec (or its name) to encode bools and dicts with, defaults to the standard
+        library (query values are small, and its output keeps URLs the same whichever codec is installed)
     :return: string with updated URL
 
     >> url = 'http://stackoverflow.com/test?answers=true'
@@ -66,9 +69,10 @@ def add_url_params(url, params):
 
     # Bool and Dict values should be converted to json-friendly values
     json_friendly_data = {}
+    codec = get_codec(codec or STDLIB_CODEC)
     for k, v in parsed_get_args.items():
         if isinstance(v, (bool, dict)):
-            json_friendly_data[k] = dumps(v)
+            json_friendly_data[k] = codec.dumps(v)
     parsed_get_args.update(json_friendly_data)
 
     parsed_get_args = sorted_ordered_dict(parsed_get_args)
@@ -93,6 +97,71 @@ def add_url_params(url, params):
     return new_url
 
 
+def encode_query_params(params, codec=None):
+    """
+    Encodes query parameters the same way `add_url_params` does (sorted by key, bools and dicts as JSON), without
+      parsing and rebuilding a URL.
+
+    :param params: dict containing the params to encode
+    :type params: dict
+    :param codec: The codec (or its name) to encode bools and dicts with, defaults to the standard library
+    :type codec: kong.codec.JSONCodec
+    :rtype: str
+    """
+    items = []
+    for key in sorted(params):
+        value = params[key]
+        if isinstance(value, (bool, dict)):
+            value = get_codec(codec or STDLIB_CODEC).dumps(value)
+        if isinstance(value, six.text_type):
+            value = utf8_or_str(value)
+        items.append((key, value))
+    return urlencode(items, doseq=True)
+
+
+class URLBuilder(object):
+    """
+    Builds the URLs of an admin endpoint. The prefix of every resource (the first path segment, like 'apis') is resolved
+      against the endpoint once and reused, and a query string is only encoded when there are query parameters:
+
+        builder = URLBuilder('http://localhost:8001')
+        builder.build('apis', 'example')     # 'http://localhost:8001/apis/example/'
+        builder.build('consumers', size=10)  # 'http://localhost:8001/consumers/?size=10'
+    """
+
+    def __init__(self, api_url):
+        """
+        :param api_url: The url of the Kong admin endpoint
+        :type api_url: six.text_type
+        """
+        self.api_url = api_url
+        self._prefixes = {}
+
+    def prefix(self, resource):
+        prefix = self._prefixes.get(resource)
+        if prefix is None:
+            prefix = self._prefixes[resource] = urljoin(self.api_url, resource)
+        return prefix
+
+    def build(self, *path, **query_params):
+        """
+        :param path: The path segments, relative to the endpoint
+        :param query_params: The query parameters
+        :rtype: six.text_type
+        """
+        if path:
+            url = self.prefix(six.text_type(path[0]))
+            if len(path) > 1:
+                url = '%s/%s' % (url, '/'.join([six.text_type(p) for p in path[1:]]))
+        else:
+            url = self.prefix('')
+
+        url = ensure_trailing_slash(url)
+        if query_params:
+            url = '%s?%s' % (url, encode_query_params(query_params))
+        return url
+
+
 def assert_dict_keys_in(d, allowed_keys, error_template=None):
     error_template = error_template or '%r is not a valid key. Allowed keys: %r'
     for key in d:
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Validation of plugin configurations against the schemas returned by `plugins.retrieve_schema`, so mistakes are caught
+  before a request is sent:
+
+    client = KongAdminClient(api_url, validate_plugins=True)
+    client.apis.plugins('mockbin').create('rate-limiting', minuet=20)
+    # PluginConfigurationError: Unknown value field: minuet
+
+Schemas are retrieved once per plugin and compiled into a SchemaValidator: a check per field, so validating a
+  configuration doesn't walk the schema again. The simulator validates with the same code.
+"""
+from __future__ import unicode_literals, print_function
+import numbers
+import threading
+
+import six
+
+from .exceptions import PluginConfigurationError
+
+TRUE_VALUES = ('true', 'True', '1', True)
+
+
+def parse_bool(value):
+    return value in TRUE_VALUES
+
+
+def parse_number(value):
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def coerce_value(value, field_schema):
+    """
+    Converts a (form encoded) plugin configuration value to the type declared in the plugin's schema. Values that are
+      no strings, or can't be converted, are returned as is.
+    """
+    if not isinstance(value, six.string_types):
+        return value
+
+    field_type = field_schema.get('type')
+    try:
+        if field_type == 'number':
+            return parse_number(value)
+    except ValueError:
+        return value
+    if field_type == 'boolean':
+        return parse_bool(value)
+    elif field_type == 'array':
+        return [item for item in value.split(',') if item]
+    return value
+
+
+def is_number(value):
+    return isinstance(value, numbers.Number) and not isinstance(value, bool)
+
+
+def is_url(value):
+    return isinstance(value, six.string_types) and value.startswith(('http://', 'https://'))
+
+
+TYPE_CHECKS = {
+    'string': lambda value: isinstance(value, six.string_types),
+    'number': is_number,
+    'timestamp': is_number,
+    'boolean': lambda value: isinstance(value, bool),
+    'array': lambda value: isinstance(value, (list, tuple)),
+    'table': lambda value: isinstance(value, dict),
+    'url': is_url,
+}
+
+
+def compile_field(name, field_schema):
+    """
+    :return: A function checking a value for the field, returning a list of error messages
+    """
+    field_type = field_schema.get('type')
+    type_check = TYPE_CHECKS.get(field_type)
+    enum = frozenset(field_schema['enum']) if field_schema.get('enum') else None
+    nested = SchemaValidator(field_schema['schema'], prefix='%s.' % name) if 'schema' in field_schema else None
+
+    def check(value):
+        value = coerce_value(value, field_schema)
+        if type_check is not None and not type_check(value):
+            return ['Invalid value for %s: expected %s, got %r' % (name, field_type, value)]
+        if enum is not None:
+            values = value if isinstance(value, (list, tuple)) else [value]
+            invalid = [item for item in values if item not in enum]
+            if invalid:
+                return ['Invalid value for %s: %s not in %s' % (
+                    name, ', '.join(six.text_type(item) for item in invalid), ', '.join(sorted(enum)))]
+        if nested is not None:
+            return nested.get_errors(value)
+        return []
+    return check
+
+
+class SchemaValidator(object):
+    """
+    A plugin schema, compiled into a check per field.
+    """
+
+    def __init__(self, schema, prefix=''):
+        """
+        :param schema: The schema as returned by `plugins.retrieve_schema`, like {"fields": {"minute": {...}, ...}}
+        :type schema: dict
+        :param prefix: Prepended to the field names in error messages, for nested schemas
+        :type prefix: six.text_type
+        """
+        fields = schema.get('fields') or {}
+        self.prefix = prefix
+        self.checks = dict((name, compile_field(prefix + name, field_schema)) for name, field_schema in fields.items())
+
+        # Kong fills in defaults before checking for required fields
+        self.required = frozenset(name for name, field_schema in fields.items()
+                                  if field_schema.get('required') and 'default' not in field_schema)
+
+    def get_errors(self, fields, partial=False):
+        """
+        :param fields: The configuration
+        :type fields: dict
+        :param partial: Whether or not the configuration is an update, where required fields can be left out
+        :type partial: bool
+        :rtype: list
+        :return: Error messages, empty if the configuration is valid
+        """
+        errors = []
+        for name, value in fields.items():
+            check = self.checks.get(name)
+            if check is None:
+                errors.append('Unknown value field: %s%s' % (self.prefix, name))
+            elif value is not None:
+                errors.extend(check(value))
+
+        if not partial:
+            for name in sorted(self.required.difference(fields)):
+                errors.append('Missing required value field: %s%s' % (self.prefix, name))
+        return errors
+
+    def validate(self, fields, partial=False):
+        """
+        :raises PluginConfigurationError: If the configuration is invalid
+        """
+        errors = self.get_errors(fields, partial=partial)
+        if errors:
+            raise PluginConfigurationError(errors)
+
+
+class PluginConfigValidator(object):
+    """
+    Thread-safe registry of compiled schemas, retrieved from a plugin admin when first needed. Wrap the admin in a
+      kong.cache.CachingPluginAdmin to keep the schemas across processes.
+    """
+
+    def __init__(self, plugins):
+        """
+        :param plugins: The admin to retrieve schemas from
+        :type plugins: kong.contract.PluginAdminContract
+        """
+        self.plugins = plugins
+        self._validators = {}
+        self._plugin_names = {}  # plugin configuration id -> plugin name
+        self._lock = threading.Lock()
+
+    def get_validator(self, plugin_name):
+        """
+        :rtype: SchemaValidator
+        :raises PluginConfigurationError: If the plugin is unknown
+        """
+        validator = self._validators.get(plugin_name)
+        if validator is None:
+            try:
+                schema = self.plugins.retrieve_schema(plugin_name)
+            except ValueError:
+                schema = None
+            validator = self.add_schema(plugin_name, schema)
+        return validator
+
+    def has_schema(self, plugin_name):
+        return plugin_name in self._validators
+
+    def add_schema(self, plugin_name, schema):
+        """
+        Compiles the schema of a plugin that was retrieved elsewhere, like by the asyncio client (kong.async_client).
+
+        :param schema: The schema of the plugin, or None if the plugin is unknown
+        :type schema: dict
+        :rtype: SchemaValidator
+        :raises PluginConfigurationError: If the plugin is unknown
+        """
+        if schema is None:
+            raise PluginConfigurationError(['Unknown plugin_name: %s' % plugin_name])
+
+        validator = SchemaValidator(schema)
+        with self._lock:
+            self._validators[plugin_name] = validator
+        return validator
+
+    def validate(self, plugin_name, fields, partial=False):
+        """
+        :param plugin_name: The name of the plugin
+        :type plugin_name: six.text_type
+        :param fields: The configuration
+        :type fields: dict
+        :param partial: Whether or not the configuration is an update, where required fields can be left out
+        :type partial: bool
+        :raises PluginConfigurationError: If the plugin is unknown, or the configuration is invalid
+        """
+        self.get_validator(plugin_name).validate(fields, partial=partial)
+
+    def remember(self, plugin_configuration):
+        """
+        Keeps track of the plugin of a configuration, so updates (which only refer to its id) can be validated.
+        """
+        if plugin_configuration.get('id') and plugin_configuration.get('name'):
+            with self._lock:
+                self._plugin_names[plugin_configuration['id']] = plugin_configuration['name']
+        return plugin_configuration
+
+    def get_plugin_name(self, plugin_configuration_id):
+        """
+        :return: The name of the plugin of a configuration seen before, otherwise None
+        """
+        return self._plugin_names.get(six.text_type(plugin_configuration_id))
@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+"""
+Tests of the asyncio client (kong.async_client), which requires Python 3.7+ and aiohttp. This module is not collected on
+  older versions, see conftest.py.
+"""
+from __future__ import unicode_literals, print_function
+import asyncio
+import inspect
+
+import aiohttp
+
+from kong.exceptions import ConflictError, DeadlineExceededError, PluginConfigurationError
+from kong.server import SimulatorServer
+from kong.retry import RetryPolicy
+from kong.metrics import InMemoryMetrics
+from kong.ratelimit import RateLimiter
+from kong.faults import SimulatorProfile, fixed
+from kong.records import Consumer
+from kong.async_client import AsyncKongAdminClient, AsyncResponse, AsyncCollectionMixin, AsyncStreamedPage, \
+    AsyncBalancedTransport, encode_form_data, acquire_rate_limiter
+from kong.compat import TestCase, skipIf, run_unittests
+
+from test_kong import API_URL, KongAdminTesting, SimulatorServerTestMixin, kong_testserver_is_up
+
+
+class AsyncAdminAdapter(object):
+    """
+    Drives an asynchronous admin client from the synchronous test cases
+    """
+    def __init__(self, admin, loop):
+        self._admin = admin
+        self._loop = loop
+
+    def __getattr__(self, name):
+        attr = getattr(self._admin, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if inspect.isasyncgen(result):
+                async def collect():
+                    return [item async for item in result]
+                return iter(self._loop.run_until_complete(collect()))
+            elif inspect.isawaitable(result):
+                return self._loop.run_until_complete(result)
+            # Factories like plugins(), basic_auth(), ...
+            return AsyncAdminAdapter(result, self._loop)
+        return call
+
+
+class AsyncKongAdminClientAdapter(object):
+    def __init__(self, api_url, **kwargs):
+        self._loop = asyncio.new_event_loop()
+        self._client = AsyncKongAdminClient(api_url, **kwargs)
+        self.apis = AsyncAdminAdapter(self._client.apis, self._loop)
+        self.consumers = AsyncAdminAdapter(self._client.consumers, self._loop)
+        self.plugins = AsyncAdminAdapter(self._client.plugins, self._loop)
+
+    def close(self):
+        self._loop.run_until_complete(self._client.close())
+        self._loop.close()
+
+
+class AsyncClientTestCase(TestCase):
+    class StubTransport(object):
+        def __init__(self, *responses):
+            self.requests = []
+            self.responses = list(responses)
+
+        async def request(self, method, url, data=None, headers=None, **kwargs):
+            self.requests.append((method, url, data))
+            return self.responses.pop(0)
+
+        async def post(self, url, data=None, **kwargs):
+            return await self.request('POST', url, data=data, **kwargs)
+
+        async def get(self, url, **kwargs):
+            return await self.request('GET', url, **kwargs)
+
+        async def close(self):
+            pass
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def test_encode_form_data(self):
+        self.assertEqual(encode_form_data({'a': None, 'b': True, 'c': 1, 'd': 'x'}), {'b': 'True', 'c': '1', 'd': 'x'})
+        self.assertIsNone(encode_form_data(None))
+
+    def test_create(self):
+        transport = self.StubTransport(AsyncResponse(201, b'{"id": "1234", "username": "bob"}'))
+        client = AsyncKongAdminClient(API_URL, transport=transport)
+
+        result = self.loop.run_until_complete(client.consumers.create(username='bob'))
+        self.assertEqual(result['username'], 'bob')
+        self.assertEqual(transport.requests[0][0], 'POST')
+        self.assertEqual(transport.requests[0][2], {'username': 'bob', 'custom_id': None})
+
+        # Admins handed out by the factories share the transport
+        self.assertIs(client.consumers.key_auth('bob').transport, transport)
+
+        transport.responses.append(AsyncResponse(409, b'{"username": "already exists"}'))
+        with self.assertRaises(ConflictError):
+            self.loop.run_until_complete(client.consumers.create(username='bob'))
+
+        self.loop.run_until_complete(client.close())
+
+    def test_iterate(self):
+        pages = {
+            None: {'data': [1, 2], 'next': 'http://localhost:8001/consumers/?size=2&offset=b'},
+            'b': {'data': [3]},
+        }
+
+        class Collection(AsyncCollectionMixin):
+            async def list(self, size=100, offset=None, **filter_fields):
+                return pages[offset]
+
+        async def collect():
+            return [item async for item in Collection().iterate(window_size=2)]
+
+        self.assertEqual(self.loop.run_until_complete(collect()), [1, 2, 3])
+
+    def test_iterate_prefetch(self):
+        requested = []
+
+        class Collection(AsyncCollectionMixin):
+            async def list(self, size=100, offset=None, **filter_fields):
+                offset = int(offset or 0)
+                requested.append(offset)
+                await asyncio.sleep(0.001)
+                result = {'data': list(range(offset, min(offset + size, 50)))}
+                if offset + size < 50:
+                    result['next'] = 'http://localhost:8001/consumers/?size=%d&offset=%d' % (size, offset + size)
+                return result
+
+        async def collect():
+            found = []
+            async for item in Collection().iterate(window_size=10, prefetch=1):
+                if item == 0:
+                    # Give the background task the chance to fetch ahead
+                    await asyncio.sleep(0.02)
+                    self.assertEqual(requested, [0, 10])
+                found.append(item)
+            return found
+
+        self.assertEqual(self.loop.run_until_complete(collect()), list(range(50)))
+
+    def test_acquire_rate_limiter(self):
+        limiter = RateLimiter(rate=1000, burst=1, max_in_flight=1)
+        loop = asyncio.new_event_loop()
+
+        async def work():
+            await acquire_rate_limiter(limiter)
+            in_flight = limiter.in_flight
+            await asyncio.sleep(0.001)
+            limiter.release()
+            return in_flight
+
+        async def run():
+            return await asyncio.gather(*[work() for i in range(10)])
+
+        self.assertEqual(loop.run_until_complete(run()), [1] * 10)
+        loop.close()
+
+    def test_timeouts(self):
+        server = SimulatorServer(port=0, profile=SimulatorProfile(
+            latency={'*': 0, 'consumers.retrieve': fixed(0.6)})).start()
+        client = AsyncKongAdminClient(server.url, retry_policy=RetryPolicy(max_tries=3, base_delay=0.01),
+                                      timeout=(1, 0.1))
+
+        async def run():
+            await client.consumers.create(username='bob')
+            with self.assertRaises(asyncio.TimeoutError):
+                await client.consumers.retrieve('bob')
+
+            with client.timeouts(timeout=2, deadline=0.2):
+                with self.assertRaises(DeadlineExceededError):
+                    await client.consumers.retrieve('bob')
+            with client.timeouts(timeout=2):
+                self.assertEqual((await client.consumers.retrieve('bob'))['username'], 'bob')
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(run())
+        finally:
+            loop.run_until_complete(client.close())
+            loop.close()
+            server.stop()
+
+    def test_retry_connect_errors(self):
+        down = SimulatorServer(port=0).start()
+        down.stop()
+        metrics = InMemoryMetrics()
+        client = AsyncKongAdminClient(down.url, metrics=metrics, retry_policy=RetryPolicy(max_tries=3, base_delay=0.01))
+
+        async def run():
+            # A POST that could not be sent is safe to retry
+            with self.assertRaises(aiohttp.ClientConnectorError):
+                await client.consumers.create(username='bob')
+            await client.close()
+
+        asyncio.new_event_loop().run_until_complete(run())
+        self.assertEqual(metrics.summary()[('POST', '/consumers/')]['errors'], 3)
+
+    def test_metrics(self):
+        server = SimulatorServer(port=0).start()
+        metrics = InMemoryMetrics()
+        client = AsyncKongAdminClient(server.url, metrics=metrics)
+
+        async def run():
+            await client.consumers.create(username='bob')
+            await client.consumers.retrieve('bob')
+            await client.close()
+
+        try:
+            asyncio.new_event_loop().run_until_complete(run())
+        finally:
+            server.stop()
+
+        self.assertEqual(metrics.summary()[('GET', '/consumers/{id}/')]['statuses'], {200: 1})
+        self.assertEqual(metrics.summary()[('POST', '/consumers/')]['count'], 1)
+
+    def test_features(self):
+        server = SimulatorServer(port=0).start()
+        metrics = InMemoryMetrics()
+        client = AsyncKongAdminClient(server.url, metrics=metrics, validate_plugins=True, records=True,
+                                      json_codec='json')
+
+        async def run():
+            for i in range(25):
+                await client.consumers.create(username='user%d' % i)
+            expected = [consumer async for consumer in client.consumers.iterate(window_size=10)]
+            self.assertIsInstance(expected[0], Consumer)
+            self.assertEqual(len(expected), 25)
+
+            # The items of a page are yielded while it is being received
+            self.assertEqual([consumer async for consumer in client.consumers.iterate(window_size=10, stream=True)],
+                             expected)
+            page = await client.consumers.list(size=10, stream=True)
+            self.assertIsInstance(page, AsyncStreamedPage)
+            self.assertEqual([consumer async for consumer in page['data']], expected[:10])
+            self.assertIsNotNone(page['next'])
+
+            # Plugin configurations are validated against the schema, retrieved once
+            await client.apis.create('http://mockbin.org/', name='mockbin', request_host='mockbin.org')
+            plugins = client.apis.plugins('mockbin')
+            metrics.reset()
+            with self.assertRaises(PluginConfigurationError):
+                await plugins.create('rate-limiting', minuet=20)
+            plugin = await plugins.create('rate-limiting', minute=20)
+            with self.assertRaises(PluginConfigurationError):
+                await plugins.update(plugin.id, minute='lots')
+            self.assertEqual(sum(stats['count'] for (method, route), stats in metrics.summary().items()
+                                 if route.startswith('/plugins/')), 1)
+            await client.close()
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(run())
+        finally:
+            loop.close()
+            server.stop()
+
+    def test_load_balancing(self):
+        server = SimulatorServer(port=0).start()
+        down = SimulatorServer(port=0).start()
+        down.stop()
+        client = AsyncKongAdminClient([down.url, server.url], retry_policy=RetryPolicy(max_tries=1))
+
+        async def run():
+            self.assertIsInstance(client.transport, AsyncBalancedTransport)
+
+            # Requests fail over to the node that is up
+            for i in range(4):
+                await client.consumers.create(username='user%d' % i)
+            self.assertEqual(await client.consumers.count(), 4)
+            self.assertEqual(await client.transport.check_health(), {down.url: False, server.url: True})
+            await client.close()
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(run())
+        finally:
+            loop.close()
+            server.stop()
+
+
+class SimulatorServerAsyncClientAPITestCase(SimulatorServerTestMixin, KongAdminTesting.APITestCase):
+    def on_create_client(self):
+        return AsyncKongAdminClientAdapter(self.server.url)
+
+    def tearDown(self):
+        super(SimulatorServerAsyncClientAPITestCase, self).tearDown()
+        self.client.close()
+
+
+class SimulatorServerAsyncClientConsumerTestCase(SimulatorServerTestMixin, KongAdminTesting.ConsumerTestCase):
+    def on_create_client(self):
+        return AsyncKongAdminClientAdapter(self.server.url)
+
+    def tearDown(self):
+        super(SimulatorServerAsyncClientConsumerTestCase, self).tearDown()
+        self.client.close()
+
+
+class SimulatorServerAsyncRecordsClientAPITestCase(SimulatorServerTestMixin, KongAdminTesting.APITestCase):
+    def on_create_client(self):
+        return AsyncKongAdminClientAdapter(self.server.url, records=True)
+
+    def tearDown(self):
+        super(SimulatorServerAsyncRecordsClientAPITestCase, self).tearDown()
+        self.client.close()
+
+
+class SimulatorServerAsyncRecordsClientConsumerTestCase(SimulatorServerTestMixin, KongAdminTesting.ConsumerTestCase):
+    def on_create_client(self):
+        return AsyncKongAdminClientAdapter(self.server.url, records=True)
+
+    def tearDown(self):
+        super(SimulatorServerAsyncRecordsClientConsumerTestCase, self).tearDown()
+        self.client.close()
+
+
+@skipIf(kong_testserver_is_up() is False, 'Kong testserver is down')
+class AsyncClientAPITestCase(KongAdminTesting.APITestCase):
+    def on_create_client(self):
+        return AsyncKongAdminClientAdapter(API_URL)
+
+    def tearDown(self):
+        super(AsyncClientAPITestCase, self).tearDown()
+        self.client.close()
+
+
+@skipIf(kong_testserver_is_up() is False, 'Kong testserver is down')
+class AsyncClientConsumerTestCase(KongAdminTesting.ConsumerTestCase):
+    def on_create_client(self):
+        return AsyncKongAdminClientAdapter(API_URL)
+
+    def tearDown(self):
+        super(AsyncClientConsumerTestCase, self).tearDown()
+        self.client.close()
+
+
+if __name__ == '__main__':
+    run_unittests()
@@ -3,26 +3,70 @@ from __future__ import unicode_literals, print_function
 from abc import ABCMeta, abstractmethod
 import os
 import sys
+import errno
+import socket
 import collections
 import uuid
 import json
 import random
+import threading
+import time
+import shutil
+import copy
+import pickle
+import tempfile
 import requests
+from requests.packages.urllib3.exceptions import MaxRetryError, ProtocolError
 import logging
+import six
 
 # To run the standalone test script
 if __name__ == '__main__':
     sys.path.append('../src/')
 
-from kong.exceptions import ConflictError
-from kong.simulator import KongAdminSimulator
+from kong.exceptions import ConflictError, ServerError, ConnectionDroppedError, DeadlineExceededError, \
+    PluginConfigurationError
+from kong.simulator import KongAdminSimulator, SimulatorDataStore
+from kong.retry import RetryPolicy, RetryBudget, parse_retry_after, is_connect_error
+from kong.deadline import Deadline, normalize_timeout
+from kong.balancer import NodePool, LEAST_OUTSTANDING
+from kong.sync import sync, load_state, make_plan, get_differences, UPDATE, DELETE, KEY_AUTH, OAUTH2
+from kong.snapshot import export_snapshot, import_snapshot
+from kong.table import ConsumerTable, RowSet
+from kong.metrics import InMemoryMetrics, Histogram, get_route
+from kong.faults import SimulatorProfile, SERVER_ERROR, CONFLICT, DISCONNECT, fixed, uniform, lookup
 from kong.client import KongAdminClient
-from kong.compat import TestCase, skipIf, run_unittests, OrderedDict, urlencode, HTTPConnection
-from kong.utils import uuid_or_string, add_url_params, sorted_ordered_dict
+from kong.transport import Transport
+from kong.ratelimit import RateLimiter
+from kong.bulk import bulk_apply, bind_timeouts
+from kong.mixins import CollectionMixin, AdaptivePageSize
+from kong.cache import TTLCache, CachingKongAdmin, CachingPluginAdmin, SchemaStore
+from kong.resolver import NameResolver, is_uuid
+from kong.validation import PluginConfigValidator
+from kong.codec import CODECS, STDLIB_CODEC, JSONCodec, get_codec
+from kong.streaming import PageParser, StreamedPage
+from kong.records import Api, Consumer, PluginConfiguration, BasicAuth, KeyAuth, OAuth2App, \
+    to_dict as record_to_dict
+from kong.compat import TestCase, skipIf, run_unittests, OrderedDict, urlencode, urljoin, HTTPConnection
+from kong.utils import uuid_or_string, add_url_params, sorted_ordered_dict, ensure_trailing_slash, URLBuilder, \
+    parse_query_parameters
 
 from faker import Factory
 from faker.providers import BaseProvider
 
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+# The simulator server runs on asyncio (Python 3.5+) and aiohttp; the asyncio client is tested in test_async.py
+if sys.version_info >= (3, 5) and aiohttp is not None:
+    from kong.server import SimulatorServer
+else:  # pragma: no cover
+    SimulatorServer = None
+
+requires_simulator_server = skipIf(SimulatorServer is None, 'The simulator server requires Python 3.5+ and aiohttp')
+
 ############################### LOGGING ####################################
 LOG_HTTP_REQUESTS = os.getenv('LOG_HTTP_REQUESTS', '0') == '1'
 if LOG_HTTP_REQUESTS:
@@ -305,6 +349,32 @@ class KongAdminTesting(object):
                 sorted([item['id'] for item in found]),
                 sorted([item['id'] for item in self.client.apis.list().get('data')]))
 
+        def test_iterate_prefetch(self):
+            amount = 7
+
+            for i in range(amount):
+                self.client.apis.create(upstream_url=fake.url(), name=fake.api_name(), request_host=fake.domain_name())
+
+            found = list(self.client.apis.iterate(window_size=2, prefetch=2))
+
+            self.assertEqual(len(found), amount)
+            self.assertEqual(
+                [item['id'] for item in found],
+                [item['id'] for item in self.client.apis.iterate(window_size=2)])
+
+        def test_iterate_adaptive(self):
+            amount = 7
+
+            for i in range(amount):
+                self.client.apis.create(upstream_url=fake.url(), name=fake.api_name(), request_host=fake.domain_name())
+
+            page_size = AdaptivePageSize(initial_size=2, min_size=1, max_size=4)
+            found = list(self.client.apis.iterate(adaptive=page_size))
+
+            self.assertEqual(len(found), amount)
+            self.assertEqual(sum(items for size, items, elapsed, nbytes in page_size.history), amount)
+            self.assertTrue(1 <= page_size.size <= 4)
+
         def test_iterate_filtered(self):
             amount = 5
 
@@ -810,6 +880,20 @@ class KongAdminTesting(object):
                 sorted([item['id'] for item in found]),
                 sorted([item['id'] for item in self.client.consumers.list().get('data')]))
 
+        def test_bulk_create(self):
+            usernames = ['%s%d' % (fake.username(), i) for i in range(20)]
+            specs = [{'username': username, 'custom_id': fake.uuid4()} for username in usernames]
+            specs.append({'username': usernames[0]})
+
+            results = list(self.client.consumers.bulk_create(iter(specs), concurrency=4))
+
+            self.assertEqual(len(results), 21)
+            self.assertEqual(len([result for result in results if result.succeeded]), 20)
+            self.assertEqual(len([result for result in results if result.conflict]), 1)
+            self.assertEqual(self.client.consumers.count(), 20)
+            self.assertEqual(
+                sorted(result.result['username'] for result in results if result.succeeded), sorted(usernames))
+
         def test_delete(self):
             usernames = [fake.username() for i in range(2)]
             custom_ids = [fake.uuid4() for i in range(2)]
@@ -1314,6 +1398,1629 @@ class UtilTestCase(TestCase):
         self.assertEqual(result, expected_result)
 
 
+    def test_url_builder(self):
+        params = {
+            'size': 100,
+            'offset': str(uuid.uuid4()),
+            'name': 'hello🔥💩💣',
+            'enabled': True,
+            'config': {'a': 1},
+        }
+        for api_url in ['http://localhost:8001', 'http://localhost:8001/', 'http://example.com/kong/']:
+            builder = URLBuilder(api_url)
+            for path in [(), ('apis',), ('apis', 'example', 'plugins'), ('consumers', uuid.uuid4(), 'keyauth')]:
+                expected_url = ensure_trailing_slash(urljoin(api_url, '/'.join(six.text_type(p) for p in path)))
+                self.assertEqual(builder.build(*path), add_url_params(expected_url, {}))
+                self.assertEqual(builder.build(*path, **params), add_url_params(expected_url, params))
+
+
+class SimulatorDataStoreTestCase(TestCase):
+    def setUp(self):
+        self.store = SimulatorDataStore('http://localhost:8001/consumers/', unique_keys=('username', 'custom_id'))
+
+    def create(self, username=None, custom_id=None):
+        return self.store.create({'username': username, 'custom_id': custom_id},
+                                 check_conflict_keys=('username', 'custom_id'))
+
+    def test_lookup_by_unique_key(self):
+        bob = self.create(username='bob')
+        self.create(custom_id='1234')
+        self.create(custom_id='5678')  # Multiple records can leave a unique field empty
+
+        self.assertEqual(self.store.retrieve('bob', 'username')['id'], bob['id'])
+        self.assertEqual(self.store.retrieve(bob['id'], 'username')['id'], bob['id'])
+        self.assertIsNone(self.store.retrieve('alice', 'username'))
+        self.assertRaises(ConflictError, self.create, username='bob')
+        self.assertRaises(ConflictError, self.create, custom_id='1234')
+
+    def test_update_reindexes(self):
+        bob = self.create(username='bob')
+        self.store.update('bob', 'username', {'username': 'alice'})
+
+        self.assertIsNone(self.store.retrieve('bob', 'username'))
+        self.assertEqual(self.store.retrieve('alice', 'username')['id'], bob['id'])
+        self.create(username='bob')
+        self.assertRaises(ConflictError, self.create, username='alice')
+
+    def test_delete_unindexes(self):
+        self.create(username='bob')
+        self.store.delete('bob', 'username')
+
+        self.assertEqual(self.store.count(), 0)
+        self.assertIsNone(self.store.retrieve('bob', 'username'))
+        self.create(username='bob')
+
+
+    def iterate(self, size, **filter_fields):
+        offset = None
+        while True:
+            page = self.store.list(size, offset, **filter_fields)
+            self.assertLessEqual(len(page['data']), size)
+            for item in page['data']:
+                yield item
+            if 'next' not in page:
+                return
+            offset = parse_query_parameters(page['next'])['offset'][0]
+
+    def test_list_pages(self):
+        ids = [self.store.create({'username': 'user%d' % i, 'custom_id': None, 'group': i % 3})['id']
+               for i in range(200)]
+        for i in range(0, 200, 3):
+            self.store.delete(ids[i], 'username')
+        del ids[::3]
+
+        self.assertEqual([item['id'] for item in self.iterate(7)], ids)
+        self.assertEqual([item['id'] for item in self.iterate(5, group=1)],
+                         [id for id in ids if self.store.retrieve(id, None)['group'] == 1])
+        self.assertEqual(self.store.list(1000, None)['data'], [self.store.retrieve(id, None) for id in ids])
+        self.assertRaises(ValueError, self.store.list, 10, str(uuid.uuid4()))
+
+
+class TransportTestCase(TestCase):
+    def test_shared_transport(self):
+        client = KongAdminClient(API_URL)
+        transport = client.transport
+        self.assertTrue(isinstance(transport, Transport))
+
+        # All admin clients and the admin clients they hand out should share the same connection pool
+        self.assertIs(client.apis.transport, transport)
+        self.assertIs(client.consumers.transport, transport)
+        self.assertIs(client.plugins.transport, transport)
+        self.assertIs(client.apis.plugins(fake.api_name()).transport, transport)
+        self.assertIs(client.consumers.basic_auth(fake.username()).transport, transport)
+        self.assertIs(client.consumers.key_auth(fake.username()).transport, transport)
+        self.assertIs(client.consumers.oauth2(fake.username()).transport, transport)
+
+        session = transport.session
+        self.assertIs(client.consumers.key_auth(fake.username()).session, session)
+
+        # Destroying a child admin should not tear down the shared pool
+        client.consumers.key_auth(fake.username()).destroy()
+        self.assertIs(transport.session, session)
+
+        client.close()
+        self.assertIsNone(transport._session)
+
+    def test_injected_transport_is_not_closed(self):
+        transport = Transport(API_URL)
+        session = transport.session
+
+        client = KongAdminClient(API_URL, transport=transport)
+        self.assertIs(client.apis.transport, transport)
+        client.close()
+
+        self.assertIs(transport.session, session)
+        transport.close()
+
+
+class RateLimiterTestCase(TestCase):
+    def test_token_bucket(self):
+        now = [0.0]
+        limiter = RateLimiter(rate=10, burst=2, clock=lambda: now[0])
+
+        # The bucket starts full
+        self.assertEqual(limiter.try_acquire(), 0)
+        self.assertEqual(limiter.try_acquire(), 0)
+        self.assertAlmostEqual(limiter.try_acquire(), 0.1)
+
+        now[0] += 0.05
+        self.assertAlmostEqual(limiter.try_acquire(), 0.05)
+
+        now[0] += 0.05
+        self.assertEqual(limiter.try_acquire(), 0)
+
+        # Never refills beyond the burst size
+        now[0] += 10
+        self.assertEqual(limiter.try_acquire(), 0)
+        self.assertEqual(limiter.try_acquire(), 0)
+        self.assertGreater(limiter.try_acquire(), 0)
+
+    def test_max_in_flight(self):
+        limiter = RateLimiter(rate=1000, burst=1000, max_in_flight=3)
+        lock = threading.Lock()
+        in_flight = [0]
+        observed = []
+
+        def worker():
+            for i in range(20):
+                with limiter:
+                    with lock:
+                        in_flight[0] += 1
+                        observed.append(in_flight[0])
+                    time.sleep(0.0005)
+                    with lock:
+                        in_flight[0] -= 1
+
+        threads = [threading.Thread(target=worker) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(observed), 160)
+        self.assertTrue(max(observed) <= 3)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_transport_uses_own_limiter(self):
+        limiter = RateLimiter(rate=5)
+        client = KongAdminClient(API_URL, rate_limiter=limiter)
+        self.assertIs(client.transport.rate_limiter, limiter)
+
+
+class PagedCollection(CollectionMixin):
+    """
+    Collection of integers that records the pages requested from it
+    """
+    def __init__(self, amount, fail_at_offset=None):
+        self.amount = amount
+        self.fail_at_offset = fail_at_offset
+        self.requested = []
+
+    def list(self, size=100, offset=None, **filter_fields):
+        offset = int(offset or 0)
+        self.requested.append(offset)
+        if offset == self.fail_at_offset:
+            raise ServerError('Page %d is unavailable' % offset)
+
+        result = {'data': list(range(offset, min(offset + size, self.amount)))}
+        if offset + size < self.amount:
+            result['next'] = 'http://localhost:8001/consumers/?size=%d&offset=%d' % (size, offset + size)
+        return result
+
+
+class CollectionMixinTestCase(TestCase):
+    def wait_for_requests(self, collection, amount):
+        for i in range(500):
+            if len(collection.requested) >= amount:
+                break
+            time.sleep(0.001)
+
+    def test_iterate(self):
+        collection = PagedCollection(25)
+        self.assertEqual(list(collection.iterate(window_size=10)), list(range(25)))
+        self.assertEqual(collection.requested, [0, 10, 20])
+
+    def test_iterate_prefetch(self):
+        collection = PagedCollection(100)
+        iterator = collection.iterate(window_size=10, prefetch=2)
+
+        self.assertEqual(next(iterator), 0)
+
+        # While the first page is being processed, the next two pages are fetched in the background (and no more)
+        self.wait_for_requests(collection, 3)
+        time.sleep(0.01)
+        self.assertEqual(collection.requested, [0, 10, 20])
+
+        self.assertEqual(list(iterator), list(range(1, 100)))
+        self.assertEqual(collection.requested, list(range(0, 100, 10)))
+
+    def test_iterate_prefetch_error(self):
+        collection = PagedCollection(100, fail_at_offset=30)
+
+        found = []
+        with self.assertRaises(ServerError):
+            for item in collection.iterate(window_size=10, prefetch=1):
+                found.append(item)
+        self.assertEqual(found, list(range(30)))
+
+    def test_iterate_prefetch_stop_early(self):
+        collection = PagedCollection(1000)
+        iterator = collection.iterate(window_size=10, prefetch=1)
+        self.assertEqual(next(iterator), 0)
+        iterator.close()
+
+        # The background fetching should stop as well
+        time.sleep(0.02)
+        self.assertTrue(len(collection.requested) <= 3)
+
+    def test_iterate_prefetch_timeouts(self):
+        timeouts = []
+
+        class TimedCollection(PagedCollection):
+            transport = Transport(API_URL)
+
+            def list(self, size=100, offset=None, **filter_fields):
+                timeouts.append(self.transport.get_timeout())
+                return super(TimedCollection, self).list(size=size, offset=offset, **filter_fields)
+
+        # The pages fetched in the background are requested within the caller's timeouts
+        collection = TimedCollection(25)
+        with collection.transport.timeouts(timeout=1):
+            self.assertEqual(list(collection.iterate(window_size=10, prefetch=1)), list(range(25)))
+        self.assertEqual(timeouts, [1, 1, 1])
+
+
+class AdaptivePageSizeTestCase(TestCase):
+    class TimedCollection(PagedCollection):
+        """
+        Every item takes 10ms and 1kB to transfer
+        """
+        def __init__(self, amount):
+            super(AdaptivePageSizeTestCase.TimedCollection, self).__init__(amount)
+            self.now = 0.0
+            self.transport = self
+
+        def clock(self):
+            return self.now
+
+        def list(self, size=100, offset=None, **filter_fields):
+            result = super(AdaptivePageSizeTestCase.TimedCollection, self).list(size, offset, **filter_fields)
+            self.now += 0.01 * len(result['data'])
+            self.last_response_size = 1024 * len(result['data'])
+            return result
+
+    def test_grow(self):
+        collection = self.TimedCollection(10000)
+        page_size = AdaptivePageSize(initial_size=10, max_size=1000, target_latency=1.0, clock=collection.clock)
+
+        self.assertEqual(len(list(collection.iterate(adaptive=page_size))), 10000)
+
+        # Doubles at most per page, then settles at 100 items (1 second) per page
+        self.assertEqual([size for size, items, elapsed, nbytes in page_size.history[:5]], [10, 20, 40, 80, 100])
+        self.assertEqual(page_size.size, 100)
+
+    def test_shrink(self):
+        collection = self.TimedCollection(10000)
+        page_size = AdaptivePageSize(initial_size=1000, target_latency=1.0, clock=collection.clock)
+
+        list(collection.iterate(adaptive=page_size))
+        self.assertEqual([size for size, items, elapsed, nbytes in page_size.history[:3]], [1000, 500, 250])
+        self.assertEqual(page_size.size, 100)
+
+    def test_max_bytes(self):
+        collection = self.TimedCollection(10000)
+        page_size = AdaptivePageSize(initial_size=10, target_latency=1.0, max_bytes=32 * 1024, clock=collection.clock)
+
+        list(collection.iterate(adaptive=page_size))
+        self.assertEqual(page_size.size, 32)
+
+    def test_bounds(self):
+        page_size = AdaptivePageSize(initial_size=50, min_size=20, max_size=60, target_latency=1.0)
+        page_size.observe(50, 50, 0.01)
+        self.assertEqual(page_size.size, 60)
+        page_size.observe(60, 60, 100)
+        self.assertEqual(page_size.size, 30)
+        page_size.observe(30, 30, 100)
+        self.assertEqual(page_size.size, 20)
+
+        # Partial pages don't change the size
+        page_size.observe(20, 5, 0.01)
+        self.assertEqual(page_size.size, 20)
+
+
+class BulkTestCase(TestCase):
+    def test_bulk_apply(self):
+        lock = threading.Lock()
+        in_flight = [0, 0]
+
+        def create(value):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            time.sleep(0.001)
+            with lock:
+                in_flight[0] -= 1
+            if value % 10 == 0:
+                raise ConflictError(value)
+            if value % 7 == 0:
+                raise ValueError(value)
+            return value * 2
+
+        results = list(bulk_apply(create, ({'value': i} for i in range(1, 101)), concurrency=5))
+
+        self.assertEqual(len(results), 100)
+        self.assertTrue(in_flight[1] <= 5)
+        self.assertEqual(len([result for result in results if result.conflict]), 10)
+        self.assertEqual(len([result for result in results if not result.succeeded and not result.conflict]), 13)
+        self.assertTrue(all(result.result == result.spec['value'] * 2 for result in results if result.succeeded))
+
+
+class TTLCacheTestCase(TestCase):
+    def test_aliases(self):
+        cache = TTLCache(maxsize=10, ttl=None)
+        cache.set(['id1', 'name1'], 'value1')
+
+        self.assertEqual(cache.get('id1'), 'value1')
+        self.assertEqual(cache.get('name1'), 'value1')
+        self.assertIsNone(cache.get('name2'))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+        # Invalidating one key drops the entry under all of its keys
+        cache.invalidate('name1')
+        self.assertIsNone(cache.get('id1'))
+        self.assertEqual(len(cache), 0)
+
+    def test_lru(self):
+        cache = TTLCache(maxsize=2, ttl=None)
+        cache.set(['a'], 1)
+        cache.set(['b'], 2)
+        cache.get('a')
+        cache.set(['c'], 3)
+
+        self.assertEqual(cache.evictions, 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_ttl(self):
+        now = [0]
+        cache = TTLCache(ttl=10, clock=lambda: now[0])
+        cache.set(['a'], 1)
+
+        now[0] = 9
+        self.assertEqual(cache.get('a'), 1)
+        now[0] = 10
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.expirations, 1)
+
+
+class CachingKongAdminTestCase(TestCase):
+    def setUp(self):
+        self.backend = KongAdminSimulator()
+        self.client = CachingKongAdmin(self.backend, maxsize=100, ttl=None)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_consumer_retrieve(self):
+        consumer = self.client.consumers.create(username='bob', custom_id='1234')
+
+        self.assertEqual(self.client.consumers.retrieve('bob')['id'], consumer['id'])
+        self.assertEqual(self.client.consumers.retrieve(consumer['id'])['username'], 'bob')
+        self.assertEqual(self.client.consumers.retrieve(uuid.UUID(consumer['id']))['username'], 'bob')
+        self.assertEqual(self.client.consumers.cache.stats['hits'], 2)
+        self.assertEqual(self.client.consumers.cache.stats['misses'], 1)
+
+    def test_consumer_invalidation(self):
+        consumer = self.client.consumers.create(username='bob', custom_id='1234')
+        self.client.consumers.retrieve(consumer['id'])
+
+        self.client.consumers.update('bob', username='alice')
+        self.assertEqual(len(self.client.consumers.cache), 0)
+        self.assertEqual(self.client.consumers.retrieve(consumer['id'])['username'], 'alice')
+
+        self.client.consumers.delete('alice')
+        self.assertEqual(len(self.client.consumers.cache), 0)
+        self.assertEqual(self.client.consumers.count(), 0)
+
+    def test_record_invalidation(self):
+        consumer = self.client.consumers.create(username='bob', custom_id='1234')
+        self.client.consumers.retrieve('bob')
+
+        # The entries of an updated record are invalidated by its id and name, like those of a dict
+        self.client.consumers.invalidate(None, Consumer.from_dict(consumer))
+        self.assertEqual(len(self.client.consumers.cache), 0)
+
+    def test_api_invalidation(self):
+        api = self.client.apis.create(upstream_url=fake.url(), name='api1', request_host=fake.domain_name())
+        self.assertEqual(self.client.apis.retrieve('api1')['id'], api['id'])
+
+        upstream_url = ensure_trailing_slash(fake.url())
+        self.client.apis.create_or_update(upstream_url, api_id=api['id'], name='api1', request_host=api['request_host'])
+        self.assertEqual(self.client.apis.retrieve('api1')['upstream_url'], upstream_url)
+        self.assertEqual(self.client.apis.cache.misses, 2)
+
+
+class CannedResponse(object):
+    """
+    The part of requests.Response the admin clients and the retry policy rely on
+    """
+    def __init__(self, status_code, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def close(self):
+        pass
+
+
+class StubTransport(object):
+    """
+    Records the requests made through it and answers them with canned responses
+    """
+    def __init__(self, *responses):
+        self.requests = []
+        self.responses = list(responses)
+        self.last_response_size = None
+
+    def request(self, method, url, data=None, headers=None, **kwargs):
+        self.requests.append((method, url, data))
+        return self.responses.pop(0)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, data=None, **kwargs):
+        return self.request('POST', url, data=data, **kwargs)
+
+    def put(self, url, data=None, **kwargs):
+        return self.request('PUT', url, data=data, **kwargs)
+
+    def patch(self, url, data=None, **kwargs):
+        return self.request('PATCH', url, data=data, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def close(self):
+        pass
+
+
+def json_response(status_code, data=None):
+    return CannedResponse(status_code, json.dumps(data).encode('utf-8') if data is not None else b'')
+
+
+class SchemaCacheTestCase(TestCase):
+    class StubPluginAdmin(object):
+        def __init__(self, *enabled_plugins):
+            self.enabled_plugins = list(enabled_plugins)
+            self.calls = []
+
+        def list(self):
+            self.calls.append('list')
+            return {'enabled_plugins': self.enabled_plugins}
+
+        def retrieve_schema(self, plugin_name):
+            self.calls.append(plugin_name)
+            return {'fields': {'%s_field' % plugin_name: {'type': 'string'}}}
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = SchemaStore(os.path.join(self.directory, 'schemas'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_store(self):
+        self.assertIsNone(self.store.load('http://localhost:8001/', '0.8.3'))
+
+        self.store.save('http://localhost:8001/', '0.8.3', {'schemas': {'cors': {}}})
+        self.store.save('http://localhost:8001/', '0.8.3', {'schemas': {'cors': {'fields': {}}}})
+        self.assertEqual(self.store.load('http://localhost:8001/', '0.8.3')['schemas'], {'cors': {'fields': {}}})
+        self.assertIsNone(self.store.load('http://localhost:8001/', '0.9.0'))
+        self.assertIsNone(self.store.load('http://localhost:8002/', '0.8.3'))
+
+        # Temporary files are moved in place
+        self.assertEqual(len(os.listdir(self.store.directory)), 1)
+
+        with open(self.store.get_path('http://localhost:8001/', '0.8.3'), 'w') as f:
+            f.write('{"schemas": ')
+        self.assertIsNone(self.store.load('http://localhost:8001/', '0.8.3'))
+
+    def test_invalidation(self):
+        admin = self.StubPluginAdmin('cors', 'ssl')
+        plugins = CachingPluginAdmin(admin, self.store, 'http://localhost:8001/', version='0.8.3')
+        plugins.retrieve_schema('cors')
+        plugins.retrieve_schema('cors')
+        self.assertEqual(admin.calls, ['list', 'cors'])
+        self.assertEqual(plugins.stats, {'size': 1, 'hits': 1, 'misses': 1})
+
+        # Warm start
+        admin.calls = []
+        plugins = CachingPluginAdmin(admin, self.store, 'http://localhost:8001/', version='0.8.3')
+        self.assertEqual(plugins.retrieve_schema('cors'), {'fields': {'cors_field': {'type': 'string'}}})
+        self.assertEqual(admin.calls, ['list'])
+
+        # Another version, or another set of enabled plugins, starts from scratch
+        admin.calls = []
+        CachingPluginAdmin(admin, self.store, 'http://localhost:8001/', version='0.9.0').retrieve_schema('cors')
+        self.assertEqual(admin.calls, ['list', 'cors'])
+
+        admin.calls = []
+        admin.enabled_plugins.append('file-log')
+        plugins = CachingPluginAdmin(admin, self.store, 'http://localhost:8001/', version='0.8.3')
+        plugins.retrieve_schema('cors')
+        self.assertEqual(admin.calls, ['list', 'cors'])
+
+        # Listing the plugins picks up changes as well
+        admin.calls = []
+        admin.enabled_plugins.remove('ssl')
+        plugins.list()
+        plugins.retrieve_schema('cors')
+        self.assertEqual(admin.calls, ['list', 'cors'])
+
+    @requires_simulator_server
+    def test_client(self):
+        server = SimulatorServer(port=0).start()
+
+        def retrieve_schemas():
+            metrics = InMemoryMetrics()
+            client = CachingKongAdmin(KongAdminClient(server.url, metrics=metrics), schema_store=self.store)
+            try:
+                for plugin_name in ('cors', 'ssl', 'rate-limiting'):
+                    self.assertIn('fields', client.plugins.retrieve_schema(plugin_name))
+            finally:
+                client.close()
+            return dict((route, stats['count']) for (method, route), stats in metrics.summary().items())
+
+        try:
+            self.assertEqual(retrieve_schemas(), {'/': 1, '/plugins/': 1, '/plugins/{id}/schema/': 3})
+            self.assertEqual(retrieve_schemas(), {'/': 1, '/plugins/': 1})
+        finally:
+            server.stop()
+
+
+class PluginValidationTestCase(TestCase):
+    def setUp(self):
+        self.validator = PluginConfigValidator(KongAdminSimulator().plugins)
+
+    def assertErrors(self, plugin_name, fields, expected, partial=False):
+        with self.assertRaises(PluginConfigurationError) as context:
+            self.validator.validate(plugin_name, fields, partial=partial)
+        self.assertEqual(context.exception.errors, expected)
+
+    def test_types(self):
+        self.validator.validate('rate-limiting', {'minute': 20, 'hour': '1000'})
+        self.validator.validate('cors', {'credentials': 'true', 'methods': 'GET,POST', 'headers': ['X-Id']})
+        self.assertErrors('rate-limiting', {'minute': 'lots'}, [
+            "Invalid value for minute: expected number, got 'lots'"])
+        self.assertErrors('rate-limiting', {'minute': True}, ['Invalid value for minute: expected number, got True'])
+        self.assertErrors('cors', {'max_age': 60, 'origin': 1}, ['Invalid value for origin: expected string, got 1'])
+        self.assertErrors('http-log', {'http_endpoint': 'mockbin.org'},
+                          ["Invalid value for http_endpoint: expected url, got 'mockbin.org'"])
+
+    def test_enum(self):
+        self.validator.validate('http-log', {'http_endpoint': 'http://mockbin.org/', 'method': 'PUT'})
+        self.assertErrors('http-log', {'http_endpoint': 'http://mockbin.org/', 'method': 'GET'},
+                          ['Invalid value for method: GET not in PATCH, POST, PUT'])
+        self.assertErrors('cors', {'methods': ['GET', 'FETCH']}, [
+            'Invalid value for methods: FETCH not in DELETE, GET, HEAD, PATCH, POST, PUT'])
+
+    def test_required(self):
+        # Fields with a default are filled in by Kong
+        self.validator.validate('oauth2-authentication', {'scopes': ['email']})
+        self.assertErrors('tcp-log', {'timeout': 10}, [
+            'Missing required value field: host', 'Missing required value field: port'])
+        self.validator.validate('tcp-log', {'timeout': 10}, partial=True)
+
+    def test_nested(self):
+        self.validator.validate('response-transformer', {'add': {'headers': ['X-Id:1']}})
+        self.assertErrors('response-transformer', {'add': {'body': []}, 'remove': []}, [
+            'Unknown value field: add.body', 'Invalid value for remove: expected table, got []'])
+
+    def test_unknown(self):
+        self.assertErrors('rate-limiting', {'minuet': 20}, ['Unknown value field: minuet'])
+        self.assertErrors('rate-limitting', {'minute': 20}, ['Unknown plugin_name: rate-limitting'])
+
+    def test_simulator(self):
+        simulator = KongAdminSimulator()
+        simulator.apis.create('http://mockbin.org/', name='mockbin', request_host='mockbin.org')
+        plugins = simulator.apis.plugins('mockbin')
+
+        self.assertRaises(PluginConfigurationError, plugins.create, 'rate-limiting', minute='lots')
+        plugin = plugins.create('rate-limiting', minute=20)
+        self.assertRaises(ConflictError, plugins.create, 'rate-limiting', minuet=20)
+        self.assertRaises(PluginConfigurationError, plugins.update, plugin['id'], minuet=20)
+        self.assertEqual(plugins.update(plugin['id'], hour=1000)['config'], {'hour': 1000})
+
+    @requires_simulator_server
+    def test_client(self):
+        server = SimulatorServer(port=0).start()
+        metrics = InMemoryMetrics()
+        client = KongAdminClient(server.url, metrics=metrics, validate_plugins=True)
+
+        try:
+            client.apis.create('http://mockbin.org/', name='mockbin', request_host='mockbin.org')
+            plugins = client.apis.plugins('mockbin')
+            metrics.reset()
+
+            self.assertRaises(PluginConfigurationError, plugins.create, 'rate-limiting', minuet=20)
+            self.assertRaises(PluginConfigurationError, plugins.create_or_update, 'tcp-log', port=9999)
+            plugin = plugins.create('rate-limiting', minute=20)
+            self.assertRaises(PluginConfigurationError, plugins.update, plugin['id'], minute='lots')
+            self.assertEqual(plugins.update(plugin['id'], hour=1000)['config'], {'hour': 1000})
+
+            # The schemas are retrieved once, invalid configurations are never sent
+            summary = metrics.summary()
+            self.assertEqual(sum(stats['count'] for (method, route), stats in summary.items()
+                                 if route.startswith('/plugins/')), 2)
+            self.assertEqual(sum(stats['count'] for (method, route), stats in summary.items() if method != 'GET'), 2)
+
+            # The server validates with the same code, for clients that don't
+            self.assertRaises(ValueError, client.apis.plugins('mockbin').create, 'tcp-log', port=9999)
+        finally:
+            client.close()
+            server.stop()
+
+
+class RecordsTestCase(TestCase):
+    def test_record(self):
+        data = {'id': '1', 'consumer_id': '2', 'key': 'abc', 'created_at': 1472563811000}
+        record = KeyAuth.from_dict(data)
+
+        self.assertEqual(record.key, 'abc')
+        self.assertEqual(record['key'], 'abc')
+        self.assertEqual(record, data)
+        self.assertEqual(record.to_dict(), data)
+        self.assertLess(sys.getsizeof(record), sys.getsizeof(data))
+        self.assertRaises(AttributeError, setattr, record, 'secret', 'abc')
+
+    def test_missing_and_unknown_fields(self):
+        record = Consumer.from_dict({'id': '1', 'username': 'bob', 'tags': ['admin']})
+
+        self.assertIsNone(record.custom_id)
+        self.assertNotIn('custom_id', record)
+        self.assertRaises(KeyError, lambda: record['custom_id'])
+        self.assertIsNone(record.get('custom_id'))
+        self.assertEqual(record['tags'], ['admin'])
+        self.assertEqual(sorted(record), ['id', 'tags', 'username'])
+        self.assertEqual(record_to_dict(record), {'id': '1', 'username': 'bob', 'tags': ['admin']})
+        self.assertEqual(copy.copy(record), record)
+        self.assertEqual(pickle.loads(pickle.dumps(record)), record)
+
+    def test_config(self):
+        config = {'methods': ['GET'], 'max_age': 60}
+        record = PluginConfiguration.from_dict({'id': '1', 'name': 'cors', 'config': config})
+
+        # The decoded config is kept as is
+        self.assertIs(record.config, config)
+        self.assertIs(record['config'], record.config)
+        self.assertEqual(record.to_dict()['config'], config)
+
+    @requires_simulator_server
+    def test_client(self):
+        server = SimulatorServer(port=0).start()
+        client = KongAdminClient(server.url, records=True)
+
+        try:
+            api = client.apis.create('http://mockbin.org/', name='mockbin', request_host='mockbin.org')
+            self.assertIsInstance(api, Api)
+            self.assertIsInstance(client.apis.plugins('mockbin').create('rate-limiting', minute=20),
+                                  PluginConfiguration)
+            self.assertIsInstance(client.consumers.create(username='bob'), Consumer)
+            self.assertIsInstance(client.consumers.key_auth('bob').create(key='abc'), KeyAuth)
+            self.assertIsInstance(client.consumers.basic_auth('bob').create('bob', 'secret'), BasicAuth)
+            self.assertIsInstance(client.consumers.oauth2('bob').create('app', 'https://example.com/'), OAuth2App)
+
+            page = client.consumers.key_auth('bob').list()
+            self.assertEqual([type(record) for record in page['data']], [KeyAuth])
+            self.assertEqual([record.key for record in client.consumers.key_auth('bob').iterate()], ['abc'])
+            self.assertEqual(client.apis.plugins('mockbin').retrieve(
+                client.apis.plugins('mockbin').list()['data'][0].id).config, {'minute': 20})
+        finally:
+            client.close()
+            server.stop()
+
+
+class ConsumerTableTestCase(TestCase):
+    def setUp(self):
+        self.simulator = KongAdminSimulator()
+        for i in range(10):
+            self.simulator.consumers.create(username='user%d' % i, custom_id='c%d' % i if i < 6 else None)
+            if i % 2:
+                self.simulator.consumers.key_auth('user%d' % i).create(key='key%d' % i)
+            if i % 3 == 0:
+                self.simulator.consumers.oauth2('user%d' % i).create('app', 'https://example.com/')
+        self.table = ConsumerTable.load(self.simulator, concurrency=4, page_size=3)
+
+    def get_usernames(self, rows):
+        return sorted(record['username'] for record in self.table.records(rows))
+
+    def test_load(self):
+        self.assertEqual(len(self.table), 10)
+        self.assertEqual(len(self.table.pools['custom_id']), 6)
+
+        consumer = self.simulator.consumers.retrieve('user3')
+        row = self.table.get_row(consumer['id'])
+        self.assertEqual(self.table.get(row), dict(consumer, credentials={'basic_auth': 0, 'key_auth': 1, 'oauth2': 1}))
+        self.assertIsNone(self.table.get_row(uuid.uuid4()))
+        self.assertRaises(ValueError, self.table.append, consumer)
+
+    def test_queries(self):
+        table = self.table
+        self.assertEqual(self.get_usernames(table.without_credentials(KEY_AUTH)),
+                         ['user0', 'user2', 'user4', 'user6', 'user8'])
+        self.assertEqual(self.get_usernames(table.with_credentials(KEY_AUTH) & table.with_credentials(OAUTH2)),
+                         ['user3', 'user9'])
+        odd = table.where('custom_id', lambda custom_id: int(custom_id[1:]) % 2)
+        self.assertEqual(self.get_usernames(odd - table.where('username', 'user5')), ['user1', 'user3'])
+        self.assertEqual(self.get_usernames(table.where('username', lambda username: username > 'user7') |
+                                            table.missing('custom_id')), ['user6', 'user7', 'user8', 'user9'])
+        self.assertFalse(table.where('username', 'bob'))
+        self.assertEqual(len(table.all()), 10)
+        self.assertRaises(ValueError, table.where, 'key', 'key1')
+
+    def test_row_set(self):
+        rows = RowSet.from_rows(20, [0, 3, 8, 19])
+        self.assertEqual(list(rows), [0, 3, 8, 19])
+        self.assertEqual(len(rows), 4)
+        self.assertIn(8, rows)
+        self.assertNotIn(9, rows)
+        self.assertEqual(list(~rows & RowSet.from_rows(20, range(6))), [1, 2, 4, 5])
+        self.assertEqual(list(rows ^ RowSet.from_rows(20, [3, 4])), [0, 4, 8, 19])
+        self.assertEqual(RowSet.all(20) - rows, ~rows)
+        self.assertRaises(ValueError, lambda: rows | RowSet(10))
+
+
+class JSONCodecTestCase(TestCase):
+    def test_codecs(self):
+        document = {'id': '1', 'username': 'bøb', 'tags': ['a', 'b'], 'enabled': True, 'config': {'minute': 1.5}}
+        for codec in CODECS.values():
+            self.assertEqual(codec.loads(json.dumps(document).encode('utf-8')), document)
+            self.assertEqual(codec.loads(json.dumps(document)), document)
+            self.assertEqual(json.loads(codec.dumps(document)), document)
+            self.assertIsInstance(codec.dumps(document), six.text_type)
+
+    def test_get_codec(self):
+        self.assertIs(get_codec('json'), STDLIB_CODEC)
+        self.assertIs(get_codec(STDLIB_CODEC), STDLIB_CODEC)
+        self.assertIs(get_codec(), list(CODECS.values())[0])
+        self.assertRaises(ValueError, get_codec, 'simplejson')
+
+        os.environ['KONG_JSON_CODEC'] = 'json'
+        try:
+            self.assertIs(get_codec(), STDLIB_CODEC)
+        finally:
+            del os.environ['KONG_JSON_CODEC']
+
+    def test_add_url_params(self):
+        class ReversingCodec(JSONCodec):
+            def dumps(self, value):
+                return super(ReversingCodec, self).dumps(value)[::-1]
+
+        self.assertEqual(add_url_params('http://localhost/', {'a': True}, codec=ReversingCodec()),
+                         'http://localhost/?a=eurt')
+        self.assertEqual(add_url_params('http://localhost/', {'a': True}), 'http://localhost/?a=true')
+
+    @requires_simulator_server
+    def test_client(self):
+        server = SimulatorServer(port=0).start()
+        try:
+            for name in CODECS:
+                client = KongAdminClient(server.url, json_codec=name)
+                try:
+                    self.assertIs(client.consumers.json_codec, CODECS[name])
+                    consumer = client.consumers.create(username='bob-%s' % name)
+                    self.assertIs(client.consumers.key_auth(consumer['id']).json_codec, CODECS[name])
+                    self.assertEqual(client.consumers.retrieve(consumer['id']), consumer)
+                    self.assertEqual(client.node_info()['version'], 'simulator')
+                finally:
+                    client.close()
+        finally:
+            server.stop()
+
+
+class StreamingTestCase(TestCase):
+    PAGE = {
+        'total': 3,
+        'data': [
+            {'id': '1', 'username': 'b\\"o}b', 'tags': ['[', {'a': None}], 'enabled': True},
+            {'id': '2', 'username': 'ålice', 'created_at': 1472563811000, 'config': {}},
+            {'id': '3', 'custom_id': '', 'score': -1.5e3},
+        ],
+        'next': 'http://localhost:8001/consumers/?offset=3&size=3',
+    }
+
+    class StubResponse(object):
+        def __init__(self, content, chunk_size):
+            self.chunks = [content[i:i + chunk_size] for i in range(0, len(content), chunk_size)]
+            self.read = 0
+            self.closed = False
+            self.url = 'http://localhost:8001/consumers/'
+
+        def iter_content(self, chunk_size=None):
+            for chunk in self.chunks:
+                self.read += 1
+                yield chunk
+
+        def close(self):
+            self.closed = True
+
+    def test_parser(self):
+        for content in (json.dumps(self.PAGE).encode('utf-8'), json.dumps(self.PAGE, indent=2).encode('utf-8')):
+            for chunk_size in range(1, 40):
+                parser = PageParser()
+                items = []
+                for i in range(0, len(content), chunk_size):
+                    items.extend(parser.feed(content[i:i + chunk_size]))
+                parser.close()
+                self.assertEqual(items, self.PAGE['data'])
+                self.assertEqual(parser.fields, {'total': 3, 'next': self.PAGE['next']})
+
+    def test_invalid(self):
+        for content in (b'[]', b'{"data": [{"id": 1}', b'{"data": []} {}', b'{"data" []}', b'{"data": [{"id": "1}]}'):
+            def parse():
+                parser = PageParser()
+                parser.feed(content)
+                parser.close()
+            self.assertRaises(ValueError, parse)
+
+    def test_streamed_page(self):
+        content = json.dumps(OrderedDict([('data', self.PAGE['data']), ('next', self.PAGE['next'])])).encode('utf-8')
+        response = self.StubResponse(content, 16)
+        page = StreamedPage(response, STDLIB_CODEC)
+        items = page['data']
+
+        # Items are yielded before the rest of the page is read
+        self.assertEqual(next(items), self.PAGE['data'][0])
+        self.assertLess(response.read, len(response.chunks) / 2)
+
+        # Asking for a field reads ahead, keeping the items
+        self.assertEqual(page['next'], self.PAGE['next'])
+        self.assertEqual(page.get('total', 0), 0)
+        self.assertEqual(list(items), self.PAGE['data'][1:])
+        self.assertTrue(response.closed)
+
+    @requires_simulator_server
+    def test_client(self):
+        server = SimulatorServer(port=0).start()
+        client = KongAdminClient(server.url)
+        try:
+            for i in range(25):
+                client.consumers.create(username='user%d' % i)
+            expected = list(client.consumers.iterate(window_size=10))
+            self.assertEqual(len(expected), 25)
+            self.assertEqual(list(client.consumers.iterate(window_size=10, stream=True)), expected)
+            self.assertEqual(list(client.consumers.iterate(window_size=10, stream=True, username='user7')),
+                             [consumer for consumer in expected if consumer['username'] == 'user7'])
+
+            page = client.consumers.list(size=10, stream=True)
+            self.assertIsInstance(page, StreamedPage)
+            self.assertEqual(list(page['data']), expected[:10])
+            self.assertIsNotNone(page['next'])
+
+            # Stopping early releases the connection
+            for consumer in client.consumers.list(size=10, stream=True)['data']:
+                break
+            self.assertEqual(client.consumers.count(), 25)
+
+            self.assertRaises(AssertionError, list, client.consumers.iterate(stream=True, prefetch=1))
+
+            records_client = KongAdminClient(server.url, records=True)
+            try:
+                consumers = list(records_client.consumers.iterate(window_size=10, stream=True))
+                self.assertIsInstance(consumers[0], Consumer)
+                self.assertEqual(consumers, expected)
+            finally:
+                records_client.close()
+        finally:
+            client.close()
+            server.stop()
+
+
+class NameResolverTestCase(TestCase):
+    def test_is_uuid(self):
+        self.assertTrue(is_uuid(uuid.uuid4()))
+        self.assertTrue(is_uuid(str(uuid.uuid4())))
+        self.assertFalse(is_uuid('bob'))
+        self.assertFalse(is_uuid(None))
+
+    def test_resolve(self):
+        resolver = NameResolver('username')
+        id = str(uuid.uuid4())
+
+        self.assertEqual(resolver.resolve('bob'), 'bob')
+        resolver.remember({'id': id, 'username': 'bob'})
+        self.assertEqual(resolver.resolve('bob'), id)
+        self.assertEqual(resolver.resolve(uuid.UUID(id)), id)
+
+        # Renames replace the old name
+        resolver.remember({'id': id, 'username': 'alice'})
+        self.assertEqual(resolver.resolve('bob'), 'bob')
+        self.assertEqual(resolver.resolve('alice'), id)
+        self.assertEqual(len(resolver), 1)
+
+        resolver.forget(id)
+        self.assertEqual(resolver.resolve('alice'), 'alice')
+        self.assertEqual(len(resolver), 0)
+
+    def test_reused_name(self):
+        resolver = NameResolver('name')
+        resolver.remember({'id': '1', 'name': 'x'})
+        resolver.remember({'id': '2', 'name': 'x'})
+        self.assertEqual(resolver.resolve('x'), '2')
+
+        # Renaming the record that had the name before doesn't evict the one that has it now
+        resolver.remember({'id': '1', 'name': 'y'})
+        self.assertEqual(resolver.resolve('x'), '2')
+        self.assertEqual(resolver.resolve('y'), '1')
+
+        resolver.forget('x')
+        resolver.remember({'id': '1', 'name': 'z'})
+        self.assertEqual(resolver.resolve('x'), 'x')
+        self.assertEqual(resolver.resolve('z'), '1')
+
+    def test_warm(self):
+        simulator = KongAdminSimulator()
+        consumers = [simulator.consumers.create(username='user%d' % i) for i in range(25)]
+
+        resolver = NameResolver('username')
+        resolver.warm(simulator.consumers, window_size=10)
+
+        self.assertEqual(len(resolver), 25)
+        self.assertEqual(resolver.resolve('user7'), consumers[7]['id'])
+
+    def test_client(self):
+        id = str(uuid.uuid4())
+        transport = StubTransport(
+            json_response(201, {'id': id, 'username': 'bob'}),
+            json_response(200, {'id': id, 'username': 'bob'}),
+            json_response(500, {'message': 'An unexpected error occurred'}),
+            json_response(204))
+        client = KongAdminClient(API_URL, transport=transport, resolve_names=True)
+
+        client.consumers.create(username='bob')
+        client.consumers.retrieve('bob')
+        self.assertEqual(transport.requests[1][1], '%s/consumers/%s/' % (API_URL, id))
+        self.assertEqual(client.consumers.key_auth('bob').consumer_id, id)
+
+        # A failed delete keeps the name, the consumer still exists
+        self.assertRaises(ValueError, client.consumers.delete, 'bob')
+        self.assertEqual(client.consumers.resolve('bob'), id)
+
+        client.consumers.delete('bob')
+        self.assertEqual(transport.requests[3][1], '%s/consumers/%s/' % (API_URL, id))
+        self.assertEqual(client.consumers.resolve('bob'), 'bob')
+
+
+class SimulatorProfileTestCase(TestCase):
+    def test_lookup(self):
+        settings = {'*': 1, '*.list': 2, 'consumers.*': 3, 'consumers.key_auth.*': 4, 'consumers.create': 5}
+
+        self.assertEqual(lookup(settings, 'consumers.create'), 5)
+        self.assertEqual(lookup(settings, 'consumers.key_auth.create'), 4)
+        self.assertEqual(lookup(settings, 'consumers.basic_auth.create'), 3)
+        self.assertEqual(lookup(settings, 'apis.list'), 2)
+        self.assertEqual(lookup(settings, 'apis.create'), 1)
+        self.assertIsNone(lookup({}, 'apis.create'))
+
+    def test_decide(self):
+        def decisions(seed):
+            profile = SimulatorProfile(
+                latency={'*': uniform(0.1, 0.2)}, error_rates={SERVER_ERROR: 0.2, CONFLICT: 0.2, DISCONNECT: 0.2},
+                seed=seed)
+            return [profile.decide('consumers.create') for _ in range(100)], profile
+
+        faults, profile = decisions(42)
+        self.assertEqual(faults, decisions(42)[0])
+        self.assertTrue(all(0.1 <= fault.delay <= 0.2 for fault in faults))
+        self.assertEqual(set(fault.error for fault in faults), set([None, SERVER_ERROR, CONFLICT, DISCONNECT]))
+        self.assertEqual(sum(profile.injected.values()), sum(1 for fault in faults if fault.error is not None))
+
+        # Reads never conflict
+        self.assertNotIn(CONFLICT, [profile.decide('consumers.retrieve').error for _ in range(100)])
+
+    def test_simulator(self):
+        simulator = KongAdminSimulator(profile=SimulatorProfile(
+            latency={'apis.list': fixed(0.05)},
+            error_rates={
+                'consumers.create': {CONFLICT: 1},
+                'consumers.key_auth.*': {SERVER_ERROR: 1},
+                'consumers.delete': {DISCONNECT: 1},
+            }))
+
+        self.assertRaises(ConflictError, simulator.consumers.create, username='bob')
+        consumer = simulator.consumers.create_or_update(username='bob')
+        self.assertEqual(simulator.consumers.retrieve('bob')['id'], consumer['id'])
+        self.assertEqual(len(list(simulator.consumers.iterate())), 1)
+        self.assertRaises(ServerError, simulator.consumers.key_auth('bob').create)
+        self.assertRaises(ServerError, list, simulator.consumers.key_auth('bob').iterate())
+        self.assertRaises(ConnectionDroppedError, simulator.consumers.delete, 'bob')
+        self.assertTrue(all(result.conflict for result in simulator.consumers.bulk_create([{'username': 'alice'}])))
+
+        started = time.time()
+        self.assertEqual(simulator.apis.count(), 0)
+        self.assertGreaterEqual(time.time() - started, 0.05)
+
+    def test_max_rate(self):
+        simulator = KongAdminSimulator(profile=SimulatorProfile(max_rate=100))
+
+        started = time.time()
+        for _ in range(11):
+            simulator.apis.count()
+        self.assertGreaterEqual(time.time() - started, 0.09)
+
+    @requires_simulator_server
+    def test_server(self):
+        server = SimulatorServer(port=0, profile=SimulatorProfile(
+            latency={'*.retrieve': fixed(0.05)},
+            error_rates={'consumers.create': {SERVER_ERROR: 1}, 'consumers.list': {DISCONNECT: 1}})).start()
+        client = KongAdminClient(server.url)
+
+        try:
+            self.assertRaises(ServerError, client.consumers.create, username='bob')
+            self.assertRaises(requests.ConnectionError, client.consumers.count)
+
+            client.apis.create(upstream_url=fake.url(), name='example', request_host=fake.domain_name())
+            started = time.time()
+            self.assertEqual(client.apis.retrieve('example')['name'], 'example')
+            self.assertGreaterEqual(time.time() - started, 0.05)
+        finally:
+            client.close()
+            server.stop()
+
+
+class RetryPolicyTestCase(TestCase):
+    def response(self, status_code, **headers):
+        return CannedResponse(status_code, b'', headers)
+
+    def test_classification(self):
+        policy = RetryPolicy(max_tries=3, base_delay=1, random=lambda: 1.0)
+
+        self.assertIsNone(policy.get_retry_delay('DELETE', 0, self.response(400)))
+        self.assertIsNone(policy.get_retry_delay('GET', 0, self.response(404)))
+        self.assertIsNone(policy.get_retry_delay('POST', 0, self.response(409)))
+        self.assertEqual(policy.get_retry_delay('POST', 0, self.response(500)), 1)
+        self.assertEqual(policy.get_retry_delay('GET', 1, error=requests.ConnectionError()), 2)
+        self.assertIsNone(policy.get_retry_delay('GET', 2, self.response(502)))
+        self.assertEqual(policy.stats, {'retries': 2, 'gave_up': 1, 'budget_exhausted': 0, 'deadline_exceeded': 0})
+
+        policy = RetryPolicy(retry_methods=('GET',))
+        self.assertIsNone(policy.get_retry_delay('POST', 0, self.response(500)))
+        self.assertIsNotNone(policy.get_retry_delay('GET', 0, self.response(500)))
+
+    def test_non_idempotent_methods(self):
+        policy = RetryPolicy(max_tries=3)
+
+        # The request may have been handled, sending it again could create the entity twice
+        self.assertIsNone(policy.get_retry_delay('POST', 0, error=requests.ReadTimeout()))
+        self.assertIsNone(policy.get_retry_delay('PATCH', 0, error=requests.ConnectionError()))
+        self.assertIsNotNone(policy.get_retry_delay('PUT', 0, error=requests.ReadTimeout()))
+        self.assertIsNotNone(policy.get_retry_delay('GET', 0, error=requests.ConnectionError()))
+
+        # The request was never sent
+        self.assertIsNotNone(policy.get_retry_delay('POST', 0, error=requests.ConnectTimeout()))
+        self.assertIsNotNone(policy.get_retry_delay('POST', 0, self.response(503)))
+
+    def test_connect_errors(self):
+        # A real refused connection, as raised by the installed requests
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        closed_url = 'http://127.0.0.1:%d/' % sock.getsockname()[1]
+        sock.close()
+        with self.assertRaises(requests.ConnectionError) as context:
+            requests.post(closed_url, timeout=1)
+        self.assertTrue(is_connect_error(context.exception))
+
+        # How urllib3 before 1.13 (vendored by requests 2.7) reports a refused and a dropped connection
+        def wrap(socket_error):
+            return requests.ConnectionError(MaxRetryError(None, closed_url, ProtocolError(
+                'Connection aborted.', socket_error)))
+
+        self.assertTrue(is_connect_error(wrap(socket.error(errno.ECONNREFUSED, 'Connection refused'))))
+        self.assertFalse(is_connect_error(wrap(socket.error(errno.ECONNRESET, 'Connection reset by peer'))))
+        self.assertFalse(is_connect_error(requests.ReadTimeout()))
+
+    def test_jitter(self):
+        policy = RetryPolicy(max_tries=10, base_delay=0.5, max_delay=3)
+        for attempt in range(9):
+            delay = policy.get_retry_delay('GET', attempt, self.response(503))
+            self.assertTrue(0 <= delay <= min(0.5 * 2 ** attempt, 3))
+
+    def test_retry_after(self):
+        policy = RetryPolicy(max_tries=5, max_delay=10)
+
+        self.assertEqual(policy.get_retry_delay('GET', 0, self.response(503, **{'Retry-After': '2'})), 2)
+        self.assertEqual(policy.get_retry_delay('GET', 0, self.response(429, **{'Retry-After': '60'})), 10)
+
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT', clock=lambda: 1445412480 - 5), 5)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT', clock=lambda: 1445412480 + 5), 0)
+        self.assertIsNone(parse_retry_after('soon'))
+
+    def test_budget(self):
+        policy = RetryPolicy(max_tries=3, budget=RetryBudget(ratio=0.5, reserve=2))
+
+        # The reserve allows two retries, after that every call earns half a retry
+        self.assertIsNotNone(policy.get_retry_delay('GET', 0, self.response(500)))
+        self.assertIsNotNone(policy.get_retry_delay('GET', 1, self.response(500)))
+        self.assertIsNone(policy.get_retry_delay('GET', 0, self.response(500)))
+        self.assertIsNotNone(policy.get_retry_delay('GET', 0, self.response(500)))
+        self.assertEqual(policy.stats, {'retries': 3, 'gave_up': 0, 'budget_exhausted': 1, 'deadline_exceeded': 0})
+
+    @requires_simulator_server
+    def test_client(self):
+        server = SimulatorServer(port=0, profile=SimulatorProfile(error_rates={
+            'consumers.list': {SERVER_ERROR: 1},
+            'consumers.create': {DISCONNECT: 1},
+        })).start()
+        down = SimulatorServer(port=0).start()
+        down.stop()
+        metrics = InMemoryMetrics()
+        policy = RetryPolicy(max_tries=3, base_delay=0.01)
+        client = KongAdminClient(server.url, metrics=metrics, retry_policy=policy)
+        unreachable = KongAdminClient(down.url, metrics=metrics, retry_policy=policy)
+
+        try:
+            self.assertRaises(ServerError, client.consumers.count)
+            self.assertRaises(requests.ConnectionError, client.consumers.create, username='bob')
+            self.assertRaises(ValueError, client.consumers.retrieve, 'bob')
+            client.consumers.delete('bob')
+            self.assertRaises(requests.ConnectionError, unreachable.consumers.create, username='bob')
+        finally:
+            client.close()
+            unreachable.close()
+            server.stop()
+
+        summary = metrics.summary()
+        self.assertEqual(summary[('GET', '/consumers/')]['statuses'], {500: 3})
+        self.assertEqual(summary[('GET', '/consumers/')]['retries'], 0 + 1 + 2)
+
+        # A POST is only retried when the connection could not be established, not when it dropped after sending
+        self.assertEqual(summary[('POST', '/consumers/')]['errors'], 1 + 3)
+
+        # Client errors are not retried
+        self.assertEqual(summary[('GET', '/consumers/{id}/')]['count'], 1)
+        self.assertEqual(summary[('DELETE', '/consumers/{id}/')]['count'], 1)
+        self.assertEqual(policy.stats, {'retries': 4, 'gave_up': 2, 'budget_exhausted': 0, 'deadline_exceeded': 0})
+
+
+@requires_simulator_server
+class DeadlineTestCase(TestCase):
+    def setUp(self):
+        self.server = SimulatorServer(port=0, profile=SimulatorProfile(
+            latency={'*': 0, 'consumers.retrieve': fixed(0.6)},
+            error_rates={'consumers.list': {SERVER_ERROR: 1}})).start()
+        self.policy = RetryPolicy(max_tries=3, base_delay=0.01)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_deadline(self):
+        now = [100.0]
+        deadline = Deadline(5, clock=lambda: now[0])
+
+        self.assertEqual(normalize_timeout(3), (3, 3))
+        self.assertEqual(normalize_timeout((1, 10)), (1, 10))
+        self.assertEqual(deadline.clamp((1, 10)), (1, 5))
+        self.assertEqual(deadline.clamp(None), (5, 5))
+
+        now[0] += 4.5
+        self.assertTrue(deadline.allows(0.25))
+        self.assertFalse(deadline.allows(0.5))
+        self.assertEqual(deadline.clamp((1, 10)), (0.5, 0.5))
+
+        now[0] += 1
+        self.assertTrue(deadline.expired)
+        self.assertEqual(deadline.remaining(), 0)
+
+    def test_timeout(self):
+        client = KongAdminClient(self.server.url, retry_policy=self.policy, timeout=(1, 0.1))
+        try:
+            client.consumers.create(username='bob')
+            started = time.time()
+            self.assertRaises(requests.Timeout, client.consumers.retrieve, 'bob')
+            self.assertLess(time.time() - started, 1)
+            self.assertEqual(self.policy.stats['gave_up'], 1)
+
+            with client.timeouts(timeout=2):
+                self.assertEqual(client.consumers.retrieve('bob')['username'], 'bob')
+        finally:
+            client.close()
+
+    def test_deadline_across_retries(self):
+        policy = RetryPolicy(max_tries=10, base_delay=0.2, random=lambda: 1.0)
+        client = KongAdminClient(self.server.url, retry_policy=policy, deadline=0.5)
+        try:
+            # Retries after 0.2s, then gives up as the next retry (0.4s later) would pass the deadline
+            started = time.time()
+            self.assertRaises(ServerError, client.consumers.count)
+            self.assertLess(time.time() - started, 0.5)
+            self.assertEqual(policy.stats['retries'], 1)
+            self.assertEqual(policy.stats['deadline_exceeded'], 1)
+
+            # Every call gets its own deadline
+            self.assertRaises(ServerError, client.consumers.count)
+            self.assertEqual(policy.stats['retries'], 2)
+
+            client.consumers.create(username='bob')
+            self.assertRaises(DeadlineExceededError, client.consumers.retrieve, 'bob')
+        finally:
+            client.close()
+
+    def test_scoped_deadline(self):
+        client = KongAdminClient(self.server.url, retry_policy=self.policy)
+        try:
+            client.consumers.create(username='bob')
+
+            # The deadline is shared by all calls within the block, a nested block can't extend it
+            started = time.time()
+            with client.timeouts(deadline=0.9):
+                client.consumers.retrieve('bob')
+                with client.timeouts(deadline=10):
+                    self.assertRaises(DeadlineExceededError, client.consumers.retrieve, 'bob')
+                self.assertRaises(DeadlineExceededError, client.consumers.create, username='alice')
+            self.assertLess(time.time() - started, 1.3)
+
+            self.assertIsNone(client.transport.get_deadline())
+            client.consumers.create(username='alice')
+        finally:
+            client.close()
+
+    def test_worker_threads(self):
+        client = KongAdminClient(self.server.url, retry_policy=self.policy)
+        try:
+            client.consumers.create(username='bob')
+            specs = [{'username_or_id': 'bob'}] * 2
+
+            # The workers of bulk operations send their requests within the caller's timeouts
+            with client.timeouts(timeout=(1, 0.1)):
+                outcomes = list(bulk_apply(bind_timeouts(client, client.consumers.retrieve), specs, concurrency=2))
+            self.assertEqual([type(outcome.error) for outcome in outcomes], [requests.ReadTimeout] * 2)
+
+            with client.timeouts(deadline=0.3):
+                outcomes = list(bulk_apply(bind_timeouts(client, client.consumers.retrieve), specs, concurrency=2))
+                self.assertEqual([type(outcome.error) for outcome in outcomes], [DeadlineExceededError] * 2)
+
+                outcomes = list(client.consumers.bulk_create([{'username': 'alice'}, {'username': 'eve'}]))
+                self.assertEqual([type(outcome.error) for outcome in outcomes], [DeadlineExceededError] * 2)
+        finally:
+            client.close()
+
+
+class BalancerTestCase(TestCase):
+    def test_node_pool(self):
+        now = [0]
+        pool = NodePool(['http://a/', 'http://b/', 'http://c/'], max_failures=2, ejection_time=10, clock=lambda: now[0])
+        a, b, c = pool.nodes
+
+        # Reads are spread round-robin, writes go to the first node
+        self.assertEqual([pool.get_candidates('GET')[0] for _ in range(4)], [a, b, c, a])
+        self.assertEqual(pool.get_candidates('POST'), [a, b, c])
+
+        pool.report_failure(a)
+        self.assertEqual(pool.get_candidates('POST'), [a, b, c])
+        pool.report_failure(a)
+        self.assertEqual(pool.get_candidates('POST'), [b, c])
+        self.assertEqual(set(pool.get_candidates('GET')[0] for _ in range(4)), set([b, c]))
+
+        # All nodes ejected, try them all anyway
+        for node in (b, b, c, c):
+            pool.report_failure(node)
+        self.assertEqual(pool.get_candidates('POST'), [a, b, c])
+
+        now[0] = 10
+        self.assertEqual(pool.available, [a, b, c])
+
+    def test_least_outstanding(self):
+        pool = NodePool(['http://a/', 'http://b/', 'http://c/'], strategy=LEAST_OUTSTANDING)
+        a, b, c = pool.nodes
+
+        pool.acquire(a)
+        pool.acquire(c)
+        self.assertEqual([pool.get_candidates('GET')[0] for _ in range(3)], [b, b, b])
+        pool.acquire(b)
+        pool.release(c)
+        self.assertEqual(pool.get_candidates('GET')[0], c)
+
+    @requires_simulator_server
+    def test_client(self):
+        simulator = KongAdminSimulator()
+        servers = [SimulatorServer(simulator, port=0).start() for _ in range(2)]
+        client = KongAdminClient([server.url for server in servers])
+        first, second = client.transport.pool.nodes
+
+        try:
+            client.consumers.create(username='bob')
+            for _ in range(4):
+                self.assertEqual(client.consumers.retrieve('bob')['username'], 'bob')
+            self.assertEqual((first.requests, second.requests), (3, 2))
+
+            # Fails over to the first node, and ejects the second one
+            servers[1].stop()
+            for _ in range(6):
+                self.assertEqual(client.consumers.retrieve('bob')['username'], 'bob')
+            self.assertEqual(second.failures, 3)
+            self.assertEqual(client.transport.pool.available, [first])
+
+            servers[1].start()
+            self.assertEqual(client.transport.check_health(), {first.api_url: True, second.api_url: True})
+            self.assertEqual(client.transport.pool.available, [first, second])
+        finally:
+            client.close()
+            for server in servers:
+                server.stop()
+
+    @requires_simulator_server
+    def test_write_failover(self):
+        server = SimulatorServer(port=0).start()
+        down = SimulatorServer(port=0).start()
+        down.stop()
+        metrics = InMemoryMetrics()
+        client = KongAdminClient([down.url, server.url], metrics=metrics, retry_policy=RetryPolicy(max_tries=1))
+        first, second = client.transport.pool.nodes
+
+        try:
+            # A write to a node that refuses connections (like one that is restarting) is sent to the next one
+            self.assertEqual(client.consumers.create(username='bob')['username'], 'bob')
+            self.assertEqual(first.failures, 1)
+            self.assertEqual(second.requests, 1)
+
+            # The health checker is started by the next request, and stopped when closing
+            client.transport.health_check_interval = 0.01
+            self.assertEqual(client.consumers.retrieve('bob')['username'], 'bob')
+            time.sleep(0.05)
+        finally:
+            client.close()
+            server.stop()
+        self.assertEqual(metrics.summary()[('POST', '/consumers/')]['statuses'], {201: 1})
+
+
+class SyncTestCase(TestCase):
+    STATE = {
+        'apis': [{
+            'name': 'mockbin',
+            'upstream_url': 'https://mockbin.com',
+            'request_host': 'mockbin.com',
+            'plugins': [{'name': 'rate-limiting', 'config': {'minute': 20}}],
+        }],
+        'consumers': [{
+            'username': 'bob',
+            'custom_id': '1234',
+            'basic_auth': [{'username': 'bob', 'password': 'secret'}],
+            'key_auth': [{'key': '0a1b2c3d'}],
+            'oauth2': [{'name': 'app', 'redirect_uri': 'https://example.com/'}],
+        }],
+    }
+
+    def get_state(self):
+        return json.loads(json.dumps(self.STATE))
+
+    def test_get_differences(self):
+        self.assertEqual(get_differences({'upstream_url': 'http://a', 'config': {'minute': 10, 'hour': 100}},
+                                         {'upstream_url': 'http://a/', 'config': {'minute': 10, 'hour': 50, 'day': 1}}),
+                         [('config.hour', 50, 100)])
+
+    def test_load_state(self):
+        self.assertEqual(load_state(six.StringIO(json.dumps(self.STATE))), self.STATE)
+        self.assertRaises(ValueError, load_state, six.StringIO('{"routes": []}'))
+        self.assertRaises(ValueError, load_state, six.StringIO(json.dumps({
+            'consumers': [{'username': 'bob'}, {'username': 'bob'}]})))
+        self.assertRaises(ValueError, load_state, six.StringIO(json.dumps({
+            'apis': [{'name': 'mockbin', 'plugins': [{'config': {}}]}]})))
+
+    def test_sync(self):
+        simulator = KongAdminSimulator()
+        simulator.consumers.create(username='alice')
+
+        plan = sync(simulator, self.get_state(), dry_run=True)
+        self.assertEqual(plan.report(), [
+            '- consumers alice', '+ apis mockbin', '+ consumers bob', '+ plugins mockbin/rate-limiting',
+            '+ basic_auth bob/bob', '+ key_auth bob/0a1b2c3d', '+ oauth2 bob/app'])
+        self.assertEqual(simulator.consumers.count(), 1)
+
+        result = sync(simulator, self.get_state())
+        self.assertTrue(result.succeeded)
+        self.assertEqual(len(result.results), 7)
+        self.assertEqual(simulator.consumers.retrieve('bob')['custom_id'], '1234')
+        self.assertEqual(simulator.consumers.key_auth('bob').list()['data'][0]['key'], '0a1b2c3d')
+
+        # Nothing changed
+        self.assertEqual(len(make_plan(simulator, self.get_state())), 0)
+
+        state = self.get_state()
+        state['apis'][0]['plugins'][0]['config']['minute'] = 30
+        state['consumers'][0]['custom_id'] = '5678'
+        state['consumers'][0]['key_auth'] = []
+        plan = make_plan(simulator, state)
+        self.assertEqual(plan.report(), [
+            '- key_auth bob/0a1b2c3d', "~ consumers bob: custom_id '1234' -> '5678'",
+            '~ plugins mockbin/rate-limiting: config.minute 20 -> 30'])
+        self.assertEqual(plan.summary(), {
+            ('key_auth', DELETE): 1, ('consumers', UPDATE): 1, ('plugins', UPDATE): 1})
+
+        self.assertTrue(sync(simulator, state).succeeded)
+        self.assertEqual(len(make_plan(simulator, state)), 0)
+        self.assertEqual(simulator.apis.plugins('mockbin').list()['data'][0]['config'], {'minute': 30})
+
+        # Without pruning, entities that are not in the desired state are left alone
+        simulator.apis.create('http://example.com/', name='example', request_host='example.com')
+        self.assertEqual(len(make_plan(simulator, state, prune=False)), 0)
+        self.assertEqual(make_plan(simulator, state).report(), ['- apis example'])
+
+    def test_failures(self):
+        simulator = KongAdminSimulator()
+        simulator.consumers.create(username='alice', custom_id='1234')
+
+        # bob can't be created (custom_id is taken), so neither can his credentials
+        state = self.get_state()
+        result = sync(simulator, state, prune=False)
+        self.assertFalse(result.succeeded)
+        self.assertEqual(sorted((change.kind, change.key) for change, error in result.errors), [
+            ('basic_auth', 'bob'), ('consumers', 'bob'), ('key_auth', '0a1b2c3d'), ('oauth2', 'app')])
+        self.assertEqual(simulator.apis.plugins('mockbin').count(), 1)
+
+    @requires_simulator_server
+    def test_client(self):
+        server = SimulatorServer(port=0).start()
+        client = KongAdminClient(server.url)
+        try:
+            self.assertTrue(sync(client, self.get_state(), concurrency=4).succeeded)
+            self.assertEqual(len(make_plan(client, self.get_state())), 0)
+            self.assertEqual(client.apis.plugins('mockbin').list()['data'][0]['config'], {'minute': 20})
+        finally:
+            client.close()
+            server.stop()
+
+
+class SnapshotTestCase(TestCase):
+    def populate(self, client):
+        for i in range(3):
+            client.apis.create('http://example.com/%d/' % i, name='api%d' % i, request_host='%d.example.com' % i)
+            client.apis.plugins('api%d' % i).create('rate-limiting', minute=i + 1)
+            client.consumers.create(username='user%d' % i, custom_id='%d' % i)
+            client.consumers.key_auth('user%d' % i).create(key='key%d' % i)
+        client.consumers.basic_auth('user0').create('user0', 'secret')
+        client.consumers.oauth2('user1').create('app', 'https://example.com/')
+        client.apis.plugins('api0').create('cors', consumer_id=client.consumers.retrieve('user2')['id'], max_age=60)
+
+    def get_state(self, client):
+        """
+        :return: Everything but ids and timestamps, to compare admins
+        """
+        def strip(record):
+            return dict((key, value) for key, value in record.items()
+                        if key not in ('id', 'created_at', 'api_id', 'consumer_id'))
+
+        state = {}
+        for api in client.apis.iterate():
+            state[api['name']] = (strip(api), sorted(
+                (plugin['name'], plugin['config'], plugin.get('consumer_id') is not None)
+                for plugin in client.apis.plugins(api['id']).iterate()))
+        for consumer in client.consumers.iterate():
+            state[consumer['username']] = (strip(consumer), [
+                sorted(json.dumps(strip(credential), sort_keys=True) for credential in admin.iterate())
+                for admin in (client.consumers.basic_auth(consumer['id']), client.consumers.key_auth(consumer['id']),
+                              client.consumers.oauth2(consumer['id']))])
+        return state
+
+    def test_roundtrip(self):
+        source, target = KongAdminSimulator(), KongAdminSimulator()
+        self.populate(source)
+
+        snapshot = six.StringIO()
+        counts = export_snapshot(source, snapshot, concurrency=4)
+        self.assertEqual(counts, {'apis': 3, 'plugins': 4, 'consumers': 3, 'basic_auth': 1, 'key_auth': 3, 'oauth2': 1})
+        self.assertEqual(len(snapshot.getvalue().splitlines()), 1 + sum(counts.values()))
+
+        snapshot.seek(0)
+        result = import_snapshot(target, snapshot, concurrency=4)
+        self.assertEqual(result.counts, counts)
+        self.assertEqual(result.errors, [])
+        self.assertEqual(self.get_state(target), self.get_state(source))
+
+        # Importing again conflicts, the entities belonging to existing APIs and consumers are skipped
+        snapshot.seek(0)
+        result = import_snapshot(target, snapshot)
+        self.assertEqual(sum(result.counts.values()), 0)
+        self.assertEqual(len(result.errors), sum(counts.values()))
+
+    @requires_simulator_server
+    def test_client(self):
+        self.check_client_roundtrip()
+
+    @requires_simulator_server
+    def test_client_records(self):
+        self.check_client_roundtrip(records=True)
+
+    def check_client_roundtrip(self, **kwargs):
+        servers = [SimulatorServer(port=0).start() for _ in range(2)]
+        source, target = [KongAdminClient(server.url, **kwargs) for server in servers]
+        try:
+            self.populate(source)
+            snapshot = six.StringIO()
+            export_snapshot(source, snapshot)
+            snapshot.seek(0)
+            self.assertEqual(import_snapshot(target, snapshot).errors, [])
+            self.assertEqual(self.get_state(target), self.get_state(source))
+        finally:
+            for client, server in zip((source, target), servers):
+                client.close()
+                server.stop()
+
+    def test_consumer_without_username(self):
+        source = KongAdminSimulator()
+        source.apis.create('http://example.com/', name='api', request_host='example.com')
+        consumer = source.consumers.create(custom_id='abc')
+        source.apis.plugins('api').create('rate-limiting', consumer_id=consumer['id'], minute=10)
+
+        snapshot = six.StringIO()
+        export_snapshot(source, snapshot)
+
+        # Into an empty admin, the plugin is linked to the consumer created for it
+        target = KongAdminSimulator()
+        snapshot.seek(0)
+        self.assertEqual(import_snapshot(target, snapshot).errors, [])
+        plugin = target.apis.plugins('api').list()['data'][0]
+        self.assertEqual(plugin['consumer_id'], target.consumers.list(custom_id='abc')['data'][0]['id'])
+
+        # Into an admin that already has the consumer, it is found by its custom_id
+        target = KongAdminSimulator()
+        existing = target.consumers.create(custom_id='abc')
+        snapshot.seek(0)
+        self.assertEqual(len(import_snapshot(target, snapshot).errors), 1)  # The consumer itself
+        self.assertEqual(target.apis.plugins('api').list()['data'][0]['consumer_id'], existing['id'])
+
+        # A consumer that can't be found is an error, the plugin is not created for all consumers
+        target = KongAdminSimulator()
+        lines = [line for line in snapshot.getvalue().splitlines() if json.loads(line)['kind'] != 'consumers']
+        result = import_snapshot(target, lines)
+        self.assertEqual(result.counts['plugins'], 0)
+        self.assertEqual([line['kind'] for line, _ in result.errors], ['plugins'])
+        self.assertIsInstance(result.errors[0][1], ValueError)
+        self.assertEqual(target.apis.plugins('api').count(), 0)
+
+    def test_invalid(self):
+        simulator = KongAdminSimulator()
+        self.assertRaises(ValueError, import_snapshot, simulator, ['{"kind": "apis", "data": {}}'])
+        self.assertRaises(ValueError, import_snapshot, simulator, ['{"kind": "snapshot", "version": 2}'])
+        self.assertRaises(ValueError, import_snapshot, simulator, [
+            '{"kind": "snapshot", "version": 1}', '{"kind": "key_auth", "parent": "1", "data": {"key": "abc"}}'])
+
+
+class MetricsTestCase(TestCase):
+    def test_get_route(self):
+        self.assertEqual(get_route('http://localhost:8001/'), '/')
+        self.assertEqual(get_route('http://localhost:8001/apis/?size=10'), '/apis/')
+        self.assertEqual(get_route('http://localhost:8001/apis/example/plugins/'), '/apis/{id}/plugins/')
+        self.assertEqual(get_route('http://localhost:8001/consumers/bob/keyauth/1234/'),
+                         '/consumers/{id}/keyauth/{id}/')
+        self.assertEqual(get_route('http://localhost:8001/plugins/cors/schema/'), '/plugins/{id}/schema/')
+        self.assertEqual(get_route('http://example.com/kong/consumers/bob/', 'http://example.com/kong/'),
+                         '/consumers/{id}/')
+
+    def test_histogram(self):
+        histogram = Histogram()
+        self.assertIsNone(histogram.percentile(50))
+
+        for i in range(1, 1001):
+            histogram.observe(i / 1000.0)
+
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.mean, 0.5005)
+        self.assertEqual(histogram.percentile(100), 1.0)
+        for percentile in (10, 50, 90, 99):
+            # Accurate to within a bucket
+            self.assertAlmostEqual(histogram.percentile(percentile), percentile / 100.0, delta=percentile / 100.0 * 0.2)
+
+    @requires_simulator_server
+    def test_client(self):
+        server = SimulatorServer(port=0).start()
+        metrics = InMemoryMetrics()
+        client = KongAdminClient(server.url, metrics=metrics)
+
+        try:
+            client.consumers.create(username='bob')
+            client.consumers.key_auth('bob').create()
+            client.consumers.retrieve('bob')
+            self.assertRaises(ValueError, client.consumers.retrieve, 'alice')
+            client.consumers.retrieve('bob')
+            client.consumers.retrieve('bob')
+        finally:
+            client.close()
+            server.stop()
+
+        summary = metrics.summary()
+        self.assertEqual(set(summary.keys()), set([
+            ('POST', '/consumers/'), ('POST', '/consumers/{id}/keyauth/'), ('GET', '/consumers/{id}/')]))
+
+        retrieve = summary[('GET', '/consumers/{id}/')]
+        self.assertEqual(retrieve['count'], 4)
+        self.assertEqual(retrieve['statuses'], {200: 3, 404: 1})
+        self.assertEqual(retrieve['retries'], 0)
+        self.assertGreater(retrieve['bytes'], 0)
+        self.assertTrue(0 < retrieve['p50'] <= retrieve['p99'] <= retrieve['max'])
+
+
 class SimulatorAPITestCase(KongAdminTesting.APITestCase):
     def on_create_client(self):
         return KongAdminSimulator()
@@ -1324,6 +3031,66 @@ class SimulatorConsumerTestCase(KongAdminTesting.ConsumerTestCase):
         return KongAdminSimulator()
 
 
+class CachingSimulatorAPITestCase(KongAdminTesting.APITestCase):
+    def on_create_client(self):
+        return CachingKongAdmin(KongAdminSimulator())
+
+
+class CachingSimulatorConsumerTestCase(KongAdminTesting.ConsumerTestCase):
+    def on_create_client(self):
+        return CachingKongAdmin(KongAdminSimulator())
+
+
+@requires_simulator_server
+class SimulatorServerTestCase(TestCase):
+    def test_port_in_use(self):
+        server = SimulatorServer(port=0).start()
+        try:
+            # Fails rather than waiting forever for the server to start
+            self.assertRaises(OSError, SimulatorServer(port=server.port).start)
+        finally:
+            server.stop()
+
+
+class SimulatorServerTestMixin(object):
+    """
+    Runs the test cases with the real clients against a SimulatorServer
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(SimulatorServerTestMixin, cls).setUpClass()
+        cls.server = SimulatorServer(port=0).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        super(SimulatorServerTestMixin, cls).tearDownClass()
+
+
+@requires_simulator_server
+class SimulatorServerClientAPITestCase(SimulatorServerTestMixin, KongAdminTesting.APITestCase):
+    def on_create_client(self):
+        return KongAdminClient(self.server.url)
+
+
+@requires_simulator_server
+class SimulatorServerClientConsumerTestCase(SimulatorServerTestMixin, KongAdminTesting.ConsumerTestCase):
+    def on_create_client(self):
+        return KongAdminClient(self.server.url)
+
+
+@requires_simulator_server
+class SimulatorServerRecordsClientAPITestCase(SimulatorServerTestMixin, KongAdminTesting.APITestCase):
+    def on_create_client(self):
+        return KongAdminClient(self.server.url, records=True)
+
+
+@requires_simulator_server
+class SimulatorServerRecordsClientConsumerTestCase(SimulatorServerTestMixin, KongAdminTesting.ConsumerTestCase):
+    def on_create_client(self):
+        return KongAdminClient(self.server.url, records=True)
+
+
 # class SimulatorPluginTestCase(KongAdminTesting.PluginTestCase):
 #     def on_create_client(self):
 #         return KongAdminSimulator()